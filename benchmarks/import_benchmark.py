@@ -0,0 +1,42 @@
+""" Measure the time a fresh interpreter needs to import the package.
+
+Each statement runs in a new process, so nothing is cached between rounds;
+the interpreter start-up alone is measured as a reference.
+```
+python benchmarks/import_benchmark.py
+```
+"""
+import statistics
+import subprocess
+import sys
+import time
+
+ROUNDS = 15
+STATEMENTS = {
+    "python start-up": "pass",
+    "import syringe_pump": "import syringe_pump",
+    "from syringe_pump import Pump": "from syringe_pump import Pump",
+    "parse a reply into a model": (
+        "from syringe_pump.response_parser import PumpResponse;"
+        "PumpResponse.from_output(b'\\n1 ml\\r\\n:', 'ivolume')"
+    ),
+    "eager: pydantic, quantiphy, aioserial": (
+        "import pydantic, quantiphy, aioserial; from pydantic import BaseModel"
+    ),
+}
+
+
+def import_time(statement: str) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    for name, statement in STATEMENTS.items():
+        samples = [import_time(statement) for _ in range(ROUNDS)]
+        print(f"{name:>38}: {statistics.median(samples) * 1e3:6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
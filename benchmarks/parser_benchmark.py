@@ -0,0 +1,46 @@
+""" Compare parsing pump replies into pydantic models and into lightweight records.
+
+Uses the replies recorded in `tests/casette.jsonl`.
+```
+python benchmarks/parser_benchmark.py
+```
+"""
+import timeit
+import tracemalloc
+from pathlib import Path
+
+from syringe_pump.cassette import read_cassette
+from syringe_pump.response_parser import PumpResponse, parse_output
+
+CASETTE = Path(__file__).parents[1] / "tests" / "casette.jsonl"
+ROUNDS = 200
+
+
+def allocated_bytes(parser, replies: list[bytes]) -> int:
+    tracemalloc.start()
+    parsed = [parser(raw_output, "foo") for raw_output in replies]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del parsed
+    return size // len(replies)
+
+
+def main():
+    replies = [exchange.reply.encode() for exchange in read_cassette(CASETTE)]
+
+    parsers = {
+        "PumpResponse.from_output": PumpResponse.from_output,
+        "parse_output": parse_output,
+    }
+    for name, parser in parsers.items():
+        elapsed = timeit.timeit(
+            lambda: [parser(raw_output, "foo") for raw_output in replies],
+            number=ROUNDS,
+        )
+        per_reply = elapsed / ROUNDS / len(replies) * 1e6
+        size = allocated_bytes(parser, replies)
+        print(f"{name:>24}: {per_reply:5.2f} us/reply, {size:5d} bytes/reply")
+
+
+if __name__ == "__main__":
+    main()
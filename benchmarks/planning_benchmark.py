@@ -0,0 +1,57 @@
+""" Compare planning a parameter sweep with `Quantity` arithmetic and with NumPy.
+
+Each candidate is a ramp followed by a constant rate; both ways compute the volume
+dispensed after every minute of the run. Needs NumPy.
+```
+python benchmarks/planning_benchmark.py
+```
+"""
+import time
+
+import numpy as np
+from quantiphy import Quantity
+
+from syringe_pump import planning
+from syringe_pump.planning import Segments
+
+CANDIDATES = 2000
+MINUTES = 30
+
+
+def with_quantities(rates: list[Quantity]) -> list[list[Quantity]]:
+    results = []
+    for rate in rates:
+        volumes = []
+        for minute in range(MINUTES + 1):
+            ramp = min(minute, 5)
+            volume = Quantity(rate * ramp**2 / 10, "l")  # ramp from 0 over 5 min
+            volume = Quantity(volume + rate * max(minute - 5, 0), "l")
+            volumes.append(volume)
+        results.append(volumes)
+    return results
+
+
+def with_numpy(rates: np.ndarray) -> np.ndarray:
+    start = np.stack([np.zeros_like(rates), rates], axis=-1)
+    end = np.stack([rates, rates], axis=-1)
+    segments = Segments.from_arrays(start, end, [[300.0, (MINUTES - 5) * 60.0]])
+    return planning.dispensed(segments, np.arange(MINUTES + 1) * 60.0)
+
+
+def main():
+    values = np.linspace(0.1e-3, 5e-3, CANDIDATES)
+    start = time.perf_counter()
+    slow = with_quantities([Quantity(v, "l/min") for v in values])
+    quantity_time = time.perf_counter() - start
+    start = time.perf_counter()
+    fast = with_numpy(values)
+    numpy_time = time.perf_counter() - start
+
+    assert np.allclose(np.array(slow, dtype=float), fast)
+    print(f"{CANDIDATES} candidates x {MINUTES + 1} time points")
+    print(f"  Quantity: {quantity_time * 1e3:8.1f} ms")
+    print(f"  NumPy:    {numpy_time * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
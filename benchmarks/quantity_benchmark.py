@@ -0,0 +1,36 @@
+""" Measure the CPU cost of encoding a rate command and decoding the reply,
+with and without the quantity caches from `syringe_pump.units`.
+```
+python benchmarks/quantity_benchmark.py
+```
+"""
+import timeit
+
+from quantiphy import Quantity
+
+from syringe_pump.units import format_quantity, parse_quantity
+
+ROUNDS = 20_000
+RATE = Quantity("1.25 ml/min")
+REPLY = "1.25 ml/min"
+
+
+def uncached():
+    command = f"irate {RATE:.4}"
+    return command, Quantity(REPLY)
+
+
+def cached():
+    command = f"irate {format_quantity(RATE)}"
+    return command, parse_quantity(REPLY)
+
+
+def main():
+    assert uncached()[0] == cached()[0]
+    for name, command in [("uncached", uncached), ("cached", cached)]:
+        elapsed = timeit.timeit(command, number=ROUNDS)
+        print(f"{name:>8}: {elapsed / ROUNDS * 1e6:6.2f} us/command")
+
+
+if __name__ == "__main__":
+    main()
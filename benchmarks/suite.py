@@ -0,0 +1,198 @@
+""" Benchmark the command path, from encoding a command to parsing its reply.
+
+Pumps talk to an in-memory transport that answers at once, so the numbers
+measure this package rather than the serial line. Results are printed and
+can be saved as JSON; compare against a saved run to catch regressions:
+```
+python benchmarks/suite.py --output results.json
+python benchmarks/suite.py --compare results.json --tolerance 0.2
+```
+The exit code is 1 when a benchmark got slower than the tolerance allows.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from collections import deque
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from quantiphy import Quantity
+
+from syringe_pump import Pump, PumpBus
+from syringe_pump.bus import encode_command
+from syringe_pump.response_parser import XON, PumpResponse, extract_quantity
+from syringe_pump.units import format_quantity
+
+REPEAT = 7
+RATES = [Quantity(f"{i + 1}.25 ul/min") for i in range(100)]
+VOLUMES = [Quantity(f"{i + 1}.5 ul") for i in range(100)]
+REPLIES = [
+    b"\n:\x11",
+    b"\n1.25 ml/min\r\n>\x11",
+    b"\n110 ul/min to 417 ul/min in 7.036 seconds\r\n:\x11",
+    b"\nFirmware:      v3.0.6\r\nPump address:  0\r\nSerial number: X\r\n:\x11",
+    b"\nArgument error: 200\r\n   Unknown syringe\r\n:\x11",
+]
+MESSAGES = ["1.25 ml/min", "9.8 nl/min to 31.8 ml/min", "8.6284 ml", "20.45 mm"]
+
+
+class MemorySerial:
+    """Answer every command at once with a bare prompt, from the addressed pump."""
+
+    def __init__(self) -> None:
+        self._replies: deque[bytes] = deque()
+
+    async def write_async(self, data: bytes) -> int:
+        for line in bytes(data).split(b"\r\n")[:-1]:
+            address, _, _ = line.partition(b"@")
+            prompt = b"%02d:" % int(address) if address else b":"
+            self._replies.append(b"\n" + prompt + XON)
+        return len(data)
+
+    async def read_until_async(self, expected: bytes = XON, size=None) -> bytes:
+        return self._replies.popleft()
+
+
+def measure(operation: Callable[[], object], number: int) -> list[float]:
+    """Seconds per operation, for each of `REPEAT` samples of `number` calls.
+    A first sample warms up caches and is discarded."""
+    samples = []
+    for _ in range(REPEAT + 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        samples.append((time.perf_counter() - start) / number)
+    return samples[1:]
+
+
+async def measure_async(
+    operation: Callable[[], Awaitable[object]], number: int
+) -> list[float]:
+    samples = []
+    for _ in range(REPEAT + 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            await operation()
+        samples.append((time.perf_counter() - start) / number)
+    return samples[1:]
+
+
+def cycle(items: list):
+    """Callable returning the next item of `items` on every call, round and round."""
+    index = -1
+
+    def next_item():
+        nonlocal index
+        index = (index + 1) % len(items)
+        return items[index]
+
+    return next_item
+
+
+def parsing_benchmarks(number: int) -> dict[str, list[float]]:
+    reply, message, rate = cycle(REPLIES), cycle(MESSAGES), cycle(RATES)
+    return {
+        "PumpResponse.from_output": measure(
+            lambda: PumpResponse.from_output(reply(), "foo"), number
+        ),
+        "extract_quantity": measure(lambda: extract_quantity(message()), number),
+        "encode_rate_command": measure(
+            lambda: encode_command(f"irate {format_quantity(rate())}", address=3),
+            number,
+        ),
+    }
+
+
+async def command_benchmarks(number: int, pumps: int) -> dict[str, list[float]]:
+    pump = Pump(serial=MemorySerial())
+    await pump._initialise()
+    rate, volume = cycle(RATES), cycle(VOLUMES)
+
+    bus = PumpBus(MemorySerial())
+    chain = [Pump(bus=bus, address=a) for a in range(1, pumps + 1)]
+    await asyncio.gather(*[p._initialise() for p in chain])
+
+    async def all_pumps():
+        await asyncio.gather(*[p._write("irate") for p in chain])
+
+    concurrent = await measure_async(all_pumps, max(number // pumps, 1))
+    return {
+        "_write": await measure_async(lambda: pump._write("irate"), number),
+        "Rate.set": await measure_async(lambda: pump.infusion_rate.set(rate()), number),
+        "TargetVolume.set": await measure_async(
+            lambda: pump.target_volume.set(volume()), number
+        ),
+        f"_write x{pumps} pumps": [t / pumps for t in concurrent],
+    }
+
+
+def summarise(samples: list[float]) -> dict[str, float]:
+    best = min(samples)
+    return {
+        "median": statistics.median(samples),
+        "min": best,
+        "max": max(samples),
+        "ops_per_second": 1 / best,
+    }
+
+
+def run_metadata() -> dict[str, str]:
+    try:
+        version = metadata.version("python-syringe-pump")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+    return {
+        "package_version": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print the change of the best time against the baseline; True if none regressed.
+    The best of several samples is the least disturbed by other processes."""
+    ok = True
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        ratio = result["min"] / baseline[name]["min"]
+        slower = ratio > 1 + tolerance
+        ok &= not slower
+        flag = "  SLOWER" if slower else ""
+        print(f"{name:>26}: {ratio:6.2f}x baseline{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--number", type=int, default=2000, help="calls per sample")
+    parser.add_argument("--pumps", type=int, default=16, help="pumps on one bus")
+    parser.add_argument("--output", type=Path, help="save results as JSON")
+    parser.add_argument("--compare", type=Path, help="JSON results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    samples = parsing_benchmarks(args.number)
+    samples.update(asyncio.run(command_benchmarks(args.number, args.pumps)))
+    results = {name: summarise(s) for name, s in samples.items()}
+    for name, result in results.items():
+        print(f"{name:>26}: {result['median'] * 1e6:8.2f} us/op")
+
+    if args.output:
+        report = {"metadata": run_metadata(), "unit": "s/op", "results": results}
+        args.output.write_text(json.dumps(report, indent=4))
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
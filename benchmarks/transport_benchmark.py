@@ -0,0 +1,60 @@
+""" Compare command throughput of the aioserial and the native asyncio transports.
+
+A fake pump answers every command on one end of a pseudo-terminal (POSIX only),
+while a `Pump` sends commands from the other end.
+```
+python benchmarks/transport_benchmark.py
+```
+"""
+import asyncio
+import os
+import threading
+import time
+
+import aioserial
+
+from syringe_pump import Pump
+from syringe_pump.transport import AsyncioSerial
+
+COMMANDS = 2000
+
+
+def answer_commands(fd: int):
+    """Reply to every line with an empty message and a prompt, until the pty closes."""
+    pending = b""
+    while True:
+        try:
+            pending += os.read(fd, 4096)
+        except OSError:
+            return
+        *lines, pending = pending.split(b"\r\n")
+        for _ in lines:
+            os.write(fd, b"\n:\x11")
+
+
+async def measure(serial) -> float:
+    pump = Pump(serial=serial)
+    pump._initialised = True
+    start = time.perf_counter()
+    for _ in range(COMMANDS):
+        await pump._write("irate")
+    return time.perf_counter() - start
+
+
+def main():
+    for transport in [aioserial.AioSerial, AsyncioSerial]:
+        pump_end, port_end = os.openpty()
+        threading.Thread(target=answer_commands, args=(pump_end,), daemon=True).start()
+        serial = transport(port=os.ttyname(port_end), timeout=2)
+        elapsed = asyncio.run(measure(serial))
+        serial.close()
+        os.close(port_end)
+        os.close(pump_end)
+        print(
+            f"{transport.__name__:>12}: {COMMANDS / elapsed:8.0f} commands/s, "
+            f"{elapsed / COMMANDS * 1e6:6.1f} us/command"
+        )
+
+
+if __name__ == "__main__":
+    main()
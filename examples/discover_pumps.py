@@ -0,0 +1,22 @@
+"""
+Find all pumps connected to the computer, on every serial port and address.
+```
+python examples/discover_pumps.py
+```
+"""
+
+import asyncio
+
+from syringe_pump.discovery import discover
+
+
+async def main():
+    pumps = await discover(addresses=range(100), timeout=0.2)
+    for serial_number, pump in sorted(pumps.items()):
+        print(f"{serial_number}: {pump.port}, address {pump.address}, {pump.firmware}")
+    if not pumps:
+        print("No pumps found")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,7 +5,7 @@ import asyncio
 import aioserial
 from quantiphy import Quantity
 
-from syringe_pump import Pump
+from syringe_pump import FlowProfile, Pump
 
 AS3 = 233
 C4 = 262
@@ -62,20 +62,20 @@ max_rate = 5  # max flow of the syringe pump, in ml/min
 start_at = 43  # skip the intros which don't work well
 
 
-async def tune(pump: Pump):
-    await pump.set_brightness(0)  # disable screen to avoid flicker
+def compile_tune() -> FlowProfile:
+    steps = []
     for note, beat in zip(notes[start_at:], beats[start_at:]):
-        if rate := max_rate * note / A5:
-            await pump.infusion_rate.set(Quantity(f"{rate} ml/min"))
-            await pump.run()
-        else:  # pause between notes
-            await pump.stop()
-
+        rate = max_rate * note / A5
         duration = float(beat) * tempo  # length of note/rest in ms
-        await asyncio.sleep(duration)  # wait for tone to finish
+        steps.append((Quantity(f"{rate} ml/min") if rate else None, duration))
+        steps.append((None, tempo / 10.0))  # brief pause between notes
+    return FlowProfile(steps)
 
-        await pump.stop()  # brief pause between notes
-        await asyncio.sleep(tempo / 10.0)
+
+async def tune(pump: Pump):
+    await pump.set_brightness(0)  # disable screen to avoid flicker
+    reports = await compile_tune().run(pump)
+    print("Worst note lateness:", max(r.lateness for r in reports), "s")
 
 
 async def main(pump: Pump):
@@ -85,5 +85,5 @@ async def main(pump: Pump):
 
 if __name__ == "__main__":
     serial = aioserial.AioSerial(port="COM4", baudrate=115200, timeout=2)
-    pump = Pump(serial=serial)
+    pump = Pump(serial=serial, elide_writes=True)  # skip repeated notes' rate writes
     asyncio.run(main(pump))
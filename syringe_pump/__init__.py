@@ -1,7 +1,45 @@
-from quantiphy import Quantity
+""" Control Legato syringe pumps over a serial port.
 
-from syringe_pump.exceptions import PumpCommandError, PumpError, PumpStateError
-from syringe_pump.pump import Pump, PumpVersion
-from syringe_pump.rate import Rate
-from syringe_pump.response_parser import PumpResponse
-from syringe_pump.syringe import Manufacturer, Syringe
+Everything below is imported on first use, so `import syringe_pump` stays fast
+for short-lived processes; see `syringe_pump._lazy`.
+"""
+
+from typing import TYPE_CHECKING
+
+from syringe_pump._lazy import lazy_attributes
+
+if TYPE_CHECKING:
+    from quantiphy import Quantity
+
+    from syringe_pump.bus import PumpBus
+    from syringe_pump.exceptions import PumpCommandError, PumpError, PumpStateError
+    from syringe_pump.group import PumpGroup
+    from syringe_pump.models import PumpResponse, PumpVersion
+    from syringe_pump.profile import FlowProfile
+    from syringe_pump.pump import Pump
+    from syringe_pump.rate import Rate
+    from syringe_pump.syringe import Manufacturer, Syringe
+    from syringe_pump.transport import AsyncioSerial
+
+_SOURCES = {
+    "Quantity": "quantiphy",
+    "PumpBus": "syringe_pump.bus",
+    "PumpCommandError": "syringe_pump.exceptions",
+    "PumpError": "syringe_pump.exceptions",
+    "PumpStateError": "syringe_pump.exceptions",
+    "FlowProfile": "syringe_pump.profile",
+    "PumpGroup": "syringe_pump.group",
+    "Pump": "syringe_pump.pump",
+    "PumpVersion": "syringe_pump.models",
+    "Rate": "syringe_pump.rate",
+    "PumpResponse": "syringe_pump.models",
+    "Manufacturer": "syringe_pump.syringe",
+    "Syringe": "syringe_pump.syringe",
+    "AsyncioSerial": "syringe_pump.transport",
+}
+__all__ = list(_SOURCES)
+__getattr__ = lazy_attributes(__name__, _SOURCES)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
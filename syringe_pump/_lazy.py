@@ -0,0 +1,19 @@
+""" Import modules on first attribute access, to keep `import syringe_pump` fast. """
+
+import importlib
+import sys
+from typing import Any, Callable
+
+
+def lazy_attributes(module_name: str, sources: dict[str, str]) -> Callable[[str], Any]:
+    """Make a module-level `__getattr__` that imports each name from its source module
+    the first time it is used, then stores it in the module like a regular import."""
+
+    def __getattr__(name: str) -> Any:
+        if name not in sources:
+            raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(sources[name]), name)
+        setattr(sys.modules[module_name], name, value)
+        return value
+
+    return __getattr__
@@ -0,0 +1,215 @@
+""" Share a single serial port between several daisy-chained pumps. """
+
+import asyncio
+import re
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from logging import getLogger
+from time import perf_counter
+from typing import Any, Coroutine, TypeVar
+
+from syringe_pump.exceptions import PumpError
+from syringe_pump.response_parser import XON
+from syringe_pump.transport import SerialTransport
+
+logger = getLogger(__name__)
+
+MAX_STRAY_REPLIES = 8
+_PROMPT_ADDRESS = re.compile(rb"(\d{1,2})(?::|[><T]\*?|\*)")
+_Lane = dict[int, deque[asyncio.Future]]
+T = TypeVar("T")
+
+
+class PumpBus:
+    """Own a serial port shared by one or more addressed pumps.
+
+    Every exchange (command and the reply up to the XON prompt) holds the port
+    exclusively. Urgent exchanges are served before regular ones; within each lane
+    pumps are served round-robin by address, so a chatty pump cannot starve the
+    others on the line. A cancelled exchange still reads its reply off the line.
+    """
+
+    def __init__(self, serial: SerialTransport) -> None:
+        self.serial = serial
+        self._addresses: set[int] = set()
+        # waiting exchanges by address; urgent lane first, then the regular one
+        self._lanes: tuple[_Lane, _Lane] = ({}, {})
+        self._busy: bool = False
+        self._last_served: int = -1
+
+    @classmethod
+    def for_serial(cls, serial: SerialTransport) -> "PumpBus":
+        """Get the bus that owns a serial port, creating it on first use.
+
+        Pumps created on the same port share the bus, so their commands never interleave.
+        """
+        bus = _buses.get(id(serial))
+        if bus is None or bus.serial is not serial:
+            bus = _buses[id(serial)] = cls(serial)
+        return bus
+
+    def attach(self, address: int):
+        """Register a pump address, so that replies can be routed to it."""
+        self._addresses.add(address)
+
+    def detach(self, address: int):
+        """Forget a pump address, e.g. after the pump was given a new one."""
+        self._addresses.discard(address)
+
+    async def exchange(
+        self, command: str, address: int = 0, urgent: bool = False
+    ) -> bytes:
+        """Send a command to the pump at `address` and return its raw reply.
+
+        Urgent commands, e.g. stopping a pump, are sent before any queued regular ones.
+        """
+        await self._acquire(address, urgent)
+        return await self._hold(self._exchange(command, address))
+
+    async def exchange_many(
+        self,
+        commands: list[str],
+        address: int = 0,
+        urgent: bool = False,
+        timings: list[float] | None = None,
+    ) -> list[bytes]:
+        """Send several commands in one write and return their raw replies in order.
+
+        The pump answers each command with its own XON-terminated reply,
+        so a batch costs roughly one round trip instead of one per command.
+        If `timings` is given, the seconds spent waiting for the port, writing,
+        and reading each reply are appended to it.
+        """
+        if timings is not None:
+            return await self._timed_exchange_many(commands, address, urgent, timings)
+        await self._acquire(address, urgent)
+        return await self._hold(self._exchange_many(commands, address))
+
+    @asynccontextmanager
+    async def reserve(self, urgent: bool = False):
+        """Hold the port for several exchanges, e.g. writing to many pumps at once.
+        Inside, use `serial` directly; other exchanges wait until the end."""
+        await self._acquire(0, urgent)
+        try:
+            yield self.serial
+        finally:
+            self._release()
+
+    async def _timed_exchange_many(
+        self, commands: list[str], address: int, urgent: bool, timings: list[float]
+    ) -> list[bytes]:
+        start = perf_counter()
+        await self._acquire(address, urgent)
+        timings.append(perf_counter() - start)
+        return await self._hold(self._exchange_many(commands, address, timings))
+
+    async def _hold(self, exchange: Coroutine[Any, Any, T]) -> T:
+        """Run an exchange on the acquired port and release the port when it ends.
+
+        A cancelled caller stops waiting, but the exchange keeps the port until its
+        replies are read or the reads time out, so they cannot reach the next command.
+        """
+        task = asyncio.ensure_future(exchange)
+        task.add_done_callback(self._release_after)
+        return await asyncio.shield(task)
+
+    def _release_after(self, task: asyncio.Future):
+        if not task.cancelled():
+            task.exception()  # retrieved, in case the caller stopped waiting
+        self._release()
+
+    async def _exchange(self, command: str, address: int) -> bytes:
+        await self.serial.write_async(encode_command(command, address))
+        return await self._read_reply(address)
+
+    async def _exchange_many(
+        self, commands: list[str], address: int, timings: list[float] | None = None
+    ) -> list[bytes]:
+        buffer = b"".join(encode_command(c, address) for c in commands)
+        start = perf_counter()
+        await self.serial.write_async(buffer)
+        if timings is not None:
+            timings.append(perf_counter() - start)
+        raw_outputs = []
+        for _ in commands:
+            start = perf_counter()
+            raw_outputs.append(await self._read_reply(address))
+            if timings is not None:
+                timings.append(perf_counter() - start)
+        return raw_outputs
+
+    async def _read_reply(self, address: int) -> bytes:
+        # a late reply to an exchange that timed out may still be on the line
+        for _ in range(MAX_STRAY_REPLIES):
+            raw_output = await self.serial.read_until_async(XON)
+            reply_address = _reply_address(raw_output)
+            if reply_address == address or reply_address not in self._addresses:
+                return raw_output
+            logger.warning(
+                f"Discarding stray reply from pump {reply_address}: {raw_output!r}"
+            )
+        raise PumpError(f"Pump {address} did not reply; got only stray replies")
+
+    async def _acquire(self, address: int, urgent: bool = False):
+        if not self._busy:
+            self._busy = True
+            self._last_served = address
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        lane = self._lanes[0 if urgent else 1]
+        lane.setdefault(address, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # the port was handed over as we got cancelled
+            else:
+                _discard_waiter(lane, address, waiter)
+            raise
+
+    def _release(self):
+        while (waiter := self._next_waiter()) is not None:
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._busy = False
+
+    def _next_waiter(self) -> asyncio.Future | None:
+        lane = next((lane for lane in self._lanes if lane), None)
+        if lane is None:
+            return None
+        addresses = sorted(lane)
+        address = next((a for a in addresses if a > self._last_served), addresses[0])
+        self._last_served = address
+        queue = lane[address]
+        waiter = queue.popleft()
+        if not queue:
+            del lane[address]
+        return waiter
+
+
+_buses: "weakref.WeakValueDictionary[int, PumpBus]" = weakref.WeakValueDictionary()
+
+
+def encode_command(command: str, address: int = 0) -> bytes:
+    """Format a command for the serial line; address 0 is sent without prefix."""
+    if address:
+        return f"{address:02d}@{command}\r\n".encode()
+    return f"@{command}\r\n".encode()
+
+
+def _discard_waiter(lane: _Lane, address: int, waiter: asyncio.Future):
+    queue = lane.get(address)
+    if queue is None or waiter not in queue:
+        return
+    queue.remove(waiter)
+    if not queue:
+        del lane[address]
+
+
+def _reply_address(raw_output: bytes) -> int:
+    prompt = raw_output.rstrip(XON).rstrip().rsplit(b"\n", 1)[-1]
+    if match := _PROMPT_ADDRESS.match(prompt):
+        return int(match.group(1))
+    return 0
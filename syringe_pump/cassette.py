@@ -0,0 +1,164 @@
+""" Record conversations with a pump and replay them without one.
+
+A cassette is a text file with one JSON object per line: a header, then one
+`Exchange` per command in the order the commands were sent. Lines are appended
+and flushed as the replies arrive, so a recording survives a crash and its size
+is not limited by memory. Replay reads the file once, in a single pass.
+"""
+
+import asyncio
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import IO, Iterator, NamedTuple
+
+from syringe_pump.response_parser import XON
+from syringe_pump.transport import SerialTransport
+
+FORMAT = "syringe-pump-cassette"
+VERSION = 1
+
+
+class Exchange(NamedTuple):
+    time: float
+    """Seconds from the start of the recording to writing the command."""
+    command: str
+    """Command as sent, including the address and line ending, e.g. `01@irate\\r\\n`."""
+    reply: str
+    """Reply up to and including the prompt, or whatever arrived before a timeout."""
+    latency: float
+    """Seconds from writing the command to receiving the reply."""
+
+
+def read_cassette(path: Path | str) -> Iterator[Exchange]:
+    """Yield the exchanges of a cassette in recorded order, one line at a time."""
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("format") != FORMAT:
+            raise ValueError(f"{path} is not a pump cassette")
+        if header.get("version", VERSION) > VERSION:
+            raise ValueError(f"Unsupported cassette version {header['version']}")
+        for line in f:
+            if line.strip():
+                yield Exchange(**json.loads(line))
+
+
+class CassetteWriter:
+    """Append exchanges to a cassette, flushing every line."""
+
+    def __init__(self, path: Path | str, append: bool = False) -> None:
+        self.path = Path(path)
+        resume = append and self.path.exists() and self.path.stat().st_size > 0
+        self._file: IO[str] = self.path.open("a" if resume else "w", encoding="utf-8")
+        self.offset = 0.0
+        if resume:
+            # continue the timeline of the existing recording
+            for exchange in read_cassette(self.path):
+                self.offset = exchange.time + exchange.latency
+        else:
+            self._write_line({"format": FORMAT, "version": VERSION})
+
+    def write(self, exchange: Exchange):
+        self._write_line(exchange._asdict())
+
+    def close(self):
+        self._file.close()
+
+    def _write_line(self, data):
+        self._file.write(json.dumps(data) + "\n")
+        self._file.flush()
+
+
+class RecordingSerial:
+    """Pass commands to `serial` and record every exchange to a cassette.
+
+    Replies that arrive when no command is waiting for one are not recorded.
+    """
+
+    def __init__(
+        self, serial: SerialTransport, path: Path | str, append: bool = False
+    ) -> None:
+        self.serial = serial
+        self.writer = CassetteWriter(path, append=append)
+        self._start = time.monotonic() - self.writer.offset
+        self._pending: deque[tuple[str, float]] = deque()
+
+    async def write_async(self, data: bytes) -> int:
+        sent = time.monotonic() - self._start
+        for command in bytes(data).decode().splitlines(keepends=True):
+            self._pending.append((command, sent))
+        return await self.serial.write_async(data)
+
+    async def read_until_async(self, expected: bytes = XON, size=None) -> bytes:
+        reply = await self.serial.read_until_async(expected, size)
+        if self._pending:
+            command, sent = self._pending.popleft()
+            latency = time.monotonic() - self._start - sent
+            self.writer.write(Exchange(sent, command, reply.decode(), latency))
+        return reply
+
+    def close(self):
+        self.writer.close()
+        if hasattr(self.serial, "close"):
+            self.serial.close()
+
+
+class ReplaySerial:
+    """Answer commands with the replies recorded on a cassette.
+
+    By default, each command gets the next reply recorded for the same command,
+    so the replay does not depend on the order of unrelated commands.
+    With `strict`, commands must arrive exactly in the recorded order.
+    With `timing`, replies are delayed by their recorded latency.
+    """
+
+    def __init__(
+        self, path: Path | str, strict: bool = False, timing: bool = False
+    ) -> None:
+        self.strict = strict
+        self.timing = timing
+        self._recorded: deque[Exchange] = deque()
+        self._by_command: dict[str, deque[Exchange]] = {}
+        for exchange in read_cassette(path):
+            if strict:
+                self._recorded.append(exchange)
+            else:
+                self._by_command.setdefault(exchange.command, deque())
+                self._by_command[exchange.command].append(exchange)
+        self._next_replies: deque[tuple[Exchange, float]] = deque()
+
+    def remaining(self) -> int:
+        """Number of recorded exchanges not replayed yet."""
+        if self.strict:
+            return len(self._recorded)
+        return sum(len(exchanges) for exchanges in self._by_command.values())
+
+    async def write_async(self, data: bytes) -> int:
+        sent = time.monotonic()
+        for command in bytes(data).decode().splitlines(keepends=True):
+            self._next_replies.append((self._take(command), sent))
+        return len(data)
+
+    async def read_until_async(self, expected: bytes = XON, size=None) -> bytes:
+        if not self._next_replies:
+            raise ValueError("No response set")
+        exchange, sent = self._next_replies.popleft()
+        if self.timing:
+            await asyncio.sleep(sent + exchange.latency - time.monotonic())
+        return exchange.reply.encode()
+
+    def _take(self, command: str) -> Exchange:
+        if self.strict:
+            if not self._recorded:
+                raise IndexError(f"Command {command!r} sent after the recording ended")
+            if self._recorded[0].command != command:
+                expected = self._recorded[0].command
+                raise ValueError(f"Expected command {expected!r}, got {command!r}")
+            return self._recorded.popleft()
+        if command not in self._by_command:
+            raise KeyError(f"Command {command!r} not found in the cassette")
+        exchanges = self._by_command[command]
+        if not exchanges:
+            raise IndexError(f"Command {command!r} has no outputs left")
+        return exchanges.popleft()
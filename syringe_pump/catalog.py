@@ -0,0 +1,224 @@
+""" Syringe types known to the pump, looked up without asking it.
+
+`syrmanu <code> ?` lists the volumes of one manufacturer in a slow multi-line exchange,
+and diameters are only reported once a syringe is selected. A `SyringeCatalog` reads
+all of them once per firmware version and keeps them in a file, so that choosing
+a syringe can be validated in memory.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, NamedTuple
+
+from syringe_pump.exceptions import PumpError
+from syringe_pump.response_parser import ResponseRecord, extract_quantity
+from syringe_pump.syringe import Manufacturer
+from syringe_pump.units import format_quantity, parse_quantity
+
+if TYPE_CHECKING:
+    from quantiphy import Quantity
+
+    from .pump import Pump
+
+FORMAT = "syringe-pump-catalog"
+VERSION = 1
+DEFAULT_PATH = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "syringe-pump"
+    / "catalog.json"
+)
+
+
+class SyringeType(NamedTuple):
+    manufacturer: Manufacturer
+    volume: "Quantity"
+    diameter: "Quantity | None"
+    """`None` if the catalog was built without diameters."""
+
+
+class SyringeCatalog:
+    """Valid volumes and diameters of the syringes a pump firmware knows.
+
+    `names` maps manufacturers to the names the pump displays, e.g. `"Hoshi"`.
+    Manufacturers the firmware does not support are left out.
+    """
+
+    def __init__(
+        self,
+        firmware: str,
+        syringes: Iterable[SyringeType] = (),
+        names: dict[Manufacturer, str] | None = None,
+    ) -> None:
+        self.firmware = firmware
+        self.names = names or {}
+        self._syringes: dict[Manufacturer, dict[str, SyringeType]] = {}
+        for syringe in syringes:
+            by_volume = self._syringes.setdefault(syringe.manufacturer, {})
+            by_volume[format_quantity(syringe.volume)] = syringe
+
+    def __iter__(self) -> Iterator[SyringeType]:
+        for by_volume in self._syringes.values():
+            yield from by_volume.values()
+
+    def __len__(self) -> int:
+        return sum(len(by_volume) for by_volume in self._syringes.values())
+
+    @property
+    def manufacturers(self) -> list[Manufacturer]:
+        return list(self._syringes)
+
+    def volumes(self, manufacturer: Manufacturer) -> "list[Quantity]":
+        return [s.volume for s in self._syringes.get(manufacturer, {}).values()]
+
+    def lookup(self, manufacturer: Manufacturer, volume: "Quantity") -> SyringeType:
+        """Find a syringe type; raise `ValueError` if the pump would reject it."""
+        if manufacturer not in self._syringes:
+            raise ValueError(
+                f"Firmware {self.firmware} has no {manufacturer.name} syringes"
+            )
+        by_volume = self._syringes[manufacturer]
+        try:
+            return by_volume[format_quantity(volume)]
+        except KeyError:
+            raise ValueError(
+                f"Unknown syringe. Valid volumes are: {', '.join(by_volume)}"
+            ) from None
+
+    def manufacturer_named(self, name: str) -> Manufacturer | None:
+        """Map a name displayed by the pump, e.g. in `syrmanu`, to the manufacturer."""
+        for manufacturer, displayed in self.names.items():
+            if displayed.casefold() == name.strip().casefold():
+                return manufacturer
+        return None
+
+    @classmethod
+    async def build(cls, pump: "Pump", diameters: bool = True) -> "SyringeCatalog":
+        """Ask the pump for every syringe type, one write per manufacturer.
+
+        With `diameters`, every syringe is selected in turn to read its diameter,
+        and the syringe that was selected before is restored at the end.
+        Don't build with `diameters` while the pump is running.
+        """
+        firmware = (await pump.version()).firmware
+        replies = await pump._write_many(
+            [f"syrmanu {manufacturer.name} ?" for manufacturer in Manufacturer],
+            error_state_ok=True,
+            return_exceptions=True,
+        )
+        volumes = {
+            manufacturer: [extract_quantity(line)[0] for line in reply.message]
+            for manufacturer, reply in zip(Manufacturer, replies)
+            if not isinstance(reply, PumpError) and reply.message
+        }
+        if not diameters:
+            return cls(
+                firmware,
+                [SyringeType(m, v, None) for m, vs in volumes.items() for v in vs],
+            )
+
+        original = await pump._write_many(
+            ["syrmanu", "diameter", "svolume"], error_state_ok=True
+        )
+        catalog = cls(firmware)
+        try:
+            for manufacturer, manufacturer_volumes in volumes.items():
+                commands = []
+                for volume in manufacturer_volumes:
+                    selection = f"syrmanu {manufacturer.name} {format_quantity(volume)}"
+                    commands += [selection, "diameter"]
+                replies = await pump._write_many(
+                    [*commands, "syrmanu"], error_state_ok=True
+                )
+                for volume, reply in zip(manufacturer_volumes, replies[1::2]):
+                    diameter, _ = extract_quantity(reply.message[0])
+                    by_volume = catalog._syringes.setdefault(manufacturer, {})
+                    by_volume[format_quantity(volume)] = SyringeType(
+                        manufacturer, volume, diameter
+                    )
+                name, _, _ = replies[-1].message[0].partition(",")
+                catalog.names[manufacturer] = name.strip()
+        finally:
+            pump.state.invalidate("syrmanu")
+            await _restore(pump, original, catalog)
+        return catalog
+
+    @classmethod
+    def load(
+        cls, firmware: str, path: Path | str = DEFAULT_PATH
+    ) -> "SyringeCatalog | None":
+        """Read the catalog of a firmware version; `None` if it was not saved yet."""
+        entry = _read_catalogs(Path(path)).get(firmware)
+        if entry is None:
+            return None
+        syringes, names = [], {}
+        for code, data in entry.items():
+            manufacturer = Manufacturer[code]
+            if data["name"] is not None:
+                names[manufacturer] = data["name"]
+            for volume, diameter in data["syringes"].items():
+                syringes.append(
+                    SyringeType(
+                        manufacturer,
+                        parse_quantity(volume),
+                        None if diameter is None else parse_quantity(diameter),
+                    )
+                )
+        return cls(firmware, syringes, names)
+
+    def save(self, path: Path | str = DEFAULT_PATH):
+        """Store the catalog, next to those of other firmware versions in the file."""
+        path = Path(path)
+        catalogs = _read_catalogs(path)
+        catalogs[self.firmware] = {
+            manufacturer.name: {
+                "name": self.names.get(manufacturer),
+                "syringes": {
+                    volume: None
+                    if s.diameter is None
+                    else s.diameter.render(prec="full")
+                    for volume, s in by_volume.items()
+                },
+            }
+            for manufacturer, by_volume in self._syringes.items()
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        content = {"format": FORMAT, "version": VERSION, "catalogs": catalogs}
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(content, indent=1))
+        temporary.replace(path)  # readers never see a half-written file
+
+    @classmethod
+    async def for_pump(
+        cls, pump: "Pump", path: Path | str = DEFAULT_PATH, diameters: bool = True
+    ) -> "SyringeCatalog":
+        """Load the catalog of the pump's firmware; build and save it on first use."""
+        catalog = cls.load((await pump.version()).firmware, path)
+        if catalog is None:
+            catalog = await cls.build(pump, diameters=diameters)
+            catalog.save(path)
+        return catalog
+
+
+async def _restore(
+    pump: "Pump", original: list[ResponseRecord], catalog: SyringeCatalog
+):
+    selected, diameter, volume = (response.message[0] for response in original)
+    name, _, details = selected.partition(",")
+    manufacturer = catalog.manufacturer_named(name)
+    if manufacturer is not None:
+        selected_volume, _ = extract_quantity(details.split(",")[0].strip())
+        await pump.syringe.set_manufacturer(manufacturer, selected_volume)
+    else:  # a custom syringe
+        await pump.syringe.set_diameter(float(diameter.split()[0]))
+        await pump.syringe.set_volume(extract_quantity(volume)[0])
+
+
+def _read_catalogs(path: Path) -> dict:
+    try:
+        content = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return {}
+    if content.get("format") != FORMAT or content.get("version") != VERSION:
+        return {}
+    return content["catalogs"]
@@ -0,0 +1,117 @@
+""" Find pumps on all serial ports at once.
+
+Every candidate address on a port is probed in a single write, and all ports
+are probed concurrently, so a scan takes about one short timeout in total,
+plus the time to send the probes, rather than a full timeout per port and address.
+"""
+
+import asyncio
+import os
+import re
+from logging import getLogger
+from typing import Callable, Iterable, NamedTuple
+
+from syringe_pump.bus import encode_command
+from syringe_pump.response_parser import XON
+from syringe_pump.transport import SerialTransport
+
+logger = getLogger(__name__)
+
+PROBE_COMMANDS = ["poll on", "version"]
+BITS_PER_BYTE = 10  # 8N1: a start bit, 8 data bits and a stop bit
+_VERSION = re.compile(
+    r"Firmware:\s*(\S+).*?Pump address:\s*(\d+).*?Serial number:\s*(\S+)", re.DOTALL
+)
+
+
+class DiscoveredPump(NamedTuple):
+    port: str
+    address: int
+    firmware: str
+    serial_number: str
+
+
+async def discover(
+    ports: Iterable[str] | None = None,
+    addresses: Iterable[int] = (0,),
+    timeout: float = 0.2,
+    baudrate: int = 115200,
+    open_port: Callable[[str], SerialTransport] | None = None,
+) -> dict[str, DiscoveredPump]:
+    """Probe serial ports for pumps and map their serial numbers to where they are.
+
+    `ports` defaults to all serial ports of the system; `addresses` lists the pump
+    addresses to try on each port, e.g. `range(100)` for whole daisy chains.
+    `timeout` bounds the wait for a reply, so keep it short. Ports that cannot be
+    opened are skipped. Found pumps are left in poll mode.
+    `open_port` replaces opening ports with `baudrate` and `timeout`, e.g. for testing;
+    the ports it opens are still assumed to run at `baudrate`.
+    """
+    if ports is None:
+        ports = _system_ports()
+    if open_port is None:
+
+        def open_port(port: str) -> SerialTransport:
+            return _open_serial(port, baudrate, timeout)
+
+    addresses = list(addresses)
+    results = await asyncio.gather(
+        *[_probe(port, addresses, open_port, baudrate) for port in ports]
+    )
+    return {pump.serial_number: pump for found in results for pump in found}
+
+
+async def _probe(
+    port: str,
+    addresses: list[int],
+    open_port: Callable[[str], SerialTransport],
+    baudrate: int,
+) -> list[DiscoveredPump]:
+    try:
+        serial = await asyncio.to_thread(open_port, port)
+    except (OSError, ValueError) as e:  # serial.SerialException is an OSError
+        logger.info(f"Skipping port {port}: {e}")
+        return []
+    try:
+        probe = b"".join(
+            encode_command(command, address)
+            for address in addresses
+            for command in PROBE_COMMANDS
+        )
+        await serial.write_async(probe)
+        # the write returns once the probe is buffered; a long probe at a low baud
+        # rate is still on the wire when a read would time out
+        await asyncio.sleep(len(probe) * BITS_PER_BYTE / baudrate)
+        found = []
+        for _ in range(len(addresses) * len(PROBE_COMMANDS)):
+            raw_output = await serial.read_until_async(XON)
+            if match := _VERSION.search(raw_output.decode(errors="replace")):
+                firmware, address, serial_number = match.groups()
+                found.append(
+                    DiscoveredPump(port, int(address), firmware, serial_number)
+                )
+            if not raw_output.endswith(XON):
+                break  # timed out, nobody else is answering
+        return found
+    except OSError as e:
+        logger.info(f"Lost port {port} while probing: {e}")
+        return []
+    finally:
+        if hasattr(serial, "close"):
+            serial.close()
+
+
+def _system_ports() -> list[str]:
+    from serial.tools.list_ports import comports
+
+    return [port.device for port in comports()]
+
+
+def _open_serial(port: str, baudrate: int, timeout: float) -> SerialTransport:
+    if os.name == "posix":
+        from syringe_pump.transport import AsyncioSerial
+
+        return AsyncioSerial(port=port, baudrate=baudrate, timeout=timeout)
+    import aioserial
+
+    return aioserial.AioSerial(port=port, baudrate=baudrate, timeout=timeout)
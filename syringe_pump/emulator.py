@@ -0,0 +1,533 @@
+""" Virtual Legato pumps for testing without hardware.
+
+`VirtualPump` keeps the state of a pump (rates, ramps, targets, dispensed volumes)
+and answers the commands used by this package. Talk to it in-process through
+`VirtualSerial`, or through a pseudo-terminal with `PtyServer` (POSIX only),
+which any serial client can open like a real port.
+Numbers such as rate limits and syringe sizes are plausible, not exact.
+"""
+
+import asyncio
+import math
+import os
+import re
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Iterable
+
+from quantiphy import QuantiPhyError, Quantity
+
+from syringe_pump.response_parser import XON
+from syringe_pump.syringe import Manufacturer
+
+MIN_SPEED = 0.18e-3  # slowest plunger speed, mm/min
+MAX_SPEED = 190.8  # fastest plunger speed, mm/min
+STROKE = 60.9  # plunger travel of a catalog syringe, mm
+MAX_TARGET_VOLUME = 1.0  # l
+CATALOG_VOLUMES = [1, 2, 3, 5, 10, 20, 30, 50, 100]  # ml
+QS_MODES = {
+    "i": "Infuse Only",
+    "w": "Withdraw Only",
+    "iw": "Infuse/Withdraw",
+    "wi": "Withdraw/Infuse",
+}
+_COMMAND = re.compile(r"(\d{1,2})?@(.*)")
+
+
+class VirtualPump:
+    """Stateful model of a Legato pump, answering one command at a time.
+
+    Time is read from `clock` (seconds), e.g. `loop.time` to follow a virtual clock.
+    Dispensed volumes are computed from the rate (or ramp) when they are observed,
+    and the pump stops with the `T*` prompt once the target volume or time is reached.
+    """
+
+    def __init__(
+        self,
+        address: int = 0,
+        serial_number: str = "VIRTUAL0",
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.address = address
+        self.serial_number = serial_number
+        self.clock = clock
+        self.firmware = "v3.0.6"
+        self.mode = "iw"
+        self.force = 30
+        self.brightness = 15
+        self.diameter = _catalog_diameter(10)  # mm
+        self.syringe_volume = 10e-3  # l
+        self.manufacturer: Manufacturer | None = Manufacturer.HOSHI
+        self.rates = {"i": 0.0, "w": 0.0}  # l/min
+        self.ramps: dict[str, tuple[float, float, float]] = {}  # start, end, seconds
+        self.volumes = {"i": 0.0, "w": 0.0}  # l, dispensed in each direction
+        self.target_volume: float | None = None
+        self.target_time: float | None = None  # seconds
+        self.direction: str | None = None  # "i" or "w" while running
+        self.target_reached = False
+        self.clock_offset = timedelta()
+        self._run_start = 0.0
+        # volumes are integrated from the last rate change, the start of a segment
+        self._segment_start = 0.0
+        self._segment_volume = 0.0
+
+    @property
+    def prompt(self) -> str:
+        self.advance()
+        if self.direction == "i":
+            return ">"
+        if self.direction == "w":
+            return "<"
+        return "T*" if self.target_reached else ":"
+
+    def handle(self, command: str) -> str:
+        """Answer a command with the text the pump sends back, including the prompt."""
+        self.advance()
+        name, _, argument = command.strip().partition(" ")
+        handler = getattr(self, f"_cmd_{name}", None)
+        if handler is None and name[:1] in "iw":
+            handler = getattr(self, f"_cmd_x{name[1:]}", None)
+            argument = f"{name[0]} {argument}".strip()
+        if handler is None:
+            message = [f"Command error: {name}"]
+        else:
+            try:
+                message = handler(argument) or []
+            except _ArgumentError as e:
+                message = [f"Argument error: {e.argument}", f"   {e}"]
+            except (ValueError, QuantiPhyError):  # e.g. letters for a number
+                message = [f"Argument error: {argument.split(' ')[0]}"]
+                message.append("   Invalid argument")
+        self.advance()
+        prompt = f"{self.address:02d}{self.prompt}" if self.address else self.prompt
+        return "".join(f"\n{line}\r" for line in message) + f"\n{prompt}"
+
+    def advance(self):
+        """Bring the dispensed volume up to date and stop at a target."""
+        if self.direction is None:
+            return
+        elapsed = self.clock() - self._segment_start
+        stop_after = self._time_to_target()
+        if stop_after is not None and elapsed >= stop_after:
+            self._accumulate(stop_after)
+            self.direction = None
+            self.target_reached = True
+        else:
+            self._accumulate(elapsed)
+
+    def current_rate(self) -> float:
+        if self.direction is None:
+            return 0.0
+        return self._rate_after(self.clock() - self._segment_start)
+
+    def _accumulate(self, elapsed: float):
+        self.volumes[self.direction] = self._segment_volume + self._volume_after(
+            elapsed
+        )
+
+    def _rate_after(self, elapsed: float) -> float:
+        if ramp := self.ramps.get(self.direction):
+            start, end, duration = ramp
+            return start + (end - start) * min(elapsed, duration) / duration
+        return self.rates[self.direction]
+
+    def _volume_after(self, elapsed: float) -> float:
+        if ramp := self.ramps.get(self.direction):
+            start, end, duration = ramp
+            ramping = min(elapsed, duration)
+            volume = start * ramping + (end - start) * ramping**2 / (2 * duration)
+            return (volume + end * max(elapsed - duration, 0)) / 60
+        return self.rates[self.direction] * elapsed / 60
+
+    def _time_to_target(self) -> float | None:
+        times = []
+        if self.target_time is not None:
+            times.append(self.target_time - (self._segment_start - self._run_start))
+        if self.target_volume is not None:
+            volume = self.target_volume - self._segment_volume
+            times.append(self._time_to_volume(volume))
+        return min(times, default=None)
+
+    def _time_to_volume(self, volume: float) -> float:
+        if volume <= 0:
+            return 0.0
+        volume *= 60  # per minute rates, time in seconds
+        if ramp := self.ramps.get(self.direction):
+            start, end, duration = ramp
+            slope = (end - start) / duration
+            ramped = start * duration + slope * duration**2 / 2
+            if volume > ramped:
+                return duration + (volume - ramped) / end if end else math.inf
+            if slope == 0:
+                return volume / start if start else math.inf
+            return (math.sqrt(start**2 + 2 * slope * volume) - start) / slope
+        rate = self.rates[self.direction]
+        return volume / rate if rate else math.inf
+
+    def _rate_limits(self) -> tuple[float, float]:
+        area = math.pi * (self.diameter / 2) ** 2  # mm^2, so rates in ul/min
+        return area * MIN_SPEED * 1e-6, area * MAX_SPEED * 1e-6
+
+    # Commands; `x` stands for the `i` or `w` direction letter
+
+    def _cmd_poll(self, argument: str):
+        pass
+
+    def _cmd_nvram(self, argument: str):
+        if argument not in ["none", "off", "on", ""]:
+            raise _ArgumentError(argument, "Invalid argument")
+
+    def _cmd_load(self, argument: str):
+        if not argument:
+            return [f"Quick Start - {QS_MODES[self.mode]} (qs {self.mode})"]
+        _, _, mode = argument.partition(" ")
+        if mode not in QS_MODES:
+            raise _ArgumentError(mode, "Invalid method")
+        self.mode = mode
+
+    def _cmd_time(self, argument: str):
+        if argument:
+            now = datetime.strptime(argument, "%m/%d/%y %H:%M:%S")
+            self.clock_offset = now - datetime.now()
+        now = datetime.now() + self.clock_offset
+        return [f"{now:%m/%d/%y} {now.hour % 12 or 12}:{now:%M:%S %p}"]
+
+    def _cmd_version(self, argument: str):
+        return [
+            f"Firmware:      {self.firmware}",
+            f"Pump address:  {self.address}",
+            f"Serial number: {self.serial_number}",
+        ]
+
+    def _cmd_addr(self, argument: str):
+        address = int(argument)
+        if not 0 <= address <= 99:
+            raise _ArgumentError(argument, "Out of range")
+        self.address = address
+        return [f"Pump address set to {address}"]
+
+    def _cmd_dim(self, argument: str):
+        self.brightness = int(argument)
+
+    def _cmd_force(self, argument: str):
+        if not argument:
+            return [f"{self.force}%"]
+        self.force = int(argument)
+
+    def _cmd_xrate(self, argument: str):
+        letter, _, value = argument.partition(" ")
+        low, high = self._rate_limits()
+        if value == "lim":
+            return [f"{_format(low, 'l/min')} to {_format(high, 'l/min')}"]
+        if not value:
+            return [_format(self.rates[letter], "l/min")]
+        rate = _parse(value, "l/min")
+        if not low <= rate <= high:
+            raise _ArgumentError(value, "Out of range")
+        if self.direction == letter and letter not in self.ramps:
+            self._new_segment()  # the new rate applies from now on
+        self.rates[letter] = rate
+
+    def _cmd_xramp(self, argument: str):
+        letter, _, value = argument.partition(" ")
+        if not value:
+            if letter not in self.ramps:
+                return ["Ramp not set up."]
+            start, end, duration = self.ramps[letter]
+            return [
+                f"{_format(start, 'l/min')} to {_format(end, 'l/min')} "
+                f"in {duration:g} seconds"
+            ]
+        match = re.fullmatch(r"(\S+ \S+) (\S+ \S+) (\S+)", value)
+        if not match:
+            raise _ArgumentError(value, "Invalid ramp")
+        start, end = _parse(match[1], "l/min"), _parse(match[2], "l/min")
+        self.ramps[letter] = (start, end, float(match[3]))
+        self.target_time = float(match[3])
+
+    def _cmd_xvolume(self, argument: str):
+        return [_format(self.volumes[argument], "l")]
+
+    def _cmd_cxvolume(self, argument: str):
+        self.volumes[argument] = 0.0
+        if self.direction == argument:
+            self._restart()
+
+    def _cmd_civolume(self, argument: str):
+        self._cmd_cxvolume("i")
+
+    def _cmd_cwvolume(self, argument: str):
+        self._cmd_cxvolume("w")
+
+    def _cmd_xrun(self, argument: str):
+        if self.rates[argument] == 0 and argument not in self.ramps:
+            raise _ArgumentError(f"{argument}run", "Rate not set")
+        self.direction = argument
+        self.target_reached = False
+        self._restart()
+
+    def _cmd_stp(self, argument: str):
+        self.direction = None
+        self.target_reached = False
+
+    def _cmd_tvolume(self, argument: str):
+        if not argument:
+            if self.target_volume is None:
+                return ["Target volume not set"]
+            return [_format(self.target_volume, "l")]
+        volume = _parse(argument, "l")
+        if not 0 < volume <= MAX_TARGET_VOLUME:
+            raise _ArgumentError(argument.split()[0], "Target volume out of range")
+        self.target_volume = volume
+        self.target_time = None
+        self._restart()
+
+    def _cmd_ctvolume(self, argument: str):
+        self.target_volume = None
+
+    def _cmd_ttime(self, argument: str):
+        if not argument:
+            if self.target_time is None:
+                return ["Target time not set"]
+            seconds = round(self.target_time)
+            if seconds < 60:
+                return [f"{seconds} seconds"]
+            return [
+                f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+            ]
+        *hours_minutes, seconds = [int(v) for v in argument.split(":")]
+        hours, minutes = ([0, 0] + hours_minutes)[-2:]
+        self.target_time = hours * 3600 + minutes * 60 + seconds
+        self.target_volume = None
+        self._restart()
+
+    def _cmd_cttime(self, argument: str):
+        self.target_time = None
+        self.ramps.clear()
+
+    def _cmd_diameter(self, argument: str):
+        if not argument:
+            return [f"{self.diameter:.4f} mm"]
+        self.diameter = float(argument)
+        self.manufacturer = None
+
+    def _cmd_svolume(self, argument: str):
+        if not argument:
+            return [_format(self.syringe_volume, "l")]
+        self.syringe_volume = _parse(argument, "l")
+
+    def _cmd_syrmanu(self, argument: str):
+        if not argument:
+            if self.manufacturer is None:
+                return ["Custom syringe"]
+            name = self.manufacturer.name.replace("_", " ").title()
+            volume = _format(self.syringe_volume, "l")
+            return [f"{name}, {volume}, {self.diameter:.2f} mm"]
+        name, _, volume = argument.partition(" ")
+        try:
+            manufacturer = Manufacturer[name]
+        except KeyError:
+            try:
+                manufacturer = Manufacturer(name)
+            except ValueError:
+                raise _ArgumentError(name, "Unknown manufacturer") from None
+        if volume == "?":
+            return [f"{v} ml" for v in CATALOG_VOLUMES]
+        volume_ml = _parse(volume, "l") * 1e3 if volume else 10
+        if round(volume_ml, 6) not in CATALOG_VOLUMES:
+            raise _ArgumentError(volume.split()[0], "Unknown syringe")
+        self.manufacturer = manufacturer
+        self.syringe_volume = volume_ml * 1e-3
+        self.diameter = _catalog_diameter(volume_ml)
+
+    def _cmd_status(self, argument: str):
+        direction = self.direction or "i"
+        flags = f"{direction}....{'T' if self.target_reached else '.'}"
+        femto_per_second = self.current_rate() / 60 * 1e15
+        elapsed = self.clock() - self._run_start if self.direction else 0.0
+        volume = self.volumes[direction] * 1e15
+        return [f"{femto_per_second:.0f} {elapsed * 1e3:.0f} {volume:.0f} {flags}"]
+
+    def _restart(self):
+        """Targets count from the moment they are set or the pump is started."""
+        if self.direction is not None:
+            self._run_start = self.clock()
+            self._new_segment()
+
+    def _new_segment(self):
+        self._segment_start = self.clock()
+        self._segment_volume = self.volumes[self.direction]
+
+
+class VirtualSerial:
+    """In-process stand-in for `aioserial.AioSerial`, connected to virtual pumps.
+
+    Replies become available `latency` seconds after the command was written,
+    or after the pump's previous reply, whichever is later;
+    `latency` may map command names, e.g. `irate`, to their own delays.
+    Commands to an address no pump has are not answered; reads then time out
+    after `timeout` seconds and return what was received, like a real port.
+    """
+
+    def __init__(
+        self,
+        pumps: VirtualPump | Iterable[VirtualPump] | None = None,
+        latency: float | dict[str, float] = 0.0,
+        timeout: float = 2.0,
+    ) -> None:
+        if pumps is None:
+            pumps = VirtualPump()
+        self.pumps = [pumps] if isinstance(pumps, VirtualPump) else list(pumps)
+        self.chain = _Chain(self.pumps, latency)
+        self.timeout = timeout
+        self._replies: asyncio.Queue[tuple[float, bytes]] | None = None
+
+    async def write_async(self, data: bytes) -> int:
+        loop = asyncio.get_running_loop()
+        if self._replies is None:
+            self._replies = asyncio.Queue()
+        for ready_at, reply in self.chain.feed(bytes(data), loop.time()):
+            self._replies.put_nowait((ready_at, reply))
+        return len(data)
+
+    async def read_until_async(self, expected: bytes = XON, size=None) -> bytes:
+        loop = asyncio.get_running_loop()
+        if self._replies is None:
+            self._replies = asyncio.Queue()
+        try:
+            ready_at, reply = await asyncio.wait_for(self._replies.get(), self.timeout)
+        except asyncio.TimeoutError:
+            return b""
+        await asyncio.sleep(ready_at - loop.time())
+        return reply
+
+
+class PtyServer:
+    """Serve virtual pumps on a pseudo-terminal; open `port` like a serial port.
+
+    Usage: `port = await PtyServer(pumps).start()`, then e.g.
+    `AsyncioSerial(port=port)`. Call `close()` when done.
+    """
+
+    def __init__(
+        self,
+        pumps: VirtualPump | Iterable[VirtualPump] | None = None,
+        latency: float | dict[str, float] = 0.0,
+    ) -> None:
+        if pumps is None:
+            pumps = VirtualPump()
+        self.pumps = [pumps] if isinstance(pumps, VirtualPump) else list(pumps)
+        self.chain = _Chain(self.pumps, latency)
+        self.port: str | None = None
+        self._fds: tuple[int, int] | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self) -> str:
+        import termios
+        import tty
+
+        pump_end, port_end = os.openpty()
+        tty.setraw(pump_end, termios.TCSANOW)
+        os.set_blocking(pump_end, False)
+        self._fds = (pump_end, port_end)
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(pump_end, self._on_readable)
+        self.port = os.ttyname(port_end)
+        return self.port
+
+    def close(self):
+        if self._fds is None:
+            return
+        self._loop.remove_reader(self._fds[0])
+        for fd in self._fds:
+            os.close(fd)
+        self._fds = None
+
+    def _on_readable(self):
+        pump_end = self._fds[0]
+        try:
+            data = os.read(pump_end, 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:  # the port end was closed
+            return
+        for ready_at, reply in self.chain.feed(data, self._loop.time()):
+            self._loop.call_at(ready_at, self._send, reply)
+
+    def _send(self, reply: bytes):
+        if self._fds is not None:
+            os.write(self._fds[0], reply)
+
+
+class _Chain:
+    """Split incoming bytes into commands and dispatch them to pumps by address."""
+
+    def __init__(
+        self, pumps: list[VirtualPump], latency: float | dict[str, float]
+    ) -> None:
+        self.pumps = pumps
+        self.latency = latency
+        self._pending = b""
+        self._busy_until: dict[int, float] = {}
+
+    def feed(self, data: bytes, now: float) -> list[tuple[float, bytes]]:
+        """Handle the complete commands received so far; return (ready_at, reply) pairs.
+
+        A pump works through its commands one at a time, so each reply is ready
+        `latency` after the previous reply of the same pump, and in order.
+        """
+        *lines, self._pending = (self._pending + data).split(b"\r\n")
+        replies = []
+        for line in lines:
+            match = _COMMAND.fullmatch(line.decode())
+            if not match:
+                continue
+            address, command = match.groups()
+            pump = self._find(int(address or 0), addressed=address is not None)
+            if pump is None:
+                continue
+            reply = pump.handle(command).encode() + XON
+            start = max(now, self._busy_until.get(pump.address, now))
+            ready_at = self._busy_until[pump.address] = start + self._delay(command)
+            replies.append((ready_at, reply))
+        return replies
+
+    def _find(self, address: int, addressed: bool) -> VirtualPump | None:
+        for pump in self.pumps:
+            if pump.address == address:
+                return pump
+        if not addressed and len(self.pumps) == 1:
+            return self.pumps[0]  # a lone pump answers unaddressed commands
+        return None
+
+    def _delay(self, command: str) -> float:
+        if isinstance(self.latency, dict):
+            return self.latency.get(command.split(" ", 1)[0], 0.0)
+        return self.latency
+
+
+class _ArgumentError(Exception):
+    def __init__(self, argument: str, message: str) -> None:
+        self.argument = argument
+        super().__init__(message)
+
+
+def _catalog_diameter(volume_ml: float) -> float:
+    """Diameter in mm of a syringe holding `volume_ml` over the standard stroke."""
+    return math.sqrt(4 * volume_ml * 1e3 / (math.pi * STROKE))
+
+
+def _parse(text: str, units: str) -> float:
+    try:
+        quantity = Quantity(text)
+    except QuantiPhyError:
+        raise _ArgumentError(text, "Invalid number") from None
+    if quantity.units != units:
+        raise _ArgumentError(text, f"Expected units of {units}")
+    return float(quantity)
+
+
+def _format(value: float, units: str) -> str:
+    if value == 0:
+        return f"0 u{units}"
+    return Quantity(value, units).render(prec=5)
@@ -1,7 +1,7 @@
 import typing
 
 if typing.TYPE_CHECKING:
-    from .response_parser import PumpResponse
+    from .response_parser import PumpResponse, ResponseRecord
 
 
 class PumpError(Exception):
@@ -13,7 +13,7 @@ class PumpError(Exception):
 class PumpCommandError(PumpError):
     """Executing a command caused an error to be displayed."""
 
-    def __init__(self, response: "PumpResponse", *args) -> None:
+    def __init__(self, response: "PumpResponse | ResponseRecord", *args) -> None:
         self.response = response
         super().__init__(*args)
 
@@ -35,7 +35,9 @@ class PumpStateError(PumpCommandError):
         return f"Pump state error: {self._get_message()}\n{self.response}"
 
     @classmethod
-    def from_response(cls, response: "PumpResponse") -> "PumpStateError":
+    def from_response(
+        cls, response: "PumpResponse | ResponseRecord"
+    ) -> "PumpStateError":
         if response.prompt == "T*":
             return TargetReachedError(response)
         elif response.prompt == "*":
@@ -0,0 +1,240 @@
+""" Send the same command to many pumps at once. """
+
+import asyncio
+from contextlib import AsyncExitStack
+from operator import attrgetter
+from time import perf_counter
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterable,
+    Iterator,
+    Literal,
+    NamedTuple,
+    TypeVar,
+)
+
+from syringe_pump.bus import PumpBus, encode_command
+from syringe_pump.exceptions import PumpError
+from syringe_pump.pump import Pump
+
+T = TypeVar("T")
+
+
+class PumpOutcome(NamedTuple):
+    pump: Pump
+    result: Any
+    """Return value of the operation, `None` if it failed."""
+    error: Exception | None
+
+
+class StartReport(NamedTuple):
+    pump: Pump
+    estimated_skew: float
+    """Seconds from the first pump receiving its command to this pump receiving its own.
+    Not measured: estimated from the time of each write, the position of the command
+    in it and the baud rate. Zero for ports without a baud rate, e.g. virtual ones."""
+    latency: float
+    """Seconds from writing the command to this pump's reply."""
+    error: Exception | None
+
+
+class PumpGroupError(PumpError):
+    """One or more pumps of a group failed; `errors` holds each pump's exception."""
+
+    def __init__(self, errors: dict[Pump, Exception]) -> None:
+        self.errors = errors
+        details = "; ".join(repr(e) for e in errors.values())
+        super().__init__(f"{len(errors)} pump(s) failed: {details}")
+
+
+class GroupResult(Generic[T]):
+    """Outcome of an operation on every pump of a group, in the order of the group."""
+
+    def __init__(self, outcomes: list[PumpOutcome]) -> None:
+        self.outcomes = outcomes
+
+    def __iter__(self) -> Iterator[PumpOutcome]:
+        return iter(self.outcomes)
+
+    def __len__(self) -> int:
+        return len(self.outcomes)
+
+    @property
+    def ok(self) -> bool:
+        return all(outcome.error is None for outcome in self.outcomes)
+
+    @property
+    def errors(self) -> dict[Pump, Exception]:
+        return {o.pump: o.error for o in self.outcomes if o.error is not None}
+
+    @property
+    def results(self) -> dict[Pump, T]:
+        """Results of the pumps that succeeded."""
+        return {o.pump: o.result for o in self.outcomes if o.error is None}
+
+    def raise_errors(self) -> "GroupResult[T]":
+        """Raise `PumpGroupError` if any pump failed, otherwise return self."""
+        if not self.ok:
+            raise PumpGroupError(self.errors)
+        return self
+
+
+class PumpGroup:
+    """A fleet of pumps, commanded together.
+
+    Operations start on all pumps at once, at most `max_concurrency` at a time,
+    so they take about as long as the slowest pump rather than the sum.
+    Pumps sharing a serial port still take turns on it, as their bus requires.
+    A failing pump does not stop the others; its exception is collected instead.
+    """
+
+    def __init__(
+        self, pumps: Iterable[Pump], max_concurrency: int | None = None
+    ) -> None:
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be a positive integer")
+        self.pumps = list(pumps)
+        self.max_concurrency = max_concurrency
+
+    def __iter__(self) -> Iterator[Pump]:
+        return iter(self.pumps)
+
+    def __len__(self) -> int:
+        return len(self.pumps)
+
+    async def call(
+        self, operation: str | Callable[[Pump], Awaitable[T]], *args, **kwargs
+    ) -> GroupResult[T]:
+        """Run `operation` on every pump and collect the results.
+
+        `operation` is either a coroutine function taking the pump,
+        or the name of a pump method, e.g. `"infusion_rate.set"`,
+        which is then called with `args` and `kwargs`.
+        """
+        if isinstance(operation, str):
+            method = attrgetter(operation)
+
+            def operation(pump: Pump) -> Awaitable[Any]:
+                return method(pump)(*args, **kwargs)
+
+        elif args or kwargs:
+            raise TypeError("Arguments can only be given with a method name")
+
+        semaphore = asyncio.Semaphore(self.max_concurrency or max(len(self.pumps), 1))
+
+        async def outcome(pump: Pump) -> PumpOutcome:
+            async with semaphore:
+                try:
+                    return PumpOutcome(pump, await operation(pump), None)
+                except Exception as e:
+                    return PumpOutcome(pump, None, e)
+
+        return GroupResult(list(await asyncio.gather(*map(outcome, self.pumps))))
+
+    async def initialise(self, probe: bool = False) -> GroupResult[list[str]]:
+        """Initialise all pumps at once; see `Pump._initialise` for `probe`.
+        The result of each pump lists the settings that were sent to it."""
+        return await self.call("_initialise", probe=probe)
+
+    async def run(
+        self, direction: Literal["infuse", "withdraw"] = "infuse"
+    ) -> GroupResult[None]:
+        return await self.call("run", direction)
+
+    async def stop(self) -> GroupResult[None]:
+        return await self.call("stop")
+
+    async def run_synchronized(
+        self, direction: Literal["infuse", "withdraw"] = "infuse"
+    ) -> list[StartReport]:
+        """Start all pumps as close to the same instant as possible.
+
+        Every serial port is reserved first, then the run commands for all pumps
+        on a port are sent in one write, and all ports are written in the same
+        event loop iteration. Set rates and targets beforehand.
+        """
+        if direction not in ["infuse", "withdraw"]:
+            raise ValueError("Direction must be 'infuse' or 'withdraw'")
+        return await self._synchronized(f"{direction[0]}run")
+
+    async def stop_synchronized(self) -> list[StartReport]:
+        """Stop all pumps as close to the same instant as possible,
+        ahead of other commands waiting for the ports."""
+        return await self._synchronized("stp", urgent=True, error_state_ok=True)
+
+    async def _synchronized(
+        self, command: str, urgent: bool = False, error_state_ok: bool = False
+    ) -> list[StartReport]:
+        by_bus: dict[PumpBus, list[Pump]] = {}
+        for pump in self.pumps:
+            if not pump._initialised:
+                raise PumpError("Pump not initialised. Call `_initialise()` first.")
+            by_bus.setdefault(pump.bus, []).append(pump)
+        # a fixed order of reservation cannot deadlock with another group
+        buses = sorted(by_bus, key=id)
+        buffers = {
+            bus: [encode_command(command, pump.address) for pump in by_bus[bus]]
+            for bus in buses
+        }
+        loop = asyncio.get_running_loop()
+        written: dict[PumpBus, float] = {}
+        write_times: dict[PumpBus, float] = {}
+
+        async def write(bus: PumpBus):
+            written[bus] = loop.time()
+            start = perf_counter()
+            await bus.serial.write_async(b"".join(buffers[bus]))
+            write_times[bus] = perf_counter() - start
+
+        async def read(bus: PumpBus) -> list[tuple[Pump, float, Exception | None]]:
+            replies = []
+            for i, pump in enumerate(by_bus[bus]):
+                error = None
+                try:
+                    start = perf_counter()
+                    raw_output = await bus._read_reply(pump.address)
+                    # hooks, e.g. a `PumpWatcher`, see the command like any other
+                    pump._receive(
+                        raw_output,
+                        command,
+                        error_state_ok,
+                        queued=queued if i == 0 else 0.0,
+                        write=write_times[bus] if i == 0 else 0.0,
+                        read=perf_counter() - start,
+                    )
+                except PumpError as e:
+                    error = e
+                replies.append((pump, loop.time() - written[bus], error))
+            return replies
+
+        async with AsyncExitStack() as stack:
+            start = perf_counter()
+            for bus in buses:
+                await stack.enter_async_context(bus.reserve(urgent))
+            queued = perf_counter() - start
+            await asyncio.gather(*map(write, buses))
+            replies = await asyncio.gather(*map(read, buses))
+
+        received = {}
+        for bus in buses:
+            seconds_per_byte = 10 / _baudrate(bus.serial)  # start and stop bits
+            sent = 0
+            for pump, encoded in zip(by_bus[bus], buffers[bus]):
+                sent += len(encoded)
+                received[pump] = written[bus] + sent * seconds_per_byte
+        first = min(received.values())
+        reports = {
+            pump: StartReport(pump, received[pump] - first, latency, error)
+            for bus_replies in replies
+            for pump, latency, error in bus_replies
+        }
+        return [reports[pump] for pump in self.pumps]
+
+
+def _baudrate(serial) -> float:
+    """Baud rate of a transport, infinite if unknown, e.g. for virtual ports."""
+    port = getattr(serial, "serial", serial)  # AsyncioSerial wraps a serial.Serial
+    return getattr(port, "baudrate", None) or float("inf")
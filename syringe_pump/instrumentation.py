@@ -0,0 +1,99 @@
+""" Observe how long pump commands take.
+
+Register a callback in `Pump.command_hooks` to receive a `CommandEvent` per command,
+e.g. a `LatencyHistogram`. Without hooks, commands are not timed at all.
+"""
+
+from bisect import bisect_left
+from typing import NamedTuple
+
+
+class CommandEvent(NamedTuple):
+    """Timing of a single command. Durations are in seconds.
+
+    In a pipelined batch, waiting for the port and writing are counted
+    for the first command only, since they are shared by the whole batch.
+    """
+
+    command: str
+    address: int
+    bytes_sent: int
+    bytes_received: int
+    queued: float
+    """Waiting for other commands to release the serial port."""
+    write: float
+    read: float
+    """Waiting for the reply, up to the prompt."""
+    parse: float
+    prompt: str
+
+    @property
+    def name(self) -> str:
+        """Command without its arguments, e.g. `irate` for `irate 1 ml/min`."""
+        return self.command.split(" ", 1)[0]
+
+    @property
+    def total(self) -> float:
+        return self.queued + self.write + self.read + self.parse
+
+
+class LatencyHistogram:
+    """Collect total command latency per command name into log-spaced buckets.
+
+    Memory use is fixed per command name, however many commands are recorded.
+    Percentiles are accurate to the bucket width, about 26% with the defaults.
+    """
+
+    def __init__(
+        self, low: float = 1e-5, high: float = 100.0, buckets_per_decade: int = 10
+    ) -> None:
+        if not 0 < low < high:
+            raise ValueError("Histogram bounds must satisfy 0 < low < high")
+        self.edges: list[float] = []
+        edge = low
+        while edge < high:
+            self.edges.append(edge)
+            edge *= 10 ** (1 / buckets_per_decade)
+        self.edges.append(high)
+        self._counts: dict[str, list[int]] = {}
+
+    def __call__(self, event: CommandEvent):
+        counts = self._counts.get(event.name)
+        if counts is None:
+            counts = self._counts[event.name] = [0] * (len(self.edges) + 1)
+        counts[bisect_left(self.edges, event.total)] += 1
+
+    @property
+    def commands(self) -> list[str]:
+        return sorted(self._counts)
+
+    def count(self, name: str) -> int:
+        return sum(self._counts.get(name, []))
+
+    def percentile(self, name: str, percent: float) -> float:
+        """Upper bound of the latency below which `percent` of the commands fall."""
+        counts = self._counts.get(name)
+        if not counts:
+            raise KeyError(f"No latencies recorded for {name!r}")
+        threshold = sum(counts) * percent / 100
+        seen = 0
+        for edge, count in zip(self.edges, counts):
+            seen += count
+            if seen >= threshold:
+                return edge
+        return float("inf")  # slower than the highest bucket
+
+    def summary(
+        self, percents: tuple[float, ...] = (50, 90, 99)
+    ) -> dict[str, dict[str, float]]:
+        """Count and percentiles of every command, e.g. `{"irate": {"p50": ...}}`."""
+        return {
+            name: {
+                "count": self.count(name),
+                **{f"p{p:g}": self.percentile(name, p) for p in percents},
+            }
+            for name in self.commands
+        }
+
+    def clear(self):
+        self._counts.clear()
@@ -0,0 +1,41 @@
+""" Check rates against the pump's limits without asking the pump. """
+
+from typing import TYPE_CHECKING
+
+from syringe_pump.units import format_quantity
+
+if TYPE_CHECKING:
+    from quantiphy import Quantity
+
+
+class LimitCache:
+    """Rate limits read from pumps, by syringe diameter.
+
+    The limits follow from the plunger speed range and the syringe diameter,
+    so once read they hold for every syringe of that diameter, in both directions.
+    Pumps of the same model can share one cache.
+    """
+
+    def __init__(self) -> None:
+        self._limits: dict[float, tuple["Quantity", "Quantity"]] = {}
+
+    def __len__(self) -> int:
+        return len(self._limits)
+
+    def record(self, diameter: "Quantity", limits: tuple["Quantity", "Quantity"]):
+        self._limits[float(diameter)] = limits
+
+    def get(self, diameter: "Quantity") -> "tuple[Quantity, Quantity] | None":
+        return self._limits.get(float(diameter))
+
+
+def check_limits(rate: "Quantity", limits: "tuple[Quantity, Quantity] | None"):
+    """Raise `ValueError` if `rate` is outside `limits`; unknown limits pass."""
+    if limits is None:
+        return
+    low, high = limits
+    if not low <= rate <= high:
+        raise ValueError(
+            f"Rate {format_quantity(rate)} out of range: "
+            f"{format_quantity(low)} to {format_quantity(high)}"
+        )
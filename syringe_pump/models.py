@@ -0,0 +1,45 @@
+""" Pydantic models of pump replies.
+
+Importing pydantic is slow, so this module is only loaded when a model is first used.
+The models are also available from the modules that produce them,
+e.g. `syringe_pump.response_parser.PumpResponse`.
+"""
+
+from pydantic import BaseModel, Field
+from quantiphy import Quantity
+
+from syringe_pump.response_parser import parse_output
+
+
+class PumpResponse(BaseModel):
+    """Structured representation of a response from the pump."""
+
+    command: str
+    prompt: str = ":"
+    address: int = Field(default=0, ge=0, le=99)
+    message: list[str] = []
+    raw_text: str = ""
+
+    @classmethod
+    def from_output(cls, raw_output: bytes, command: str):
+        return parse_output(raw_output, command).to_model()
+
+    def __str__(self) -> str:
+        full_response = "\n".join(self.message)
+        return f"Command: {self.command!r}\n Response: {full_response!r}\n"
+
+
+class PumpVersion(BaseModel):
+    firmware: str = Field(default=..., alias="Firmware")
+    address: int = Field(default=..., alias="Pump address")
+    serial_number: str = Field(default=..., alias="Serial number")
+
+
+class RateRampInfo(BaseModel):
+    start: Quantity
+    end: Quantity
+    duration: float
+
+    model_config = {
+        "arbitrary_types_allowed": True,
+    }
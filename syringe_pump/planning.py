@@ -0,0 +1,221 @@
+""" Compute volumes and times of many rate profiles at once, without a pump.
+
+All values are plain floats in the base units of `Quantity`: litres, litres per minute,
+metres and seconds, so `float(quantity)` converts. Profiles are stored as NumPy arrays
+of segments, one row per profile, and every function evaluates all rows together,
+e.g. thousands of candidates of a parameter sweep.
+
+NumPy is an optional dependency: install the `planning` extra to use this module.
+"""
+
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Sequence
+
+try:
+    import numpy as np
+except ImportError as e:  # pragma: no cover
+    raise ImportError(
+        "syringe_pump.planning needs NumPy: pip install python-syringe-pump[planning]"
+    ) from e
+
+if TYPE_CHECKING:
+    from .profile import FlowProfile
+
+SECONDS_PER_MINUTE = 60.0
+
+
+class Segments(NamedTuple):
+    """Linear rate segments of many profiles, shaped (profiles, segments).
+
+    A constant rate has equal start and end rates; a ramp as set by `Rate.set_ramp`
+    goes from the start to the end rate. Negative rates withdraw.
+    Shorter profiles are padded with segments of zero duration.
+    """
+
+    start_rate: np.ndarray
+    """Litres per minute at the start of each segment."""
+    end_rate: np.ndarray
+    """Litres per minute at the end of each segment."""
+    duration: np.ndarray
+    """Seconds."""
+
+    @classmethod
+    def from_arrays(cls, start_rate, end_rate, duration) -> "Segments":
+        """Broadcast arrays, e.g. a sweep of rates against a sweep of durations."""
+        arrays = np.broadcast_arrays(
+            *(
+                np.atleast_2d(np.asarray(a, dtype=float))
+                for a in (start_rate, end_rate, duration)
+            )
+        )
+        segments = cls(*(np.array(a) for a in arrays))
+        _check(segments)
+        return segments
+
+    @classmethod
+    def stack(
+        cls,
+        profiles: Iterable[Sequence[tuple[float, float] | tuple[float, float, float]]],
+    ) -> "Segments":
+        """Stack profiles given as `(rate, duration)` steps and `(start, end, duration)` ramps."""
+        rows = [[_segment(step) for step in profile] for profile in profiles]
+        width = max((len(row) for row in rows), default=0)
+        table = np.zeros((len(rows), width, 3))
+        for i, row in enumerate(rows):
+            if row:
+                table[i, : len(row)] = row
+        segments = cls(table[..., 0], table[..., 1], table[..., 2])
+        _check(segments)
+        return segments
+
+    @classmethod
+    def from_profiles(cls, profiles: Iterable["FlowProfile"]) -> "Segments":
+        """Stack `FlowProfile`s; pauses have zero rate and withdrawals a negative one."""
+        return cls.stack(
+            [
+                (
+                    0.0
+                    if step.rate is None
+                    else _signed(float(step.rate), step.direction),
+                    step.duration,
+                )
+                for step in profile.steps
+            ]
+            for profile in profiles
+        )
+
+    @property
+    def ends(self) -> np.ndarray:
+        """Seconds from the start of the profile to the end of each segment."""
+        return np.cumsum(self.duration, axis=-1)
+
+    @property
+    def total_duration(self) -> np.ndarray:
+        return self.duration.sum(axis=-1)
+
+    def volumes(self) -> np.ndarray:
+        """Signed volume moved in each segment, positive when infusing."""
+        mean_rate = (self.start_rate + self.end_rate) / 2
+        return mean_rate * self.duration / SECONDS_PER_MINUTE
+
+
+def dispensed(segments: Segments, times) -> np.ndarray:
+    """Net volume infused by each profile at each of `times`, shaped (profiles, times).
+    Withdrawals count negative; after its end, a profile's volume stays constant."""
+    times = np.asarray(times, dtype=float)
+    total = np.zeros((segments.duration.shape[0], times.size))
+    start = np.zeros((segments.duration.shape[0], 1))
+    for column in range(segments.duration.shape[1]):  # few segments, many profiles
+        r0, r1, duration = (a[:, column : column + 1] for a in segments)
+        elapsed = np.clip(times.reshape(1, -1) - start, 0.0, duration)
+        total += _volume(r0, r1, duration, elapsed)
+        start = start + duration
+    return total
+
+
+def remaining(
+    segments: Segments,
+    times,
+    syringe_volume: float,
+    initial_volume: float | None = None,
+) -> np.ndarray:
+    """Volume left in the syringe at each of `times`, starting at `initial_volume`,
+    or a full syringe. Below zero the syringe ran empty; above `syringe_volume` it overflowed.
+    """
+    if initial_volume is None:
+        initial_volume = syringe_volume
+    return initial_volume - dispensed(segments, times)
+
+
+def fits(
+    segments: Segments, syringe_volume: float, initial_volume: float | None = None
+) -> np.ndarray:
+    """Whether each profile runs without emptying or overfilling the syringe.
+    Volumes are extreme at segment boundaries, as every segment moves one way."""
+    if initial_volume is None:
+        initial_volume = syringe_volume
+    contents = initial_volume - np.cumsum(segments.volumes(), axis=-1)
+    return (contents.min(axis=-1, initial=initial_volume) >= 0) & (
+        contents.max(axis=-1, initial=initial_volume) <= syringe_volume
+    )
+
+
+def time_to_volume(segments: Segments, volume) -> np.ndarray:
+    """Seconds until each profile has moved `volume` in total, in either direction,
+    like a target volume on the pump; `inf` for profiles that never get there.
+    `volume` is a scalar or one value per profile."""
+    volume = np.broadcast_to(
+        np.asarray(volume, dtype=float), segments.duration.shape[:1]
+    )
+    moved = np.abs(segments.volumes())
+    cumulative = np.cumsum(moved, axis=-1)
+    reached = cumulative >= volume[:, None]
+    index = reached.argmax(axis=-1)
+    rows = np.arange(len(index))
+    before = cumulative[rows, index] - moved[rows, index]
+    r0, r1, duration = (np.abs(a[rows, index]) for a in segments)
+    elapsed = np.minimum(_time_for_volume(r0, r1, duration, volume - before), duration)
+    starts = segments.ends[rows, index] - duration
+    result = starts + elapsed
+    result[~reached.any(axis=-1)] = np.inf
+    return result
+
+
+def within_limits(segments: Segments, low: float, high: float) -> np.ndarray:
+    """Whether every nonzero rate of each profile lies within the pump's rate limits,
+    e.g. from `Pump.known_limits`. Zero rates are pauses and always pass."""
+    ok = np.ones(segments.duration.shape[0], dtype=bool)
+    for rates in (segments.start_rate, segments.end_rate):
+        speed = np.abs(rates)
+        valid = (speed == 0) | ((speed >= low) & (speed <= high))
+        ok &= (valid | (segments.duration == 0)).all(axis=-1)
+    return ok
+
+
+def plunger_travel(volume, diameter: float) -> np.ndarray:
+    """Metres the plunger moves to push `volume` litres through a syringe of `diameter` metres."""
+    area = np.pi * diameter**2 / 4
+    return np.asarray(volume) * 1e-3 / area
+
+
+def _volume(r0, r1, duration, elapsed):
+    """Litres moved after `elapsed` seconds of a segment ramping from r0 to r1."""
+    slope = np.divide(
+        r1 - r0, duration, out=np.zeros_like(r0 + duration), where=duration > 0
+    )
+    return (r0 * elapsed + slope * elapsed**2 / 2) / SECONDS_PER_MINUTE
+
+
+def _time_for_volume(r0, r1, duration, volume):
+    """Invert `_volume` for non-negative rates: solve a t + b t^2 = volume."""
+    a = r0 / SECONDS_PER_MINUTE
+    b = np.divide(
+        r1 - r0,
+        2 * duration * SECONDS_PER_MINUTE,
+        out=np.zeros_like(a),
+        where=duration > 0,
+    )
+    volume = np.maximum(volume, 0.0)
+    # this form of the quadratic formula stays exact for b = 0 and a = 0
+    denominator = a + np.sqrt(np.maximum(a**2 + 4 * b * volume, 0.0))
+    return np.divide(
+        2 * volume, denominator, out=np.zeros_like(volume), where=denominator > 0
+    )
+
+
+def _segment(step: tuple) -> tuple[float, float, float]:
+    if len(step) == 2:
+        rate, duration = step
+        return float(rate), float(rate), float(duration)
+    start, end, duration = step
+    return float(start), float(end), float(duration)
+
+
+def _signed(rate: float, direction: str) -> float:
+    return -rate if direction == "withdraw" else rate
+
+
+def _check(segments: Segments):
+    if (segments.duration < 0).any():
+        raise ValueError("Segment durations must not be negative")
+    if (segments.start_rate * segments.end_rate < 0).any():
+        raise ValueError("A ramp cannot change direction")
@@ -0,0 +1,115 @@
+""" Run a sequence of (rate, duration) steps on schedule. """
+
+import asyncio
+from typing import TYPE_CHECKING, Iterable, Literal, NamedTuple
+
+from syringe_pump.limits import check_limits
+from syringe_pump.rate import _check_rate
+from syringe_pump.units import format_quantity, parse_quantity
+
+if TYPE_CHECKING:
+    from quantiphy import Quantity
+
+    from .pump import Pump
+
+
+class ProfileStep(NamedTuple):
+    rate: "Quantity | None"
+    """Flow rate of the step, or `None` to pause."""
+    duration: float
+    """Step length in seconds."""
+    direction: Literal["infuse", "withdraw"] = "infuse"
+
+
+class StepReport(NamedTuple):
+    step: ProfileStep
+    deadline: float
+    """Event loop time at which the step was due to start."""
+    lateness: float
+    """Seconds between the deadline and sending the step's commands."""
+
+
+class FlowProfile:
+    """A validated list of steps, compiled into pump commands up front.
+
+    Steps are started at absolute deadlines measured from the start of the run,
+    so time spent talking to the pump does not accumulate over a long program.
+    A step that continues at the rate and direction of the previous one sends nothing;
+    with `Pump(elide_writes=True)`, rates the pump already has are not sent again.
+    """
+
+    def __init__(
+        self, steps: Iterable[ProfileStep | tuple["Quantity | None", float]]
+    ) -> None:
+        self.steps = [ProfileStep(*step) for step in steps]
+        self._commands: list[list[str]] = []
+        self._rates: list[tuple[str, "Quantity"] | None] = []
+        self._compile()
+
+    @property
+    def duration(self) -> float:
+        """Total length of the profile in seconds."""
+        return sum(step.duration for step in self.steps)
+
+    def _compile(self):
+        previous = None
+        for step in self.steps:
+            if step.duration <= 0:
+                raise ValueError(f"Step duration must be positive: {step}")
+            if step.direction not in ["infuse", "withdraw"]:
+                raise ValueError("Direction must be 'infuse' or 'withdraw'")
+            if step.rate is None:
+                commands, rate = ([] if previous is None else ["stp"]), None
+                previous = None
+            else:
+                _check_rate(step.rate)
+                letter = step.direction[0]
+                rate_text = format_quantity(step.rate)
+                commands = [f"{letter}rate {rate_text}", f"{letter}run"]
+                rate = (f"{letter}rate", parse_quantity(rate_text))
+                if (step.direction, rate_text) == previous:
+                    commands, rate = [], None
+                previous = (step.direction, rate_text)
+            self._commands.append(commands)
+            self._rates.append(rate)
+
+    def check_limits(self, limits: "tuple[Quantity, Quantity] | None"):
+        """Raise `ValueError` if a step's rate is outside `limits`."""
+        for step in self.steps:
+            if step.rate is not None:
+                check_limits(step.rate, limits)
+
+    async def validate(self, pump: "Pump"):
+        """Check every step against the rate limits of the pump's syringe.
+        Once the limits for its diameter are known, this needs no traffic at all."""
+        limits = pump.known_limits()
+        if limits is None:
+            await pump.syringe.get_diameter(refresh=True)
+            limits = await pump.infusion_rate.get_limits(refresh=True)
+        self.check_limits(limits)
+
+    async def run(self, pump: "Pump", stop: bool = True) -> list[StepReport]:
+        """Execute the profile and report how late each step started.
+        Steps are checked against the pump's known rate limits before the first one.
+        The pump is stopped at the end unless `stop` is False."""
+        self.check_limits(pump.known_limits())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        reports = []
+        try:
+            for step, commands, rate in zip(self.steps, self._commands, self._rates):
+                await asyncio.sleep(deadline - loop.time())
+                lateness = loop.time() - deadline
+                if rate is not None and pump.state.is_current(*rate):
+                    commands = commands[1:]  # only start the motor
+                if commands:
+                    await pump._write_many(commands)
+                if rate is not None:
+                    pump.state.update(*rate)
+                reports.append(StepReport(step, deadline, lateness))
+                deadline += step.duration
+            await asyncio.sleep(deadline - loop.time())
+        finally:
+            if stop:
+                await pump.stop()
+        return reports
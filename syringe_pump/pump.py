@@ -1,29 +1,41 @@
+import asyncio
 from contextlib import AbstractAsyncContextManager
-from datetime import datetime
+from datetime import datetime, timedelta
 from functools import cached_property
 from logging import getLogger
-from typing import Literal
-
-import aioserial
-from pydantic import BaseModel, Field
+from typing import TYPE_CHECKING, Literal
 
+from syringe_pump._lazy import lazy_attributes
+from syringe_pump.bus import PumpBus
 from syringe_pump.exceptions import PumpError
+from syringe_pump.limits import LimitCache
 from syringe_pump.rate import Rate
+from syringe_pump.response_parser import ResponseRecord
 from syringe_pump.serial_interface import PumpSerial
+from syringe_pump.state import PumpState
+from syringe_pump.status import PumpStatus, parse_status
 from syringe_pump.syringe import Syringe
+from syringe_pump.telemetry import Telemetry
 from syringe_pump.time import TargetTime
+from syringe_pump.transport import SerialTransport
 from syringe_pump.volume import TargetVolume, Volume
+from syringe_pump.watcher import EVENT_PROMPTS, PumpEvent, PumpWatcher
 
-logger = getLogger(__name__)
+if TYPE_CHECKING:
+    import aioserial
+    from quantiphy import Quantity
 
+    from syringe_pump.models import PumpVersion
 
-class PumpVersion(BaseModel):
-    firmware: str = Field(default=..., alias="Firmware")
-    address: int = Field(default=..., alias="Pump address")
-    serial_number: str = Field(default=..., alias="Serial number")
+__getattr__ = lazy_attributes(__name__, {"PumpVersion": "syringe_pump.models"})
 
+logger = getLogger(__name__)
 
 QS_MODE_CODE = Literal["i", "w", "iw", "wi"]
+INITIAL_MODE: QS_MODE_CODE = "iw"
+SETTING_QUERIES = ["load", "time"]
+"""Read the settings made on initialisation, in the order of `_setting_commands`."""
+CLOCK_TOLERANCE = timedelta(seconds=2)
 EXIT_BRIGHTNESS = 15
 
 
@@ -31,7 +43,7 @@ class Pump(PumpSerial, AbstractAsyncContextManager):
     """High-level interface for the Legato 100 syringe pump."""
 
     @classmethod
-    async def from_serial(cls, serial: aioserial.AioSerial):
+    async def from_serial(cls, serial: "aioserial.AioSerial"):
         """Initialise the pump outside of a context manager. Useful for quick scripts.
         This method will:
          * disable NVRAM storage
@@ -43,6 +55,25 @@ class Pump(PumpSerial, AbstractAsyncContextManager):
         await self._initialise()
         return self
 
+    def __init__(
+        self,
+        serial: SerialTransport | None = None,
+        bus: PumpBus | None = None,
+        address: int = 0,
+        cache_state: bool = False,
+        elide_writes: bool = False,
+        limits: LimitCache | None = None,
+    ) -> None:
+        """Talk to a pump via its own serial port or via a bus shared with other pumps.
+        With `cache_state`, getters of settings confirmed by the pump skip the wire.
+        With `elide_writes`, setters skip the wire if the pump has the value already.
+        Rate limits are kept in `limits`, which pumps of the same model can share.
+        """
+        super().__init__(serial=serial, bus=bus, address=address)
+        self.state = PumpState(enabled=cache_state, elide_writes=elide_writes)
+        self.limits = limits if limits is not None else LimitCache()
+        self.last_status: PumpStatus | None = None
+
     @cached_property
     def infusion_rate(self) -> Rate:
         """Get, set or clear the infusion rate."""
@@ -78,10 +109,83 @@ class Pump(PumpSerial, AbstractAsyncContextManager):
         """Clear, get or set the maximum time the pump is allowed to dispense."""
         return TargetTime(pump=self)
 
-    async def _initialise(self):
-        await super()._initialise()
-        await self.set_mode("iw")  # set pump to infusion and withdrawal mode
-        await self.set_clock()  # set pump time to current time
+    def telemetry(
+        self, interval: float = 1.0, history: int = 1000, use_status: bool = False
+    ) -> Telemetry:
+        """Observe dispensed volumes, rates and pump state every `interval` seconds.
+        Iterate with `async for`; the last `history` samples stay in `.buffer`.
+        With `use_status`, samples are `PumpStatus` snapshots, which are cheaper to get.
+        """
+        return Telemetry(
+            self, interval=interval, history=history, use_status=use_status
+        )
+
+    def watch(
+        self, min_interval: float = 0.1, max_interval: float = 30.0
+    ) -> PumpWatcher:
+        """Get notified when the pump reaches its target, stalls or hits a limit switch.
+        Use the returned `PumpWatcher` as an async context manager."""
+        return PumpWatcher(self, min_interval=min_interval, max_interval=max_interval)
+
+    async def wait_for_target(
+        self,
+        timeout: float | None = None,
+        min_interval: float = 0.1,
+        max_interval: float = 30.0,
+    ) -> PumpEvent:
+        """Wait until the running pump reaches its target volume or time.
+        Raises the matching `PumpStateError` if it stalls or hits a limit switch first,
+        also before the call, and `PumpError` if it is stopped otherwise."""
+        status = await self.status()
+        if status.target_reached:
+            return PumpEvent("target_reached", status.prompt, "status", status.time)
+        kind = EVENT_PROMPTS.get(status.prompt)
+        if kind in ["stalled", "limit_switch"]:
+            raise PumpEvent(kind, status.prompt, "status", status.time).error()
+        if not status.running:
+            raise PumpError("The pump is not running")
+        async with self.watch(min_interval, max_interval) as watcher:
+            event = await asyncio.wait_for(watcher.wait(), timeout)
+        if event.kind != "target_reached":
+            raise event.error()
+        return event
+
+    async def status(self, max_age: float = 0) -> PumpStatus:
+        """Get the current rate, elapsed time, dispensed volume and state flags
+        in a single round trip. A snapshot less than `max_age` seconds old is reused."""
+        now = asyncio.get_running_loop().time()
+        last = self.last_status
+        if last is not None and now - last.time < max_age:
+            return last
+        output = await self._write("status", error_state_ok=True)
+        self.last_status = parse_status(output.message[0], output.prompt, now)
+        return self.last_status
+
+    def known_limits(self) -> "tuple[Quantity, Quantity] | None":
+        """Rate limits for the current syringe, if known without asking the pump.
+        They are learned by `get_limits` once the syringe diameter has been read or set.
+        """
+        diameter = self.syringe.last_diameter
+        return None if diameter is None else self.limits.get(diameter)
+
+    async def _initialise(self, probe: bool = False) -> list[str]:
+        """Configure the pump in a single write and return the settings sent.
+
+        With `probe`, the current mode and clock are read in that write instead,
+        and only the settings that differ are sent after it. Use this to reconnect
+        to a pump that was set up before, e.g. after the USB link dropped:
+        loading the mode again would reset the rates and targets of the method.
+        """
+        self.state.clear()
+        self.syringe.last_diameter = None
+        if not probe:
+            settings = _setting_commands()
+            await super()._initialise(settings)
+            return settings
+        outdated = _outdated_settings(await super()._initialise(SETTING_QUERIES))
+        if outdated:
+            await self._write_many(outdated, error_state_ok=True)
+        return outdated
 
     async def __aenter__(self):
         await self._initialise()
@@ -105,47 +209,65 @@ class Pump(PumpSerial, AbstractAsyncContextManager):
             raise ValueError("Direction must be 'infuse' or 'withdraw'")
 
     async def stop(self):
-        """Stop infusing or withdrawing."""
-        await self._write("stp", error_state_ok=True)
+        """Stop infusing or withdrawing. Skips ahead of other commands waiting for the port."""
+        await self._write("stp", error_state_ok=True, urgent=True)
 
     async def set_brightness(self, brightness: int):
         """Adjust brightness of the built-in pump display. Set to 0 to turn off the display."""
         if brightness < 0 or brightness > 100:
             raise PumpError("Brightness must be integer between 0 and 100")
+        if self.state.is_current("dim", brightness):
+            return
         await self._write(f"dim {brightness}", error_state_ok=True)
+        self.state.update("dim", brightness)
 
-    async def version(self) -> PumpVersion:
+    async def version(self) -> "PumpVersion":
         """See pump version and serial number."""
         output = await self._write("version", error_state_ok=True)
         data = _parse_colon_mapping(output.message)
+        from syringe_pump.models import PumpVersion
+
         return PumpVersion(**data)
 
     async def set_force(self, force: int):
         """Set the percentage of the maximum force to use when dispensing."""
         if force < 0 or force > 100:
             raise ValueError("Force must be integer between 0 and 100")
+        if self.state.is_current("force", force):
+            return
         await self._write(f"force {force}")
+        self.state.update("force", force)
 
     async def get_force(self):
         output = await self._write("force")
-        return int(output.message[0].strip("%"))
+        force = int(output.message[0].strip("%"))
+        self.state.record("force", force)
+        return force
 
     async def set_address(self, address: int):
+        """Change the pump address. An addressed pump on a bus follows its new address;
+        an unaddressed pump keeps sending commands without an address prefix."""
         if address < 0 or address > 99:
             raise ValueError("Address must be integer between 0 and 99")
         output = await self._write(f"addr {address}", error_state_ok=True)
+        if self.address:
+            self.bus.detach(self.address)
+            self.address = output.address
+            self.bus.attach(self.address)
         return output.address
 
     async def set_clock(self):
         """Set the pump internal clock to the current time."""
-        # Accepted format:  mm/dd/yy hh:mm:ss
-        now = datetime.now().strftime("%m/%d/%y %H:%M:%S")
-        response = await self._write(f"time {now}", error_state_ok=True)
+        response = await self._write(_clock_command(), error_state_ok=True)
         return response.message[0]
 
     async def set_mode(self, mode: QS_MODE_CODE = "iw"):
-        """Set the Quick Start mode, enabling / disabling infusion and withdrawal."""
-        return await self._write(f"load qs {mode}", error_state_ok=True)
+        """Set the Quick Start mode, enabling / disabling infusion and withdrawal.
+        Loading a mode resets the rates and targets, so the pump state cache is cleared.
+        """
+        response = await self._write(f"load qs {mode}", error_state_ok=True)
+        self.state.clear()
+        return response
 
     async def get_mode(self) -> str:
         """Get the current pump mode."""
@@ -153,6 +275,35 @@ class Pump(PumpSerial, AbstractAsyncContextManager):
         return output.message[0]
 
 
+def _setting_commands() -> list[str]:
+    return [
+        f"load qs {INITIAL_MODE}",  # set pump to infusion and withdrawal mode
+        _clock_command(),  # set pump time to current time
+    ]
+
+
+def _outdated_settings(current: list[ResponseRecord]) -> list[str]:
+    """Settings that differ from the replies to `SETTING_QUERIES`."""
+    mode, clock = (response.message for response in current)
+    outdated = []
+    if not (mode and mode[0].endswith(f"(qs {INITIAL_MODE})")):
+        outdated.append(f"load qs {INITIAL_MODE}")
+    try:
+        pump_time = datetime.strptime(clock[0], "%m/%d/%y %I:%M:%S %p")
+        in_sync = abs(pump_time - datetime.now()) <= CLOCK_TOLERANCE
+    except (IndexError, ValueError):
+        in_sync = False
+    if not in_sync:
+        outdated.append(_clock_command())
+    return outdated
+
+
+def _clock_command() -> str:
+    # Accepted format:  mm/dd/yy hh:mm:ss
+    now = datetime.now().strftime("%m/%d/%y %H:%M:%S")
+    return f"time {now}"
+
+
 def _parse_colon_mapping(lines: list[str]):
     data = {}
     for line in lines:
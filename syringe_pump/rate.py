@@ -1,22 +1,18 @@
 from typing import TYPE_CHECKING
 
-from pydantic import BaseModel
-from quantiphy import Quantity
-
+from syringe_pump._lazy import lazy_attributes
+from syringe_pump.limits import check_limits
 from syringe_pump.response_parser import extract_quantity, extract_string
+from syringe_pump.units import format_quantity, parse_quantity
 
 if TYPE_CHECKING:
-    from .pump import Pump
+    from quantiphy import Quantity
 
+    from syringe_pump.models import RateRampInfo
 
-class RateRampInfo(BaseModel):
-    start: Quantity
-    end: Quantity
-    duration: float
+    from .pump import Pump
 
-    model_config = {
-        "arbitrary_types_allowed": True,
-    }
+__getattr__ = lazy_attributes(__name__, {"RateRampInfo": "syringe_pump.models"})
 
 
 class Rate:
@@ -26,30 +22,49 @@ class Rate:
         self.letter = letter
         self._pump = pump
 
-    async def get(self) -> Quantity:
-        """Get the currently set rate of infusion or withdrawal in ml/min."""
+    async def get(self, refresh: bool = False) -> "Quantity":
+        """Get the currently set rate of infusion or withdrawal in ml/min.
+        Use `refresh` to bypass the pump state cache."""
         command = f"{self.letter}rate"
+        if command in self._pump.state and not refresh:
+            return self._pump.state[command]
         output = await self._pump._write(command, error_state_ok=True)
         rate, _ = extract_quantity(output.message[0])
+        self._pump.state.record(command, rate)
         return rate
 
-    async def set(self, rate: Quantity):
-        """Set the rate of infusion or withdrawal."""
+    async def set(self, rate: "Quantity"):
+        """Set the rate of infusion or withdrawal.
+        Returns `None` if the write was skipped, because the pump has this rate already.
+        """
         _check_rate(rate)
-        return await self._pump._write(f"{self.letter}rate {rate:.4}")
+        check_limits(rate, self._pump.known_limits())
+        command, rate_text = f"{self.letter}rate", format_quantity(rate)
+        if self._pump.state.is_current(command, parse_quantity(rate_text)):
+            return None
+        response = await self._pump._write(f"{command} {rate_text}")
+        self._pump.state.update(command, parse_quantity(rate_text))
+        return response
 
-    async def get_limits(self) -> tuple[Quantity, Quantity]:
-        """Get the minimum and maximum rate of infusion or withdrawal in ml/min."""
+    async def get_limits(self, refresh: bool = False) -> "tuple[Quantity, Quantity]":
+        """Get the minimum and maximum rate of infusion or withdrawal in ml/min.
+        Use `refresh` to bypass the pump state cache."""
         command = f"{self.letter}rate lim"
+        if command in self._pump.state and not refresh:
+            return self._pump.state[command]
         output = await self._pump._write(
             command, error_state_ok=True
         )  # e.g. .0404 nl/min to 26.0035 ml/min
         low, line = extract_quantity(output.message[0])
         line = extract_string(line, "to")
         high, _ = extract_quantity(line)
+        self._pump.state.record(command, (low, high))
+        diameter = self._pump.syringe.last_diameter
+        if diameter is not None:  # limits hold for any syringe of this diameter
+            self._pump.limits.record(diameter, (low, high))
         return low, high
 
-    async def get_ramp(self) -> RateRampInfo | None:
+    async def get_ramp(self) -> "RateRampInfo | None":
         """Get information about current ramp, i.e. linear change of pump speed"""
         output = await self._pump._write(f"{self.letter}ramp", error_state_ok=True)
         if "Ramp not set up." in output.message[0]:
@@ -59,26 +74,35 @@ class Rate:
         end, line = extract_quantity(line)
         line = extract_string(line, "in")
         duration, _ = extract_quantity(line)
+        from syringe_pump.models import RateRampInfo
+
         return RateRampInfo(start=start, end=end, duration=float(duration))
 
-    async def set_ramp(self, start: Quantity, end: Quantity, duration: float):
+    async def set_ramp(self, start: "Quantity", end: "Quantity", duration: float):
         """Set up a linear change of pump speed, i.e. a ramp.
 
         Ramp duration is in seconds.
         """
         _check_rate(start)
         _check_rate(end)
+        limits = self._pump.known_limits()
+        check_limits(start, limits)
+        check_limits(end, limits)
         if duration <= 0:
             raise ValueError("Duration must be positive")
-        command = f"{self.letter}ramp {start:.4} {end:.4} {float(duration):.4}"
+        start_text, end_text = format_quantity(start), format_quantity(end)
+        command = f"{self.letter}ramp {start_text} {end_text} {float(duration):.4}"
         await self._pump._write(command)
+        self._pump.state.invalidate(f"{self.letter}ramp")
 
     async def reset_ramp(self):
         """Reset the ramp by clearing target time."""
-        return await self._pump._write(f"cttime")
+        response = await self._pump._write(f"cttime")
+        self._pump.state.update("ttime", None)
+        return response
 
 
-def _check_rate(rate: Quantity):
+def _check_rate(rate: "Quantity"):
     if rate.real <= 0:
         raise ValueError("Rate must be positive")
     if rate.units != "l/min":
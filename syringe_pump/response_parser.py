@@ -1,58 +1,88 @@
 import re
+from typing import TYPE_CHECKING
 
-from pydantic import BaseModel, Field
-from quantiphy import Quantity
-
+from syringe_pump._lazy import lazy_attributes
 from syringe_pump.exceptions import PumpError
+from syringe_pump.units import parse_quantity
+
+if TYPE_CHECKING:
+    from quantiphy import Quantity
+
+    from syringe_pump.models import PumpResponse
+
+__getattr__ = lazy_attributes(__name__, {"PumpResponse": "syringe_pump.models"})
 
 XON = b"\x11"
 
 
-class PumpResponse(BaseModel):
-    """Structured representation of a response from the pump.
-    TODO: move to a dignified location."""
-
-    command: str
-    prompt: str = ":"
-    address: int = Field(default=0, ge=0, le=99)
-    message: list[str] = []
-    raw_text: str = ""
-
-    @classmethod
-    def from_output(cls, raw_output: bytes, command: str):
-        output = raw_output.rstrip(XON).strip().decode()
-        if not output:
-            raise PumpError("No response from pump")
-
-        self = cls(raw_text=output, command=command)
-        lines = output.split("\r\n")
-        if lines:
-            self._strip_address(lines[-1])
-        if self.address:
-            lines = [self._strip_address(l) for l in lines]
-
-        if lines[-1]:  # there is prompt in last line, because there is no address
-            self.prompt = lines[-1]
-        self.message = lines[:-1]
-        return self
-
-    def _strip_address(self, line: str) -> str:
-        if match := re.match(r"(\d{1,2})(:|[><T]\*?|\*)(.*)", line):
-            self.address = int(match.group(1))
-            self.prompt = match.group(2)
-            return match.group(3)
-        return line
+class ResponseRecord:
+    """Lightweight counterpart of `PumpResponse`, used on the command hot path.
+
+    Has the same fields, but skips pydantic validation;
+    call `to_model` when a `PumpResponse` is needed.
+    """
+
+    __slots__ = ("command", "prompt", "address", "message", "raw_text")
+
+    def __init__(
+        self, command: str, prompt: str, address: int, message: list[str], raw_text: str
+    ) -> None:
+        self.command = command
+        self.prompt = prompt
+        self.address = address
+        self.message = message
+        self.raw_text = raw_text
+
+    def to_model(self) -> "PumpResponse":
+        from syringe_pump.models import PumpResponse
+
+        return PumpResponse(
+            command=self.command,
+            prompt=self.prompt,
+            address=self.address,
+            message=self.message,
+            raw_text=self.raw_text,
+        )
 
     def __str__(self) -> str:
         full_response = "\n".join(self.message)
         return f"Command: {self.command!r}\n Response: {full_response!r}\n"
 
+    def __repr__(self) -> str:
+        return (
+            f"ResponseRecord(command={self.command!r}, prompt={self.prompt!r}, "
+            f"address={self.address}, message={self.message!r})"
+        )
+
+
+def parse_output(raw_output: bytes, command: str) -> ResponseRecord:
+    """Parse the raw reply to a command into a `ResponseRecord`."""
+    output = raw_output.rstrip(XON).strip().decode()
+    if not output:
+        raise PumpError("No response from pump")
+
+    address, prompt = 0, ":"
+    lines = output.split("\r\n")
+    if match := _ADDRESS_PROMPT.match(lines[-1]):
+        address, prompt, lines[-1] = int(match[1]), match[2], match[3]
+    if address:
+        for i, line in enumerate(lines):
+            if match := _ADDRESS_PROMPT.match(line):
+                address, prompt, lines[i] = int(match[1]), match[2], match[3]
+
+    if lines[-1]:  # there is prompt in last line, because there is no address
+        prompt = lines[-1]
+    return ResponseRecord(command, prompt, address, lines[:-1], output)
+
+
+_ADDRESS_PROMPT = re.compile(r"(\d{1,2})(:|[><T]\*?|\*)(.*)")
+
 
-def extract_quantity(line: str) -> tuple[Quantity, str]:
+def extract_quantity(line: str) -> tuple["Quantity", str]:
     """Extract a value and unit from a line of text."""
     try:
         value, unit, *rest = line.split(" ")
-        return Quantity(f"{value} {unit}"), " ".join(rest).strip()
+        return parse_quantity(f"{value} {unit}"), " ".join(rest).strip()
     except Exception as e:
         raise PumpError(f"Could not extract value from {line!r}") from e
 
@@ -1,45 +1,178 @@
-import aioserial
+from time import perf_counter
+from typing import Callable, Sequence
 
+from syringe_pump.bus import PumpBus, encode_command
 from syringe_pump.exceptions import *
-from syringe_pump.response_parser import XON, PumpResponse
+from syringe_pump.instrumentation import CommandEvent
+from syringe_pump.response_parser import ResponseRecord, parse_output
+from syringe_pump.transport import SerialTransport
 
 
 class PumpSerial:
     """Provides wrapper methods to send commands and receive pump responses."""
 
-    def __init__(self, serial: aioserial.AioSerial) -> None:
-        self.serial = serial
+    def __init__(
+        self,
+        serial: SerialTransport | None = None,
+        bus: PumpBus | None = None,
+        address: int = 0,
+    ) -> None:
+        if bus is None:
+            if serial is None:
+                raise ValueError("Provide either a serial port or a pump bus.")
+            bus = PumpBus.for_serial(serial)
+        elif serial is not None and serial is not bus.serial:
+            raise ValueError("The serial port does not belong to the pump bus.")
+        if address < 0 or address > 99:
+            raise ValueError("Address must be integer between 0 and 99")
+        self.bus = bus
+        self.serial = bus.serial
+        self.address = address
+        self.command_hooks: list[Callable[[CommandEvent], None]] = []
         self._initialised: bool = False
+        bus.attach(address)
 
-    async def _initialise(self):
-        """Ensure the pump is configured correctly to receive commands."""
-        self._initialised = True
-        await self._write("poll on", error_state_ok=True)
+    def _initialise_commands(self) -> list[str]:
+        """Commands that configure the pump; sent together when initialising."""
         # disable NVRAM storage which could be damaged by repeated writes
-        try:
-            await self._write("nvram none", error_state_ok=True)
-        except PumpCommandError as e:  # Discrepancy between certain pump models
-            if "Argument error: none" in e.response.message[0]:
+        return ["poll on", "nvram none"]
+
+    async def _initialise(self, extra: Sequence[str] = ()) -> list[ResponseRecord]:
+        """Ensure the pump is configured correctly to receive commands.
+        The `extra` commands are sent in the same write; their responses are returned.
+        """
+        self._initialised = True
+        commands = self._initialise_commands()
+        responses = await self._write_many(
+            [*commands, *extra], error_state_ok=True, return_exceptions=True
+        )
+        for response in responses:
+            if isinstance(response, PumpCommandError) and _nvram_unsupported(response):
+                # Discrepancy between certain pump models
                 await self._write("nvram off", error_state_ok=True)
-            raise e
+            elif isinstance(response, PumpError):
+                raise response
+        return responses[len(commands) :]
 
-    async def _write(self, command: str, error_state_ok: bool = False) -> PumpResponse:
+    async def _write(
+        self, command: str, error_state_ok: bool = False, urgent: bool = False
+    ) -> ResponseRecord:
         # TODO: configure whether screen is refreshed on command
         if not self._initialised:
             raise PumpError("Pump not initialised. Call `_initialise()` first.")
-        await self.serial.write_async(f"@{command}\r\n".encode())
-        response, state_ok = await self._parse_prompt(command=command)
+        if self.command_hooks:  # instrumented commands are timed as a batch of one
+            return (await self._write_many([command], error_state_ok, urgent))[0]
+        raw_output = await self.bus.exchange(
+            command, address=self.address, urgent=urgent
+        )
+        return self._check_response(raw_output, command, error_state_ok)
+
+    async def _write_many(
+        self,
+        commands: list[str],
+        error_state_ok: bool = False,
+        urgent: bool = False,
+        return_exceptions: bool = False,
+    ) -> list[ResponseRecord]:
+        """Send several commands back-to-back, without waiting for each prompt.
+
+        All replies are read before an error is raised, so the line stays in sync;
+        the error of the first failing command is raised, carrying its own response.
+        Commands after a failing one are still executed by the pump.
+        With `return_exceptions`, errors are returned in place of their responses.
+        """
+        if not self._initialised:
+            raise PumpError("Pump not initialised. Call `_initialise()` first.")
+        timings = [] if self.command_hooks else None
+        raw_outputs = await self.bus.exchange_many(
+            commands, address=self.address, urgent=urgent, timings=timings
+        )
+        responses, errors = [], []
+        for i, (raw_output, command) in enumerate(zip(raw_outputs, commands)):
+            try:
+                if timings is None:
+                    response = self._check_response(raw_output, command, error_state_ok)
+                else:
+                    response = self._receive(
+                        raw_output,
+                        command,
+                        error_state_ok,
+                        queued=timings[0] if i == 0 else 0.0,
+                        write=timings[1] if i == 0 else 0.0,
+                        read=timings[2 + i],
+                    )
+                responses.append(response)
+            except PumpError as e:
+                errors.append(e)
+                if return_exceptions:
+                    responses.append(e)
+        if errors and not return_exceptions:
+            raise errors[0]
+        return responses
+
+    def _receive(
+        self,
+        raw_output: bytes,
+        command: str,
+        error_state_ok: bool,
+        queued: float = 0.0,
+        write: float = 0.0,
+        read: float = 0.0,
+    ) -> ResponseRecord:
+        """Check a reply and pass a `CommandEvent` to the command hooks, if any.
+        Also for replies read without `_write_many`, e.g. of a group writing to many
+        pumps at once."""
+        start = perf_counter()
+        response = None
+        try:
+            response = self._check_response(raw_output, command, error_state_ok)
+            return response
+        except PumpError as e:
+            response = getattr(e, "response", None)
+            raise
+        finally:
+            if self.command_hooks:
+                self._emit(
+                    CommandEvent(
+                        command=command,
+                        address=self.address,
+                        bytes_sent=len(encode_command(command, self.address)),
+                        bytes_received=len(raw_output),
+                        queued=queued,
+                        write=write,
+                        read=read,
+                        parse=perf_counter() - start,
+                        prompt=response.prompt if response else "",
+                    )
+                )
+
+    def _emit(self, event: CommandEvent):
+        for hook in self.command_hooks:
+            hook(event)
+
+    def _check_response(
+        self, raw_output: bytes, command: str, error_state_ok: bool
+    ) -> ResponseRecord:
+        response, state_ok = self._parse_prompt(raw_output, command=command)
         if state_ok or error_state_ok:
             return response
 
         raise PumpStateError.from_response(response)
 
-    async def _parse_prompt(self, command: str = "") -> tuple[PumpResponse, bool]:
+    def _parse_prompt(
+        self, raw_output: bytes, command: str = ""
+    ) -> tuple[ResponseRecord, bool]:
         # relies on poll mode being on
-        raw_output = await self.serial.read_until_async(XON)
-        response = PumpResponse.from_output(raw_output, command)
+        response = parse_output(raw_output, command)
 
         if response.message and "error" in response.message[0]:
             raise PumpCommandError(response)
 
         return response, response.prompt in [":", ">", "<"]
+
+
+def _nvram_unsupported(error: PumpCommandError) -> bool:
+    return (
+        error.response.command == "nvram none"
+        and "Argument error: none" in error.response.message[0]
+    )
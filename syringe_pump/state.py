@@ -0,0 +1,65 @@
+""" Remember settings confirmed by the pump, so that getters can skip the wire. """
+
+from typing import Any
+
+# Changing a setting may change others on the pump, e.g. a new syringe diameter
+# changes the rate limits. Keys follow the pump command that reads the setting.
+DEPENDENT_SETTINGS: dict[str, tuple[str, ...]] = {
+    "diameter": ("irate", "wrate", "irate lim", "wrate lim"),
+    "syrmanu": ("diameter", "svolume", "irate", "wrate", "irate lim", "wrate lim"),
+    "tvolume": ("ttime",),  # the pump keeps either a target volume or a time
+    "ttime": ("tvolume",),
+    "iramp": ("irate", "ttime"),
+    "wramp": ("wrate", "ttime"),
+}
+
+
+class PumpState:
+    """Opt-in cache of pump settings.
+
+    Values are recorded after the pump accepted them and, if `enabled`, served by
+    getters until a related change invalidates them. With `elide_writes`, setters
+    skip the wire when the pump already has the value; `elided_writes` counts them.
+    With both options off, nothing is remembered.
+    """
+
+    def __init__(self, enabled: bool = False, elide_writes: bool = False) -> None:
+        self.enabled = enabled
+        self.elide_writes = elide_writes
+        self.elided_writes: int = 0
+        self._values: dict[str, Any] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return self.enabled and key in self._values
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[key]
+
+    def record(self, key: str, value: Any):
+        """Remember a value read from the pump."""
+        if self.enabled or self.elide_writes:
+            self._values[key] = value
+
+    def is_current(self, key: str, value: Any) -> bool:
+        """Check whether a write can be skipped, because the pump has the value already."""
+        if not self.elide_writes or key not in self._values:
+            return False
+        if self._values[key] != value:
+            return False
+        self.elided_writes += 1
+        return True
+
+    def update(self, key: str, value: Any):
+        """Remember a value the pump accepted and forget the settings depending on it."""
+        self.invalidate(key)
+        self.record(key, value)
+
+    def invalidate(self, key: str):
+        """Forget a setting and the settings that depend on it."""
+        self._values.pop(key, None)
+        for dependent in DEPENDENT_SETTINGS.get(key, ()):
+            self._values.pop(dependent, None)
+
+    def clear(self):
+        """Forget all settings, e.g. when the pump may have been changed elsewhere."""
+        self._values.clear()
@@ -0,0 +1,75 @@
+""" Snapshot of the pump motion state from the `status` command. """
+
+from datetime import timedelta
+from typing import TYPE_CHECKING, Literal, NamedTuple
+
+from syringe_pump.exceptions import PumpError
+
+if TYPE_CHECKING:
+    from quantiphy import Quantity
+
+FEMTO = 1e-15
+
+
+class PumpStatus(NamedTuple):
+    """Parsed reply to `status`: `<rate fl/s> <time ms> <volume fl> <flags>`.
+
+    Flags are one character each, `.` meaning inactive:
+     1. motor direction, `i` infuse or `w` withdraw
+     2. limit switch hit
+     3. motor stalled
+     4. trigger input
+     5. direction of the next run
+     6. target reached, `T`
+    """
+
+    time: float
+    """Event loop time when the status was requested, see `asyncio.loop.time()`."""
+    prompt: str
+    rate: "Quantity"
+    """Current motor rate, e.g. changing along a ramp."""
+    elapsed: timedelta
+    volume: "Quantity"
+    """Volume dispensed since the counter was cleared, in the current direction."""
+    flags: str
+
+    @property
+    def direction(self) -> Literal["infuse", "withdraw"]:
+        return "withdraw" if self.flags[:1] == "w" else "infuse"
+
+    @property
+    def running(self) -> bool:
+        return self.prompt in [">", "<"]
+
+    @property
+    def limit_switch(self) -> bool:
+        return self._flag(1)
+
+    @property
+    def stalled(self) -> bool:
+        return self._flag(2) or self.prompt == "*"
+
+    @property
+    def target_reached(self) -> bool:
+        return self._flag(5) or self.prompt == "T*"
+
+    def _flag(self, index: int) -> bool:
+        return self.flags[index : index + 1] not in ["", "."]
+
+
+def parse_status(line: str, prompt: str, time: float) -> PumpStatus:
+    """Parse the single line replied to the `status` command."""
+    from quantiphy import Quantity
+
+    try:
+        rate, elapsed, volume, flags = line.split()
+        return PumpStatus(
+            time=time,
+            prompt=prompt,
+            rate=Quantity(int(rate) * FEMTO * 60, "l/min"),
+            elapsed=timedelta(milliseconds=int(elapsed)),
+            volume=Quantity(int(volume) * FEMTO, "l"),
+            flags=flags,
+        )
+    except ValueError as e:
+        raise PumpError(f"Could not parse pump status from {line!r}") from e
@@ -1,12 +1,16 @@
 from enum import Enum
 from typing import TYPE_CHECKING
 
-from quantiphy import Quantity
-
 from syringe_pump.exceptions import *
 from syringe_pump.response_parser import extract_quantity
+from syringe_pump.units import format_quantity, parse_quantity
 
 if TYPE_CHECKING:
+    from pathlib import Path
+
+    from quantiphy import Quantity
+
+    from .catalog import SyringeCatalog
     from .pump import Pump
 
 
@@ -38,37 +42,74 @@ class Syringe:
 
     def __init__(self, pump: "Pump") -> None:
         self._pump = pump
-
-    async def get_diameter(self) -> Quantity:
-        """Get syringe diameter configured in the pump."""
+        self.last_diameter: "Quantity | None" = None
+        """Diameter last read from or set on the pump, `None` if unknown."""
+        self.catalog: "SyringeCatalog | None" = None
+        """Syringe types to validate `set_manufacturer` against, see `load_catalog`."""
+
+    async def load_catalog(self, path: "Path | str | None" = None) -> "SyringeCatalog":
+        """Use the catalog of syringe types for this pump's firmware.
+        It is read from `path` or, on first use, built from the pump and saved there."""
+        from syringe_pump.catalog import DEFAULT_PATH, SyringeCatalog
+
+        self.catalog = await SyringeCatalog.for_pump(self._pump, path or DEFAULT_PATH)
+        return self.catalog
+
+    async def get_diameter(self, refresh: bool = False) -> "Quantity":
+        """Get syringe diameter configured in the pump.
+        Use `refresh` to bypass the pump state cache."""
+        if "diameter" in self._pump.state and not refresh:
+            return self._pump.state["diameter"]
         output = await self._pump._write("diameter", error_state_ok=True)
         diameter, _ = extract_quantity(output.message[0])
+        self._pump.state.record("diameter", diameter)
+        self.last_diameter = diameter
         return diameter
 
     async def set_diameter(self, diameter: float):
         """Set syringe diameter in mm."""
-        return await self._pump._write(f"diameter {diameter:.4}", error_state_ok=True)
+        response = await self._pump._write(
+            f"diameter {diameter:.4}", error_state_ok=True
+        )
+        self.last_diameter = parse_quantity(f"{diameter:.4} mm")
+        self._pump.state.update("diameter", self.last_diameter)
+        return response
 
-    async def get_volume(self) -> Quantity:
-        """Get syringe volume configured in the pump."""
+    async def get_volume(self, refresh: bool = False) -> "Quantity":
+        """Get syringe volume configured in the pump.
+        Use `refresh` to bypass the pump state cache."""
+        if "svolume" in self._pump.state and not refresh:
+            return self._pump.state["svolume"]
         output = await self._pump._write("svolume", error_state_ok=True)
         volume, _ = extract_quantity(output.message[0])
+        self._pump.state.record("svolume", volume)
         return volume
 
-    async def set_volume(self, volume: Quantity):
+    async def set_volume(self, volume: "Quantity"):
         """Set syringe volume."""
         _check_volume(volume)
-        await self._pump._write(f"svolume {volume:.4}", error_state_ok=True)
+        volume_text = format_quantity(volume)
+        await self._pump._write(f"svolume {volume_text}", error_state_ok=True)
+        self._pump.state.update("svolume", parse_quantity(volume_text))
 
     async def set_manufacturer(
-        self, manufacturer: Manufacturer, volume: Quantity | None = None
+        self, manufacturer: Manufacturer, volume: "Quantity | None" = None
     ):
-        """Set syringe manufacturer and volume."""
+        """Set syringe manufacturer and volume.
+        With a `catalog`, unknown syringes raise `ValueError` without asking the pump.
+        """
+        syringe_type = None
+        if self.catalog is not None and volume is not None:
+            _check_volume(volume)
+            syringe_type = self.catalog.lookup(manufacturer, volume)
+        self._pump.state.invalidate("syrmanu")
+        self.last_diameter = None
         try:
             if volume is not None:
                 _check_volume(volume)
                 response = await self._pump._write(
-                    f"syrmanu {manufacturer.name} {volume:.4}", error_state_ok=True
+                    f"syrmanu {manufacturer.name} {format_quantity(volume)}",
+                    error_state_ok=True,
                 )
             else:
                 response = await self._pump._write(
@@ -83,17 +124,20 @@ class Syringe:
                     f"Unknown syringe. Valid volumes are: \n{options.raw_text}"
                 ) from e
             raise
+        if syringe_type is not None and syringe_type.diameter is not None:
+            self.last_diameter = syringe_type.diameter
+            self._pump.state.record("diameter", syringe_type.diameter)
+            self._pump.state.record("svolume", syringe_type.volume)
         return response
 
     async def get_manufacturer(self):
         """Get syringe manufacturer configured in the pump."""
         output = await self._pump._write("syrmanu", error_state_ok=True)
-        print(output.message)
         manu, volume, diam = output.message[0].split(",")
-        return manu, Quantity(volume), Quantity(diam)
+        return manu, parse_quantity(volume.strip()), parse_quantity(diam.strip())
 
 
-def _check_volume(volume: Quantity):
+def _check_volume(volume: "Quantity"):
     if volume.units != "l":
         raise ValueError("Volume must be in ml, ul or nl")
     if volume.real <= 0:
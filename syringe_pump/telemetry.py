@@ -0,0 +1,116 @@
+""" Continuously observe a pump at a fixed cadence. """
+
+import asyncio
+from typing import TYPE_CHECKING, Generic, Iterator, NamedTuple, TypeVar
+
+from syringe_pump.response_parser import extract_quantity
+from syringe_pump.status import PumpStatus
+
+if TYPE_CHECKING:
+    from quantiphy import Quantity
+
+    from .pump import Pump
+
+T = TypeVar("T")
+
+TELEMETRY_COMMANDS = ["ivolume", "wvolume", "irate", "wrate"]
+
+
+class TelemetrySample(NamedTuple):
+    time: float
+    """Event loop time when the sample was requested, see `asyncio.loop.time()`."""
+    latency: float
+    """Round trip time of the request, in seconds."""
+    prompt: str
+    """Pump state, e.g. `:` idle, `>` infusing, `<` withdrawing, `T*` target reached."""
+    infused_volume: "Quantity"
+    withdrawn_volume: "Quantity"
+    infusion_rate: "Quantity"
+    withdrawal_rate: "Quantity"
+
+
+class RingBuffer(Generic[T]):
+    """Fixed-size buffer keeping only the most recent items."""
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("Capacity must be a positive integer")
+        self.capacity = capacity
+        self._items: list[T | None] = [None] * capacity
+        self._next: int = 0
+        self._count: int = 0
+
+    def append(self, item: T):
+        self._items[self._next] = item
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def latest(self) -> T | None:
+        return self._items[self._next - 1] if self._count else None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[T]:
+        """Iterate from the oldest to the newest item."""
+        start = self._next - self._count
+        for i in range(start, self._next):
+            yield self._items[i % self.capacity]  # type: ignore
+
+
+class Telemetry:
+    """Async iterator of pump samples, taken every `interval` seconds.
+
+    Samples are scheduled against absolute deadlines, so the time spent talking
+    to the pump does not make them drift. If a request overruns whole intervals,
+    the missed slots are skipped and counted in `skipped`.
+    The most recent `history` samples are kept in `buffer`.
+    With `use_status`, samples are `PumpStatus` snapshots taken with a single command.
+    """
+
+    def __init__(
+        self,
+        pump: "Pump",
+        interval: float = 1.0,
+        history: int = 1000,
+        use_status: bool = False,
+    ):
+        if interval <= 0:
+            raise ValueError("Interval must be positive")
+        self._pump = pump
+        self.interval = interval
+        self.use_status = use_status
+        self.buffer: RingBuffer[TelemetrySample | PumpStatus] = RingBuffer(history)
+        self.skipped: int = 0
+
+    def __aiter__(self):
+        return self._samples()
+
+    async def _samples(self):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            sample = await self.sample()
+            self.buffer.append(sample)
+            yield sample
+
+            deadline += self.interval
+            now = loop.time()
+            if now > deadline:
+                missed = int((now - deadline) // self.interval) + 1
+                self.skipped += missed
+                deadline += missed * self.interval
+            await asyncio.sleep(deadline - now)
+
+    async def sample(self) -> TelemetrySample | PumpStatus:
+        """Take a single sample, in one round trip."""
+        if self.use_status:
+            return await self._pump.status()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        responses = await self._pump._write_many(
+            TELEMETRY_COMMANDS, error_state_ok=True
+        )
+        latency = loop.time() - start
+        values = [extract_quantity(r.message[0])[0] for r in responses]
+        return TelemetrySample(start, latency, responses[-1].prompt, *values)
@@ -13,20 +13,15 @@ class TargetTime:
     def __init__(self, pump: "Pump") -> None:
         self._pump = pump
 
-    async def get(self) -> timedelta | None:
-        """Get the target time as a timedelta object."""
+    async def get(self, refresh: bool = False) -> timedelta | None:
+        """Get the target time as a timedelta object.
+        Use `refresh` to bypass the pump state cache."""
+        if "ttime" in self._pump.state and not refresh:
+            return self._pump.state["ttime"]
         output = await self._pump._write("ttime", error_state_ok=True)
-        message = output.message[0].strip()
-        if "Target time not set" in message:
-            return None
-        if "seconds" in message:
-            duration = extract_quantity(output.message[0])[0]
-            return timedelta(seconds=float(duration))
-
-        values = reversed(message.split(":"))  # MM:SS or HH:MM:SS
-        seconds, minutes, hours, *_ = [int(v) for v in [*values, 0, 0]]
-
-        return timedelta(hours=hours, minutes=minutes, seconds=seconds)
+        duration = _parse_target_time(output.message[0].strip())
+        self._pump.state.record("ttime", duration)
+        return duration
 
     async def set(self, duration: timedelta | int | None) -> timedelta | None:
         """Set the target time. Accepts:
@@ -52,9 +47,27 @@ class TargetTime:
         else:
             time = int(duration.total_seconds())
 
+        # the pump only keeps whole seconds
+        whole_seconds = timedelta(seconds=int(duration.total_seconds()))
+        # never elided: setting a target again restarts the pump's count towards it
         await self._pump._write(f"ttime {time}")
+        self._pump.state.update("ttime", whole_seconds)
         return duration
 
     async def clear(self):
         """Clear the target time."""
         await self._pump._write("cttime", error_state_ok=True)
+        self._pump.state.update("ttime", None)
+
+
+def _parse_target_time(message: str) -> timedelta | None:
+    if "Target time not set" in message:
+        return None
+    if "seconds" in message:
+        duration = extract_quantity(message)[0]
+        return timedelta(seconds=float(duration))
+
+    values = reversed(message.split(":"))  # MM:SS or HH:MM:SS
+    seconds, minutes, hours, *_ = [int(v) for v in [*values, 0, 0]]
+
+    return timedelta(hours=hours, minutes=minutes, seconds=seconds)
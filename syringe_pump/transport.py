@@ -0,0 +1,139 @@
+""" Serial port transports that the pump controller can talk through. """
+
+import asyncio
+import os
+from typing import Protocol
+
+
+class SerialTransport(Protocol):
+    """The part of `aioserial.AioSerial` the pump controller relies on."""
+
+    async def write_async(self, data: bytes) -> int:
+        ...
+
+    async def read_until_async(self, expected: bytes = b"\n", size=None) -> bytes:
+        ...
+
+
+class AsyncioSerial:
+    """Serial port driven directly by the asyncio event loop (POSIX only).
+
+    `aioserial` hands every read and write to a thread pool. This transport instead
+    registers the port's file descriptor with the event loop and frames replies
+    incrementally in a reusable buffer, which saves a thread hop per command.
+    Accepts the same arguments as `serial.Serial`, e.g. `port`, `baudrate`, `timeout`.
+    On timeout, `read_until_async` returns whatever was received, like `aioserial`.
+    """
+
+    def __init__(self, **kwargs) -> None:
+        import serial
+
+        self.serial = serial.Serial(**kwargs)
+        self._buffer = bytearray()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._data_received: asyncio.Future | None = None
+        if self.serial.is_open:
+            os.set_blocking(self.serial.fileno(), False)
+
+    @property
+    def timeout(self) -> float | None:
+        return self.serial.timeout
+
+    def close(self):
+        """Stop watching the port and close it."""
+        if self._loop is not None:
+            self._loop.remove_reader(self.serial.fileno())
+            self._loop = None
+        self.serial.close()
+
+    async def write_async(self, data: bytes) -> int:
+        fd = self.serial.fileno()
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[os.write(fd, view) :]
+            except BlockingIOError:
+                pass
+            if view:
+                await self._wait_writable(fd)
+        return len(data)
+
+    async def read_until_async(self, expected: bytes = b"\n", size=None) -> bytes:
+        loop = self._watch()
+        deadline = None if self.timeout is None else loop.time() + self.timeout
+        start = 0
+        while (end := self._buffer.find(expected, start)) < 0:
+            if size is not None and len(self._buffer) >= size:
+                return self._take(size)
+            # only scan the newly received bytes next time
+            start = max(0, len(self._buffer) - len(expected) + 1)
+            if not await self._wait_readable(loop, deadline):
+                return self._take(len(self._buffer))
+        end += len(expected)
+        return self._take(end if size is None else min(end, size))
+
+    def _take(self, length: int) -> bytes:
+        frame = bytes(self._buffer[:length])
+        del self._buffer[:length]
+        return frame
+
+    def _watch(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._loop is not None:
+                self._loop.remove_reader(self.serial.fileno())
+            loop.add_reader(self.serial.fileno(), self._on_readable)
+            self._loop = loop
+        return loop
+
+    def _on_readable(self):
+        waiter = self._data_received
+        try:
+            chunk = os.read(self.serial.fileno(), 4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            chunk = b""
+        if not chunk:  # the other end hung up
+            self._loop.remove_reader(self.serial.fileno())
+            self._loop = None
+            if waiter is not None and not waiter.done():
+                from serial import SerialException
+
+                waiter.set_exception(SerialException("Serial port closed"))
+            return
+        self._buffer += chunk
+        if waiter is not None:
+            _resolve(waiter, True)
+
+    async def _wait_readable(
+        self, loop: asyncio.AbstractEventLoop, deadline: float | None
+    ) -> bool:
+        """Wait until more data arrives; False if the deadline passed first."""
+        timeout = None if deadline is None else deadline - loop.time()
+        if timeout is not None and timeout <= 0:
+            return False
+        waiter = self._data_received = loop.create_future()
+        timer = None
+        if timeout is not None:
+            timer = loop.call_later(timeout, _resolve, waiter, False)
+        try:
+            return await waiter
+        finally:
+            self._data_received = None
+            if timer is not None:
+                timer.cancel()
+
+    async def _wait_writable(self, fd: int):
+        loop = asyncio.get_running_loop()
+        writable = loop.create_future()
+        loop.add_writer(fd, _resolve, writable, True)
+        try:
+            await writable
+        finally:
+            loop.remove_writer(fd)
+
+
+def _resolve(waiter: asyncio.Future, result: bool):
+    if not waiter.done():
+        waiter.set_result(result)
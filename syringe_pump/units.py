@@ -0,0 +1,49 @@
+""" Cached conversion between pump text and `Quantity` objects.
+
+Programs tend to send and read back the same few values over and over,
+so both directions are memoized in bounded LRU caches.
+quantiphy is imported on the first cache miss rather than with this module.
+"""
+
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from quantiphy import Quantity
+
+CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_quantity(text: str) -> "Quantity":
+    """Parse e.g. `1.69 ul` into a `Quantity`. The result is shared; don't modify it."""
+    from quantiphy import Quantity
+
+    return Quantity(text)
+
+
+def format_quantity(quantity: "Quantity") -> str:
+    """Format a quantity for a pump command, e.g. `1.2346 ml/min`."""
+    # quantities compare equal regardless of units, so key on both explicitly
+    return _format_quantity(float(quantity), quantity.units)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _format_quantity(value: float, units: str) -> str:
+    from quantiphy import Quantity
+
+    return f"{Quantity(value, units):.4}"
+
+
+def cache_info() -> dict[str, tuple]:
+    """Hits, misses and sizes of the parsing and formatting caches."""
+    return {
+        "parse": parse_quantity.cache_info(),
+        "format": _format_quantity.cache_info(),
+    }
+
+
+def cache_clear():
+    """Empty both caches and reset their counters."""
+    parse_quantity.cache_clear()
+    _format_quantity.cache_clear()
@@ -1,11 +1,12 @@
 from typing import TYPE_CHECKING
 
-from quantiphy import Quantity
-
 from syringe_pump.exceptions import PumpCommandError
 from syringe_pump.response_parser import extract_quantity
+from syringe_pump.units import format_quantity, parse_quantity
 
 if TYPE_CHECKING:
+    from quantiphy import Quantity
+
     from .pump import Pump
 
 
@@ -34,27 +35,35 @@ class TargetVolume:
     async def clear(self):
         """Clear the target volume."""
         await self._pump._write(f"ctvolume", error_state_ok=True)
+        self._pump.state.update("tvolume", None)
 
-    async def get(self) -> Quantity | None:
-        """Get the currently set target volume."""
+    async def get(self, refresh: bool = False) -> "Quantity | None":
+        """Get the currently set target volume.
+        Use `refresh` to bypass the pump state cache."""
+        if "tvolume" in self._pump.state and not refresh:
+            return self._pump.state["tvolume"]
         output = await self._pump._write(f"tvolume", error_state_ok=True)
-        if "Target volume not set" in output.message[0]:
-            return None
-        volume, _ = extract_quantity(output.message[0])
+        volume = None
+        if "Target volume not set" not in output.message[0]:
+            volume, _ = extract_quantity(output.message[0])
+        self._pump.state.record("tvolume", volume)
         return volume
 
-    async def set(self, volume: Quantity):
+    async def set(self, volume: "Quantity"):
         """Set the target volume."""
         _check_volume(volume)
+        volume_text = format_quantity(volume)
+        # never elided: setting a target again restarts the pump's count towards it
         try:
-            await self._pump._write(f"tvolume {volume:.4}")
+            await self._pump._write(f"tvolume {volume_text}")
         except PumpCommandError as e:
             if "out of range" in str(e):
                 raise ValueError("Target volume out of range") from e
             raise e
+        self._pump.state.update("tvolume", parse_quantity(volume_text))
 
 
-def _check_volume(volume: Quantity):
+def _check_volume(volume: "Quantity"):
     if volume.real <= 0:
         raise ValueError("Volume must be positive.")
     if volume.units != "l":
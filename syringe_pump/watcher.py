@@ -0,0 +1,215 @@
+""" Notice when a pump stops on its own, without polling it all the time.
+
+A `PumpWatcher` reads the prompt of every command the program sends anyway,
+so it often learns about a reached target without a single extra request.
+In between, it polls `status`, predicting from the rate and the targets when
+the pump will be done: the next poll comes after half of the predicted remaining
+time, so polls are rare while the target is far and dense just before it.
+"""
+
+import asyncio
+from logging import getLogger
+from typing import TYPE_CHECKING, Callable, Literal, NamedTuple
+
+from syringe_pump.exceptions import PumpError, PumpStateError
+from syringe_pump.instrumentation import CommandEvent
+from syringe_pump.response_parser import ResponseRecord
+
+if TYPE_CHECKING:
+    from datetime import timedelta
+
+    from quantiphy import Quantity
+
+    from .pump import Pump
+    from .status import PumpStatus
+
+logger = getLogger(__name__)
+
+EventKind = Literal["target_reached", "stalled", "limit_switch", "stopped"]
+EVENT_PROMPTS: dict[str, EventKind] = {
+    "T*": "target_reached",
+    "*": "stalled",
+    ">*": "limit_switch",
+    "<*": "limit_switch",
+}
+RUNNING_PROMPTS = [">", "<"]
+# commands after which the targets have to be read again
+TARGET_COMMANDS = ("tvolume ", "ttime ", "ctvolume", "cttime", "iramp ", "wramp ")
+
+
+class PumpEvent(NamedTuple):
+    kind: EventKind
+    """`stopped` means the pump went idle without an error prompt, e.g. on `stop()`."""
+    prompt: str
+    command: str
+    """The command whose reply carried the new prompt."""
+    time: float
+    """Event loop time when the reply was read."""
+
+    def error(self) -> PumpError:
+        """The exception a command would have raised on this prompt."""
+        if self.kind == "stopped":
+            return PumpError("The pump stopped before reaching its target")
+        response = ResponseRecord(self.command, self.prompt, 0, [], "")
+        return PumpStateError.from_response(response)
+
+
+class PumpWatcher:
+    """Turn prompt changes of a pump into awaitable events and callbacks.
+
+    Use as an async context manager, or call `start` and `stop`.
+    `callbacks` are called with every `PumpEvent`; `wait` awaits the next one.
+    Polls are at least `min_interval` and at most `max_interval` seconds apart;
+    `polls` counts them.
+    """
+
+    def __init__(
+        self, pump: "Pump", min_interval: float = 0.1, max_interval: float = 30.0
+    ) -> None:
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("Intervals must be positive, min_interval first")
+        self._pump = pump
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.callbacks: list[Callable[[PumpEvent], None]] = []
+        self.events: list[PumpEvent] = []
+        self.polls: int = 0
+        self._prompt: str | None = None
+        self._targets: "tuple[Quantity | None, timedelta | None] | None" = None
+        self._waiters: list[tuple[frozenset[str] | None, asyncio.Future]] = []
+        self._returned: int = 0
+        self._task: asyncio.Task | None = None
+        self._stopping = asyncio.Event()
+        self._error: Exception | None = None
+        self._error_delivered: bool = False
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._pump.command_hooks.append(self._on_command)
+        self._stopping.clear()
+        self._error, self._error_delivered = None, False
+        self._task = asyncio.get_running_loop().create_task(self._poll())
+
+    async def stop(self):
+        """Stop polling once the current poll, if any, has its reply.
+        Raises the error that ended polling, unless `wait` raised it already."""
+        if self._task is None:
+            return
+        self._pump.command_hooks.remove(self._on_command)
+        self._stopping.set()
+        task, self._task = self._task, None
+        # cancelling the poller mid-command would leave its reply on the line
+        await asyncio.shield(task)
+        if self._error is not None and not self._error_delivered:
+            self._error_delivered = True
+            raise self._error
+
+    async def __aenter__(self) -> "PumpWatcher":
+        self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    async def wait(
+        self, kinds: "EventKind | list[EventKind] | None" = None
+    ) -> PumpEvent:
+        """Wait for the next event, or the next one of the given `kinds`.
+        Events since the previous `wait` returned are not missed, like in a queue."""
+        if isinstance(kinds, str):
+            kinds = [kinds]
+        wanted = None if kinds is None else frozenset(kinds)
+        for index in range(self._returned, len(self.events)):
+            if wanted is None or self.events[index].kind in wanted:
+                self._returned = index + 1
+                return self.events[index]
+        if self._error is not None:
+            self._error_delivered = True
+            raise self._error  # polling failed
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((wanted, future))
+        event = await future
+        self._returned = len(self.events)
+        return event
+
+    def _on_command(self, event: CommandEvent):
+        if event.command.startswith(TARGET_COMMANDS):
+            self._targets = None
+        self._observe(event.prompt, event.command)
+
+    def _observe(self, prompt: str, command: str):
+        previous, self._prompt = self._prompt, prompt
+        if prompt == previous:
+            return
+        kind = EVENT_PROMPTS.get(prompt)
+        if kind is None and previous in RUNNING_PROMPTS and prompt == ":":
+            kind = "stopped"
+        if kind is None:
+            return
+        event = PumpEvent(kind, prompt, command, asyncio.get_running_loop().time())
+        self.events.append(event)
+        for callback in self.callbacks:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception(f"Pump event callback failed on {event}")
+        waiters, self._waiters = self._waiters, []
+        for kinds, future in waiters:
+            if future.done():
+                continue
+            if kinds is None or kind in kinds:
+                future.set_result(event)
+            else:
+                self._waiters.append((kinds, future))
+
+    async def _poll(self):
+        try:
+            while not self._stopping.is_set():
+                # a snapshot taken just before the watcher started is reused
+                status = await self._pump.status(max_age=self.min_interval)
+                self._observe(status.prompt, "status")
+                self.polls += 1
+                delay = await self._next_poll(status)
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        except Exception as e:  # e.g. an `OSError` of a port that was unplugged
+            self._error = e
+            waiters, self._waiters = self._waiters, []
+            for _, future in waiters:
+                if not future.done():
+                    future.set_exception(e)
+                    self._error_delivered = True
+
+    async def _next_poll(self, status: "PumpStatus") -> float:
+        if not status.running:
+            return self.max_interval
+        if self._targets is None:
+            self._targets = (
+                await self._pump.target_volume.get(),
+                await self._pump.target_time.get(),
+            )
+        remaining = predict_remaining(status, *self._targets)
+        if remaining is None:
+            return self.max_interval
+        return min(max(remaining / 2, self.min_interval), self.max_interval)
+
+
+def predict_remaining(
+    status: "PumpStatus",
+    target_volume: "Quantity | None",
+    target_time: "timedelta | None",
+) -> float | None:
+    """Seconds until the pump reaches its target at the current rate,
+    `None` without a target. A ramp speeding up gets there sooner."""
+    estimates = []
+    if target_volume is not None and status.rate > 0:
+        minutes = (float(target_volume) - float(status.volume)) / float(status.rate)
+        estimates.append(minutes * 60)
+    if target_time is not None:
+        estimates.append((target_time - status.elapsed).total_seconds())
+    if not estimates:
+        return None
+    return max(min(estimates), 0.0)
@@ -1,6 +1,5 @@
 import asyncio
-import json
-from collections import defaultdict
+from collections import deque
 from datetime import datetime
 from pathlib import Path
 from typing import Protocol
@@ -12,6 +11,8 @@ from pydantic import Field
 from pydantic_settings import BaseSettings
 
 from syringe_pump import Pump
+from syringe_pump.cassette import RecordingSerial, ReplaySerial
+from syringe_pump.emulator import VirtualSerial
 from syringe_pump.response_parser import PumpResponse
 from tests.pytest_config import (  # noqa: F401; fixtures defined elsewhere for convenience
     pytest_addoption,
@@ -33,67 +34,46 @@ class ConnectionSettings(BaseSettings):
     timeout: float = Field(default=2, validation_alias="SYRINGE_PUMP_TIMEOUT")
 
 
-class SpySerial(aioserial.AioSerial):
-    """Interface that talks to the actual pump, but collects all input-output pairs for later offline use."""
+class ScriptedSerial(aioserial.AioSerial):
+    """Answer each command with a fixed message and remember the commands sent."""
 
-    def __init__(self, **kwargs) -> None:
+    def __init__(self, replies: dict[str, str] | None = None, **kwargs) -> None:
         super().__init__(**kwargs)
-        self.io_mapping: dict[str, list[str]] = defaultdict(list)
-        self._most_recent_command: str = ""
+        self.replies = replies or {}
+        self.commands: list[str] = []
+        self._next_responses: deque[str] = deque()
 
     async def write_async(self, data) -> int:
-        self._most_recent_command = bytes(data).decode()
-        return await super().write_async(data)
-
-    async def read_until_async(self, expected: bytes = b"\r\n", size=None) -> bytes:
-        answer = await super().read_until_async(expected, size)
-        if self._most_recent_command:
-            self.io_mapping[self._most_recent_command].append(answer.decode())
-        self._most_recent_command = ""
-        return answer
-
-    def persist(self, json_file: Path):
-        with json_file.open("w") as f:
-            json.dump(self.io_mapping, f, indent=4)
-
-
-class OfflineSerial(aioserial.AioSerial):
-    def __init__(self, casette: Path, **kwargs) -> None:
-        super().__init__(**kwargs)
-        with casette.open("r") as f:
-            self.io_mapping: dict[str, list[str]] = json.load(f)
-        self._next_response: str = ""
-
-    async def write_async(self, data) -> int:
-        command = bytes(data).decode()
-        if command not in self.io_mapping:
-            raise KeyError(f"Command {command!r} not found in {self.io_mapping.keys()}")
-        outputs = self.io_mapping[command]
-        if not outputs:
-            raise IndexError(f"Command {command!r} has no outputs left")
-        self._next_response = outputs.pop(0)
+        for line in bytes(data).decode().splitlines():
+            command = line.split("@", 1)[1]
+            self.commands.append(command)
+            message = self.replies.get(command, "")
+            self._next_responses.append(
+                f"\n{message}\r\n:\x11" if message else "\n:\x11"
+            )
         return len(data)
 
     async def read_until_async(self, expected: bytes = b"\r\n", size=None) -> bytes:
-        if not self._next_response:
-            raise ValueError("No response set")
-        response = self._next_response
-        self._next_response = ""
-        return response.encode()
+        return self._next_responses.popleft().encode()
 
 
-casette_file = Path(__file__).parent / "casette.json"
+casette_file = Path(__file__).parent / "casette.jsonl"
 
 
 @pytest.fixture(scope="session")
 def serial(request):
     if request.config.option.offline:
         print("Using offline serial interface")
-        yield OfflineSerial(casette=casette_file)
+        yield ReplaySerial(casette_file)
+    elif request.config.option.emulator:
+        print("Using emulated serial interface")
+        yield VirtualSerial()
     else:
-        s = SpySerial(**ConnectionSettings().model_dump())
+        s = RecordingSerial(
+            aioserial.AioSerial(**ConnectionSettings().model_dump()), casette_file
+        )
         yield s
-        s.persist(casette_file)
+        s.close()
 
 
 @pytest.fixture(scope="session")
@@ -1,5 +1,6 @@
 """ Configuration for custom pytest flags:
   --offline: run tests using mock pump responses; no need for live serial connecton.
+  --emulator: run tests against a virtual pump; no need for live serial connection.
   --motion: run tests for motion commands (infuse, withdraw, run, stop).
 """
 import pytest
@@ -7,6 +8,9 @@ import pytest
 
 def pytest_addoption(parser):
     parser.addoption("--offline", action="store_true", help="Use mock pump responses.")
+    parser.addoption(
+        "--emulator", action="store_true", help="Use an emulated virtual pump."
+    )
     parser.addoption("--motion", action="store_true", help="Test motion commands.")
 
 
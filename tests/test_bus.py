@@ -0,0 +1,186 @@
+import asyncio
+import re
+import sys
+
+import aioserial
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump import Pump, PumpBus
+from syringe_pump.bus import encode_command
+from syringe_pump.emulator import PtyServer, VirtualPump
+from syringe_pump.exceptions import PumpCommandError, PumpError
+from syringe_pump.transport import AsyncioSerial
+
+
+class ChainSerial(aioserial.AioSerial):
+    """Pretend to be a daisy chain of pumps that echo the command they received."""
+
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.written: list[bytes] = []
+        self.pending: list[str] = []
+
+    async def write_async(self, data) -> int:
+        self.written.append(bytes(data))
+        for line in bytes(data).decode().splitlines():
+            match = re.match(r"(\d*)@(.*)", line)
+            assert match
+            address, command = match.groups()
+            prompt = f"{int(address):02d}:" if address else ":"
+            if "bad" in command:
+                command = f"Command error: {command}"
+            self.pending.append(f"\n{command}\r\n{prompt}\x11")
+        return len(data)
+
+    async def read_until_async(self, expected: bytes = b"\r\n", size=None) -> bytes:
+        await asyncio.sleep(0)  # let other tasks queue up behind this exchange
+        return self.pending.pop(0).encode()
+
+
+def test_encode_command():
+    assert encode_command("irun") == b"@irun\r\n"
+    assert encode_command("irun", address=7) == b"07@irun\r\n"
+
+
+async def test_pump_requires_serial_or_bus():
+    with pytest.raises(ValueError):
+        Pump()
+    with pytest.raises(ValueError):
+        Pump(bus=PumpBus(ChainSerial()), serial=ChainSerial())
+    with pytest.raises(ValueError):
+        Pump(bus=PumpBus(ChainSerial()), address=100)
+
+
+async def test_addressed_commands():
+    bus = PumpBus(ChainSerial())
+    pumps = [Pump(bus=bus, address=a) for a in (3, 7)]
+    for pump in pumps:
+        pump._initialised = True
+
+    responses = await asyncio.gather(*[p._write("irate") for p in pumps])
+
+    assert [r.address for r in responses] == [3, 7]
+    assert all(r.message == ["irate"] for r in responses)
+    assert bus.serial.written == [b"03@irate\r\n", b"07@irate\r\n"]
+
+
+async def test_round_robin_between_pumps():
+    bus = PumpBus(ChainSerial())
+    chatty, quiet = Pump(bus=bus, address=1), Pump(bus=bus, address=2)
+    chatty._initialised = quiet._initialised = True
+
+    await asyncio.gather(
+        *[chatty._write(f"cmd {i}") for i in range(3)], quiet._write("cmd q")
+    )
+
+    order = [w.split(b"@")[0] for w in bus.serial.written]
+    assert order == [b"01", b"02", b"01", b"01"]
+
+
+async def test_stray_reply_is_discarded():
+    bus = PumpBus(ChainSerial())
+    pump = Pump(bus=bus, address=1)
+    Pump(bus=bus, address=2)
+    pump._initialised = True
+    bus.serial.pending.append("\nlate\r\n02:\x11")  # left over from a timed out call
+
+    response = await pump._write("irate")
+
+    assert response.address == 1
+    assert response.message == ["irate"]
+
+
+async def test_only_stray_replies():
+    bus = PumpBus(ChainSerial())
+    pump = Pump(bus=bus, address=1)
+    Pump(bus=bus, address=2)
+    pump._initialised = True
+    bus.serial.pending.extend(["\nlate\r\n02:\x11"] * 10)
+
+    with pytest.raises(PumpError):
+        await pump._write("irate")
+
+
+async def test_cancelled_waiter_releases_port():
+    bus = PumpBus(ChainSerial())
+    first, second = Pump(bus=bus, address=1), Pump(bus=bus, address=2)
+    first._initialised = second._initialised = True
+
+    running = asyncio.ensure_future(first._write("a"))
+    waiting = asyncio.ensure_future(second._write("b"))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    await running
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+
+    response = await second._write("c")
+    assert response.message == ["c"]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a POSIX pty")
+async def test_cancelled_exchange_keeps_replies_in_step():
+    server = PtyServer(VirtualPump(), latency=0.05)
+    port = await server.start()
+    transport = AsyncioSerial(port=port, timeout=0.5)
+    try:
+        pump = Pump(serial=transport)
+        await pump._initialise()
+        await pump.infusion_rate.set(Quantity("1 ml/min"))
+        diameter = await pump.syringe.get_diameter()
+
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(pump.infusion_rate.get_limits(), 0.01)
+
+        assert await pump.infusion_rate.get() == Quantity("1 ml/min")
+        assert await pump.syringe.get_diameter() == diameter
+    finally:
+        transport.close()
+        server.close()
+
+
+async def test_pumps_on_one_port_share_bus():
+    serial = ChainSerial()
+    first, second = Pump(serial=serial), Pump(serial=serial)
+    assert first.bus is second.bus
+    assert Pump(serial=ChainSerial()).bus is not first.bus
+
+
+async def test_stop_jumps_queue():
+    pump = Pump(serial=ChainSerial())
+    pump._initialised = True
+
+    await asyncio.gather(*[pump._write(f"cmd {i}") for i in range(3)], pump.stop())
+
+    assert pump.serial.written == [
+        b"@cmd 0\r\n",
+        b"@stp\r\n",
+        b"@cmd 1\r\n",
+        b"@cmd 2\r\n",
+    ]
+
+
+async def test_pipelined_commands():
+    pump = Pump(bus=PumpBus(ChainSerial()), address=4)
+    pump._initialised = True
+
+    responses = await pump._write_many(["irate", "wrate", "tvolume"])
+
+    assert pump.serial.written == [b"04@irate\r\n04@wrate\r\n04@tvolume\r\n"]
+    assert [r.command for r in responses] == ["irate", "wrate", "tvolume"]
+    assert [r.message for r in responses] == [["irate"], ["wrate"], ["tvolume"]]
+
+
+async def test_pipelined_error_attribution():
+    pump = Pump(serial=ChainSerial())
+    pump._initialised = True
+
+    with pytest.raises(PumpCommandError) as e:
+        await pump._write_many(["irate", "bad 1", "bad 2", "wrate"])
+
+    assert e.value.response.command == "bad 1"
+    assert not pump.serial.pending  # all replies were consumed
+
+    response = await pump._write("irate")
+    assert response.message == ["irate"]
@@ -0,0 +1,105 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump import Pump
+from syringe_pump.cassette import (
+    CassetteWriter,
+    Exchange,
+    RecordingSerial,
+    ReplaySerial,
+    read_cassette,
+)
+from syringe_pump.emulator import VirtualSerial
+
+
+async def record_session(path: Path, append: bool = False, latency: float = 0.0):
+    serial = RecordingSerial(VirtualSerial(latency=latency), path, append=append)
+    pump = Pump(serial=serial)
+    await pump._initialise()
+    await pump.infusion_rate.set(Quantity("1 ml/min"))
+    await pump.infusion_rate.get()
+    serial.close()
+
+
+async def test_record(tmp_path: Path):
+    cassette = tmp_path / "session.jsonl"
+    await record_session(cassette, latency=0.01)
+
+    exchanges = list(read_cassette(cassette))
+    commands = [e.command for e in exchanges]
+    assert commands[-2:] == ["@irate 1 ml/min\r\n", "@irate\r\n"]
+    assert exchanges[-1].reply == "\n1 ml/min\r\n:\x11"
+    assert all(e.latency >= 0.01 for e in exchanges)
+    assert [e.time for e in exchanges] == sorted(e.time for e in exchanges)
+
+
+async def test_written_incrementally(tmp_path: Path):
+    cassette = tmp_path / "session.jsonl"
+    serial = RecordingSerial(VirtualSerial(), cassette)
+    await serial.write_async(b"@irate\r\n")
+    await serial.read_until_async()
+
+    assert len(list(read_cassette(cassette))) == 1  # before closing
+    serial.close()
+
+
+async def test_append(tmp_path: Path):
+    cassette = tmp_path / "session.jsonl"
+    await record_session(cassette)
+    first = list(read_cassette(cassette))
+    await record_session(cassette, append=True)
+
+    exchanges = list(read_cassette(cassette))
+    assert len(exchanges) == 2 * len(first)
+    assert exchanges[len(first)].time >= first[-1].time
+
+
+async def test_replay(tmp_path: Path):
+    cassette = tmp_path / "session.jsonl"
+    await record_session(cassette)
+    serial = ReplaySerial(cassette)
+    pump = Pump(serial=serial)
+    await pump._initialise()
+
+    # the order of different commands does not matter
+    assert await pump.infusion_rate.get() == Quantity("1 ml/min")
+    await pump.infusion_rate.set(Quantity("1 ml/min"))
+    assert serial.remaining() == 0
+    with pytest.raises(IndexError):
+        await pump.infusion_rate.get()
+    with pytest.raises(KeyError):
+        await pump.withdrawal_rate.get()
+
+
+async def test_strict_replay(tmp_path: Path):
+    cassette = tmp_path / "session.jsonl"
+    await record_session(cassette)
+    pump = Pump(serial=ReplaySerial(cassette, strict=True))
+    await pump._initialise()
+
+    with pytest.raises(ValueError):
+        await pump.infusion_rate.get()
+
+
+async def test_replay_timing(tmp_path: Path):
+    cassette = tmp_path / "session.jsonl"
+    writer = CassetteWriter(cassette)
+    writer.write(Exchange(0.0, "@irate\r\n", "\n1 ml/min\r\n:\x11", 0.05))
+    writer.close()
+    serial = ReplaySerial(cassette, timing=True)
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    await serial.write_async(b"@irate\r\n")
+    assert await serial.read_until_async() == b"\n1 ml/min\r\n:\x11"
+    assert loop.time() - start >= 0.05
+
+
+def test_not_a_cassette(tmp_path: Path):
+    path = tmp_path / "other.jsonl"
+    path.write_text('{"irate": []}\n')
+    with pytest.raises(ValueError):
+        ReplaySerial(path)
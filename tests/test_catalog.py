@@ -0,0 +1,113 @@
+import json
+
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump import Manufacturer, Pump
+from syringe_pump.catalog import SyringeCatalog, SyringeType
+from syringe_pump.emulator import VirtualSerial
+from tests.conftest import ScriptedSerial
+
+
+@pytest.fixture
+async def pump():
+    pump = Pump(serial=VirtualSerial())
+    await pump._initialise()
+    return pump
+
+
+def record_commands(pump: Pump) -> list[str]:
+    commands: list[str] = []
+    pump.command_hooks.append(lambda event: commands.append(event.command))
+    return commands
+
+
+async def test_build(pump: Pump):
+    selected = (await pump._write("syrmanu")).message
+
+    catalog = await SyringeCatalog.build(pump)
+
+    assert len(catalog) == 9 * len(Manufacturer)
+    hoshi = catalog.lookup(Manufacturer.HOSHI, Quantity("20 ml"))
+    assert hoshi.diameter == pytest.approx(Quantity("20.45 mm"), rel=1e-3)
+    assert catalog.manufacturer_named("hoshi") == Manufacturer.HOSHI
+    assert (await pump._write("syrmanu")).message == selected
+
+
+async def test_build_restores_custom_syringe(pump: Pump):
+    await pump.syringe.set_diameter(12.0)
+    await pump.syringe.set_volume(Quantity("7 ml"))
+
+    await SyringeCatalog.build(pump)
+
+    assert await pump.syringe.get_diameter() == Quantity("12 mm")
+    assert await pump.syringe.get_volume() == Quantity("7 ml")
+
+
+async def test_build_skips_unsupported_manufacturers():
+    serial = ScriptedSerial(
+        {
+            "version": "Firmware: v1.0\r\nPump address: 0\r\nSerial number: X1",
+            "syrmanu HOSHI ?": "10 ml\r\n20 ml",
+            "syrmanu TOP ?": "Argument error: TOP",
+        }
+    )
+    pump = Pump(serial=serial)
+    await pump._initialise()
+
+    catalog = await SyringeCatalog.build(pump, diameters=False)
+
+    assert catalog.firmware == "v1.0"
+    assert catalog.manufacturers == [Manufacturer.HOSHI]
+    assert list(catalog) == [
+        SyringeType(Manufacturer.HOSHI, Quantity("10 ml"), None),
+        SyringeType(Manufacturer.HOSHI, Quantity("20 ml"), None),
+    ]
+    with pytest.raises(ValueError, match="no TOP syringes"):
+        catalog.lookup(Manufacturer.TOP, Quantity("10 ml"))
+
+
+def test_save_and_load(tmp_path):
+    path = tmp_path / "catalog.json"
+    diameter = Quantity("14.427 mm")
+    syringe = SyringeType(Manufacturer.TERUMO, Quantity("10 ml"), diameter)
+    SyringeCatalog("v1.0", [syringe], {Manufacturer.TERUMO: "Terumo"}).save(path)
+    SyringeCatalog("v2.0").save(path)
+
+    catalog = SyringeCatalog.load("v1.0", path)
+
+    assert catalog is not None
+    assert list(catalog) == [syringe]
+    assert catalog.names == {Manufacturer.TERUMO: "Terumo"}
+    assert SyringeCatalog.load("v2.0", path) is not None
+    assert SyringeCatalog.load("v3.0", path) is None
+    assert json.loads(path.read_text())["format"] == "syringe-pump-catalog"
+
+
+def test_load_ignores_broken_file(tmp_path):
+    path = tmp_path / "catalog.json"
+    path.write_text("{")
+    assert SyringeCatalog.load("v1.0", path) is None
+
+
+async def test_catalog_built_once_per_firmware(pump: Pump, tmp_path):
+    path = tmp_path / "catalog.json"
+    await SyringeCatalog.for_pump(pump, path)
+    commands = record_commands(pump)
+
+    catalog = await pump.syringe.load_catalog(path)
+
+    assert len(catalog) == 9 * len(Manufacturer)
+    assert commands == ["version"]
+
+
+async def test_set_manufacturer_with_catalog(pump: Pump, tmp_path):
+    await pump.syringe.load_catalog(tmp_path / "catalog.json")
+    commands = record_commands(pump)
+
+    with pytest.raises(ValueError, match="Valid volumes are: 1 ml, 2 ml"):
+        await pump.syringe.set_manufacturer(Manufacturer.NIPRO, Quantity("4 ml"))
+    await pump.syringe.set_manufacturer(Manufacturer.NIPRO, Quantity("5 ml"))
+
+    assert commands == ["syrmanu NIPRO 5 ml"]
+    assert pump.syringe.last_diameter == await pump.syringe.get_diameter()
@@ -0,0 +1,89 @@
+import asyncio
+import sys
+
+import pytest
+import serial
+
+from syringe_pump.discovery import DiscoveredPump, discover
+from syringe_pump.emulator import PtyServer, VirtualPump, VirtualSerial
+
+
+def fake_ports(timeout: float = 0.1):
+    chain = [VirtualPump(address=a, serial_number=f"CHAIN{a}") for a in (1, 2, 5)]
+    ports = {
+        "COM1": VirtualSerial(VirtualPump(serial_number="SOLO"), timeout=timeout),
+        "COM2": VirtualSerial(chain, timeout=timeout),
+        "COM3": VirtualSerial([], timeout=timeout),  # nothing connected
+    }
+
+    def open_port(port: str):
+        if port not in ports:
+            raise serial.SerialException(f"could not open port {port}")
+        return ports[port]
+
+    return open_port
+
+
+async def test_discover():
+    pumps = await discover(
+        ["COM1", "COM2", "COM3", "COM4"], addresses=range(6), open_port=fake_ports()
+    )
+
+    assert pumps == {
+        "SOLO": DiscoveredPump("COM1", 0, "v3.0.6", "SOLO"),
+        "CHAIN1": DiscoveredPump("COM2", 1, "v3.0.6", "CHAIN1"),
+        "CHAIN2": DiscoveredPump("COM2", 2, "v3.0.6", "CHAIN2"),
+        "CHAIN5": DiscoveredPump("COM2", 5, "v3.0.6", "CHAIN5"),
+    }
+
+
+async def test_ports_probed_concurrently():
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await discover(["COM1", "COM2", "COM3"], addresses=range(6), open_port=fake_ports())
+
+    # each port waits for one timeout at most, and they wait together
+    assert loop.time() - start < 0.2
+
+
+class SlowSerial(VirtualSerial):
+    """Deliver written bytes to the pumps only as fast as `baudrate` allows."""
+
+    def __init__(self, *args, baudrate: int, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.baudrate = baudrate
+
+    async def write_async(self, data: bytes) -> int:
+        loop = asyncio.get_running_loop()
+        for i in range(len(data)):
+            loop.call_later(
+                (i + 1) * 10 / self.baudrate, self._receive, data[i : i + 1]
+            )
+        return len(data)
+
+    def _receive(self, byte: bytes):
+        asyncio.ensure_future(super().write_async(byte))
+
+
+async def test_long_probe_at_low_baudrate():
+    pumps = [VirtualPump(address=a, serial_number=f"CHAIN{a}") for a in (1, 40)]
+    port = SlowSerial(pumps, timeout=0.05, baudrate=19200)
+
+    # 100 addresses take about 1.3 s to send, far longer than the timeout
+    found = await discover(
+        ["COM1"], addresses=range(100), baudrate=19200, open_port=lambda _: port
+    )
+
+    assert set(found) == {"CHAIN1", "CHAIN40"}
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a POSIX pty")
+async def test_discover_pty():
+    server = PtyServer(VirtualPump(address=3, serial_number="PTY3"))
+    port = await server.start()
+    try:
+        pumps = await discover([port], addresses=[3, 4], timeout=0.1)
+    finally:
+        server.close()
+
+    assert pumps == {"PTY3": DiscoveredPump(port, 3, "v3.0.6", "PTY3")}
@@ -0,0 +1,174 @@
+import asyncio
+import sys
+
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump import Pump, PumpBus
+from syringe_pump.emulator import PtyServer, VirtualPump, VirtualSerial
+from syringe_pump.exceptions import PumpCommandError, TargetReachedError
+from syringe_pump.transport import AsyncioSerial
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+async def pump(clock: Clock):
+    pump = Pump(serial=VirtualSerial(VirtualPump(clock=clock)))
+    await pump._initialise()
+    return pump
+
+
+async def test_settings_round_trip(pump: Pump):
+    await pump.infusion_rate.set(Quantity("2.5 ml/min"))
+    await pump.target_time.set(90)
+
+    assert await pump.infusion_rate.get() == Quantity("2.5 ml/min")
+    assert (await pump.target_time.get()).total_seconds() == 90
+    assert await pump.get_mode() == "Quick Start - Infuse/Withdraw (qs iw)"
+
+
+async def test_unknown_command(pump: Pump):
+    with pytest.raises(PumpCommandError):
+        await pump._write("fly")
+
+
+async def test_rate_out_of_range(pump: Pump):
+    _, high = await pump.infusion_rate.get_limits()
+    with pytest.raises(PumpCommandError):
+        await pump.infusion_rate.set(Quantity(high.real * 2, "l/min"))
+
+
+@pytest.mark.parametrize(
+    "command, argument",
+    [("dim abc", "abc"), ("time garbage", "garbage"), ("syrmanu FOO 10 ml", "FOO")],
+)
+async def test_invalid_argument(pump: Pump, command: str, argument: str):
+    with pytest.raises(PumpCommandError, match=f"Argument error: {argument}"):
+        await pump._write(command)
+    await pump.version()  # the line is still in sync
+
+
+async def test_volume_accumulates(pump: Pump, clock: Clock):
+    await pump.infusion_rate.set(Quantity("6 ml/min"))
+    await pump.run()
+    clock.now += 10
+
+    assert await pump.infusion_volume.get() == Quantity("1 ml")
+    status = await pump.status()
+    assert status.running
+    assert status.elapsed.total_seconds() == 10
+
+    await pump.stop()
+    clock.now += 10
+    assert await pump.infusion_volume.get() == Quantity("1 ml")
+
+
+async def test_rate_change_while_running(pump: Pump, clock: Clock):
+    await pump.infusion_rate.set(Quantity("6 ml/min"))
+    await pump.run()
+    clock.now += 10
+    await pump.infusion_rate.set(Quantity("12 ml/min"))
+    clock.now += 10
+
+    assert await pump.infusion_volume.get() == Quantity("3 ml")
+
+
+async def test_target_volume_reached(pump: Pump, clock: Clock):
+    await pump.withdrawal_rate.set(Quantity("1 ml/min"))
+    await pump.target_volume.set(Quantity("0.5 ml"))
+    await pump.run("withdraw")
+    clock.now += 60
+
+    assert await pump.withdrawal_volume.get() == Quantity("0.5 ml")
+    with pytest.raises(TargetReachedError):
+        await pump._write("irate")
+
+
+async def test_ramp_volume(pump: Pump, clock: Clock):
+    await pump.infusion_rate.set(Quantity("1 ml/min"))
+    await pump.infusion_rate.set_ramp(Quantity("1 ml/min"), Quantity("3 ml/min"), 60)
+    await pump.run()
+    clock.now += 30
+
+    assert (await pump.status()).rate.real == pytest.approx(2e-3)  # l/min
+    assert await pump.infusion_volume.get() == Quantity("0.75 ml")
+
+    clock.now += 60  # the ramp also sets the target time
+    assert await pump.infusion_volume.get() == Quantity("2 ml")
+    assert (await pump.status()).target_reached
+
+
+async def test_addresses():
+    serial = VirtualSerial([VirtualPump(address=a) for a in (1, 2)])
+    bus = PumpBus(serial)
+    pumps = [Pump(bus=bus, address=a) for a in (1, 2)]
+    await asyncio.gather(*[p._initialise() for p in pumps])
+
+    versions = await asyncio.gather(*[p.version() for p in pumps])
+
+    assert [v.address for v in versions] == [1, 2]
+
+
+async def test_missing_address_times_out():
+    serial = VirtualSerial(VirtualPump(address=1), timeout=0.05)
+
+    await serial.write_async(b"03@irate\r\n")
+    assert await serial.read_until_async() == b""
+
+
+async def test_latency_per_command():
+    serial = VirtualSerial(latency={"version": 0.05})
+    pump = Pump(serial=serial)
+    await pump._initialise()
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    await pump.infusion_rate.get()
+    fast = loop.time() - start
+    start = loop.time()
+    await pump.version()
+    slow = loop.time() - start
+
+    assert fast < 0.05 <= slow
+
+
+async def test_pipelined_replies_in_order():
+    serial = VirtualSerial(latency={"version": 0.05, "irate": 0.01})
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    await serial.write_async(b"@version\r\n@irate\r\n@irate\r\n")
+    replies = [await serial.read_until_async() for _ in range(3)]
+
+    assert b"Firmware" in replies[0]
+    assert loop.time() - start >= 0.07  # one command at a time
+    assert b"Firmware" not in replies[1]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a POSIX pty")
+async def test_pty_server():
+    server = PtyServer(VirtualPump(serial_number="PTY1"))
+    port = await server.start()
+    transport = AsyncioSerial(port=port, timeout=0.5)
+    try:
+        pump = Pump(serial=transport)
+        await pump._initialise()
+        await pump.infusion_rate.set(Quantity("1 ml/min"))
+
+        assert (await pump.version()).serial_number == "PTY1"
+        assert await pump.infusion_rate.get() == Quantity("1 ml/min")
+    finally:
+        transport.close()
+        server.close()
@@ -0,0 +1,150 @@
+import asyncio
+
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump import Pump, PumpBus
+from syringe_pump.emulator import VirtualPump, VirtualSerial
+from syringe_pump.exceptions import PumpCommandError, PumpError
+from syringe_pump.group import PumpGroup, PumpGroupError
+
+LATENCY = 0.05
+
+
+async def make_group(count: int, **kwargs) -> PumpGroup:
+    pumps = [Pump(serial=VirtualSerial(latency=LATENCY)) for _ in range(count)]
+    group = PumpGroup(pumps, **kwargs)
+    (await group.initialise()).raise_errors()
+    return group
+
+
+async def elapsed(awaitable) -> float:
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await awaitable
+    return loop.time() - start
+
+
+async def test_call_by_name():
+    group = await make_group(3)
+
+    await group.call("infusion_rate.set", Quantity("1 ml/min"))
+    result = await group.call("infusion_rate.get")
+
+    assert result.ok
+    assert list(result.results.values()) == [Quantity("1 ml/min")] * 3
+
+
+async def test_call_function():
+    group = await make_group(2)
+
+    async def serial_number(pump: Pump) -> str:
+        return (await pump.version()).serial_number
+
+    result = await group.call(serial_number)
+    assert [o.result for o in result] == ["VIRTUAL0"] * 2
+    with pytest.raises(TypeError):
+        await group.call(serial_number, 1)
+
+
+async def test_takes_as_long_as_slowest_pump():
+    group = await make_group(10)
+    await group.call("infusion_rate.set", Quantity("1 ml/min"))
+
+    assert await elapsed(group.run()) < 3 * LATENCY
+    assert all(pump.serial.pumps[0].prompt == ">" for pump in group)
+
+
+async def test_bounded_concurrency():
+    group = await make_group(4, max_concurrency=2)
+    assert 2 * LATENCY <= await elapsed(group.stop()) < 3 * LATENCY
+    with pytest.raises(ValueError):
+        PumpGroup([], max_concurrency=0)
+
+
+async def test_errors_collected():
+    group = await make_group(3)
+    await group.pumps[1].infusion_rate.set(Quantity("1 ml/min"))
+
+    result = await group.run()
+
+    assert not result.ok
+    assert set(result.errors) == {group.pumps[0], group.pumps[2]}
+    assert all(isinstance(e, PumpCommandError) for e in result.errors.values())
+    assert list(result.results) == [group.pumps[1]]
+    with pytest.raises(PumpGroupError) as info:
+        result.raise_errors()
+    assert info.value.errors == result.errors
+
+
+async def test_shared_port_takes_turns():
+    serial = VirtualSerial([VirtualPump(address=a) for a in (1, 2, 3)], latency=LATENCY)
+    bus = PumpBus(serial)
+    group = PumpGroup(Pump(bus=bus, address=a) for a in (1, 2, 3))
+
+    # the pumps' pipelined initialisations go over the line one after another
+    assert await elapsed(group.initialise()) >= 3 * LATENCY
+    assert (await group.call("version")).ok
+
+
+async def test_run_synchronized():
+    group = await make_group(8)
+    await group.call("infusion_rate.set", Quantity("1 ml/min"))
+    group.pumps[3].serial.pumps[0].rates["i"] = 0.0  # the pump refuses to run
+
+    reports = await group.run_synchronized()
+
+    virtual = [pump.serial.pumps[0] for pump in group]
+    starts = [v._run_start for i, v in enumerate(virtual) if i != 3]
+    assert max(starts) - min(starts) < 0.01
+    assert [r.pump for r in reports] == group.pumps
+    assert all(r.estimated_skew < 0.01 and r.latency >= LATENCY for r in reports)
+    assert [i for i, r in enumerate(reports) if r.error] == [3]
+
+    reports = await group.stop_synchronized()
+    assert all(v.prompt == ":" for v in virtual)
+    assert not any(r.error for r in reports)
+
+
+async def test_synchronized_commands_reach_hooks():
+    group = await make_group(2)
+    await group.call("infusion_rate.set", Quantity("1 ml/min"))
+    events = []
+    for pump in group:
+        pump.command_hooks.append(events.append)
+
+    await group.run_synchronized()
+    await group.stop_synchronized()
+
+    assert [(e.command, e.prompt) for e in events] == [
+        ("irun", ">"),
+        ("irun", ">"),
+        ("stp", ":"),
+        ("stp", ":"),
+    ]
+    assert all(e.read > 0 for e in events)
+
+
+async def test_run_synchronized_shared_port():
+    serial = VirtualSerial([VirtualPump(address=a) for a in (1, 2, 3)])
+    serial.baudrate = 9600
+    bus = PumpBus(serial)
+    group = PumpGroup(Pump(bus=bus, address=a) for a in (1, 2, 3))
+    await group.initialise()
+    await group.call("withdrawal_rate.set", Quantity("1 ml/min"))
+
+    reports = await group.run_synchronized("withdraw")
+
+    assert all(v.prompt == "<" for v in serial.pumps)
+    command_time = len(b"01@wrun\r\n") * 10 / 9600
+    assert [r.estimated_skew for r in reports] == pytest.approx(
+        [0, command_time, 2 * command_time]
+    )
+    with pytest.raises(ValueError):
+        await group.run_synchronized("sideways")  # type: ignore
+
+
+async def test_run_synchronized_needs_initialised_pumps():
+    group = PumpGroup([Pump(serial=VirtualSerial())])
+    with pytest.raises(PumpError):
+        await group.run_synchronized()
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from syringe_pump import Pump
+from syringe_pump.emulator import VirtualSerial
+from syringe_pump.exceptions import PumpCommandError
+from syringe_pump.group import PumpGroup
+from tests.conftest import ScriptedSerial
+
+LATENCY = 0.05
+CURRENT_MODE = "Quick Start - Infuse/Withdraw (qs iw)"
+
+
+def pump_clock(offset: timedelta = timedelta()) -> str:
+    now = datetime.now() + offset
+    return f"{now:%m/%d/%y} {now.hour % 12 or 12}:{now:%M:%S %p}"
+
+
+async def test_initialise_in_one_write():
+    serial = ScriptedSerial()
+    pump = Pump(serial=serial)
+
+    settings = await pump._initialise()
+
+    assert settings[0] == "load qs iw"
+    assert settings[1].startswith("time ")
+    assert serial.commands == ["poll on", "nvram none", *settings]
+
+
+async def test_probe_skips_current_settings():
+    serial = ScriptedSerial({"load": CURRENT_MODE, "time": pump_clock()})
+    pump = Pump(serial=serial)
+
+    assert await pump._initialise(probe=True) == []
+    assert serial.commands == ["poll on", "nvram none", "load", "time"]
+
+
+async def test_probe_sends_outdated_settings():
+    serial = ScriptedSerial(
+        {
+            "load": "Quick Start - Infuse Only (qs i)",
+            "time": pump_clock(timedelta(minutes=-5)),
+        }
+    )
+    pump = Pump(serial=serial)
+
+    outdated = await pump._initialise(probe=True)
+
+    assert outdated[0] == "load qs iw"
+    assert outdated[1].startswith("time ")
+    assert serial.commands == ["poll on", "nvram none", "load", "time", *outdated]
+
+
+async def test_probe_only_fixes_clock():
+    serial = ScriptedSerial({"load": CURRENT_MODE, "time": "Invalid time"})
+    pump = Pump(serial=serial)
+
+    outdated = await pump._initialise(probe=True)
+
+    assert len(outdated) == 1 and outdated[0].startswith("time ")
+
+
+async def test_probe_after_nvram_fallback():
+    serial = ScriptedSerial(
+        {
+            "nvram none": "Argument error: none",
+            "load": CURRENT_MODE,
+            "time": pump_clock(),
+        }
+    )
+    pump = Pump(serial=serial)
+
+    assert await pump._initialise(probe=True) == []
+    # the replies of the probes are kept, so they are not sent again
+    assert serial.commands == ["poll on", "nvram none", "load", "time", "nvram off"]
+
+
+async def test_error_after_nvram_fallback():
+    serial = ScriptedSerial(
+        {"nvram none": "Argument error: none", "load": "Command error: load"}
+    )
+    pump = Pump(serial=serial)
+
+    with pytest.raises(PumpCommandError, match="load"):
+        await pump._initialise(probe=True)
+    assert serial.commands[-1] == "nvram off"
+
+
+class CountingSerial(VirtualSerial):
+    writes = 0
+
+    async def write_async(self, data: bytes) -> int:
+        self.writes += 1
+        return await super().write_async(data)
+
+
+async def test_reconnect_takes_one_round_trip():
+    serial = CountingSerial(latency=LATENCY)
+    pump = Pump(serial=serial)
+    await pump._initialise()
+    serial.writes = 0
+
+    assert await pump._initialise(probe=True) == []
+    assert serial.writes == 1
+
+
+async def test_group_probe():
+    serials = [VirtualSerial(latency=LATENCY) for _ in range(3)]
+    serials[1].pumps[0].mode = "w"
+    serials[2].pumps[0].clock_offset = timedelta(hours=1)
+    group = PumpGroup(Pump(serial=serial) for serial in serials)
+
+    result = (await group.initialise(probe=True)).raise_errors()
+
+    first, second, third = result.results.values()
+    assert first == []
+    assert second == ["load qs iw"]
+    assert len(third) == 1 and third[0].startswith("time ")
+    assert all(serial.pumps[0].mode == "iw" for serial in serials)
@@ -0,0 +1,57 @@
+import pytest
+
+from syringe_pump import Pump
+from syringe_pump.instrumentation import CommandEvent, LatencyHistogram
+from tests.conftest import ScriptedSerial
+
+
+def event(command: str, total: float) -> CommandEvent:
+    return CommandEvent(command, 0, 10, 10, 0.0, 0.0, total, 0.0, ":")
+
+
+@pytest.fixture
+async def pump():
+    pump = Pump(serial=ScriptedSerial({"irate": "5 ml/min"}))
+    await pump._initialise()
+    return pump
+
+
+async def test_hooks_receive_events(pump: Pump):
+    events: list[CommandEvent] = []
+    pump.command_hooks.append(events.append)
+
+    await pump.infusion_rate.get()
+    await pump._write_many(["irate", "irun"])
+
+    assert [e.command for e in events] == ["irate", "irate", "irun"]
+    first = events[0]
+    assert first.name == "irate"
+    assert first.bytes_sent == len(b"@irate\r\n")
+    assert first.bytes_received == len(b"\n5 ml/min\r\n:\x11")
+    assert first.prompt == ":"
+    assert first.total >= first.read >= 0
+    assert events[2].write == events[2].queued == 0  # shared with the batch
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for i in range(1, 101):
+        histogram(event("irate 1 ml/min", i * 1e-3))
+    histogram(event("stp", 1000))
+
+    assert histogram.commands == ["irate", "stp"]
+    assert histogram.count("irate") == 100
+    assert histogram.percentile("irate", 50) == pytest.approx(0.05, rel=0.26)
+    assert histogram.percentile("irate", 99) == pytest.approx(0.099, rel=0.26)
+    assert histogram.percentile("stp", 50) == float("inf")
+    assert set(histogram.summary()["irate"]) == {"count", "p50", "p90", "p99"}
+    with pytest.raises(KeyError):
+        histogram.percentile("wrate", 50)
+
+
+async def test_histogram_as_hook(pump: Pump):
+    histogram = LatencyHistogram()
+    pump.command_hooks.append(histogram)
+    for _ in range(3):
+        await pump.infusion_rate.get()
+    assert histogram.count("irate") == 3
@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+import pytest
+
+import syringe_pump
+
+HEAVY = ["pydantic", "quantiphy", "aioserial", "serial"]
+
+
+def loaded_modules(statement: str) -> set[str]:
+    """Top-level packages imported by `statement` in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", f"{statement}; import sys; print(*sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return {name.split(".")[0] for name in output.split()}
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import syringe_pump",
+        "from syringe_pump import Pump, PumpBus, FlowProfile",
+        "from syringe_pump.response_parser import parse_output",
+    ],
+)
+def test_heavy_dependencies_not_imported(statement: str):
+    assert loaded_modules(statement).isdisjoint(HEAVY)
+
+
+def test_models_imported_on_use():
+    modules = loaded_modules("from syringe_pump import PumpVersion")
+    assert "pydantic" in modules
+
+
+def test_lazy_attributes():
+    from syringe_pump.models import PumpResponse
+    from syringe_pump.response_parser import PumpResponse as ParserPumpResponse
+
+    assert syringe_pump.PumpResponse is PumpResponse is ParserPumpResponse
+    assert "Pump" in dir(syringe_pump)
+    with pytest.raises(AttributeError):
+        syringe_pump.Pumpp
@@ -0,0 +1,94 @@
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump import FlowProfile, Pump
+from syringe_pump.emulator import VirtualSerial
+from syringe_pump.exceptions import PumpCommandError
+from syringe_pump.instrumentation import CommandEvent
+from syringe_pump.limits import LimitCache, check_limits
+
+TOO_FAST = Quantity("1 l/min")
+
+
+async def make_pump(limits: LimitCache | None = None) -> tuple[Pump, list[str]]:
+    pump = Pump(serial=VirtualSerial(), limits=limits)
+    await pump._initialise()
+    commands: list[str] = []
+    pump.command_hooks.append(lambda event: commands.append(event.command))
+    return pump, commands
+
+
+def test_check_limits():
+    limits = Quantity("1 ul/min"), Quantity("10 ml/min")
+    check_limits(Quantity("1 ml/min"), limits)
+    check_limits(TOO_FAST, None)
+    with pytest.raises(ValueError, match="out of range"):
+        check_limits(TOO_FAST, limits)
+
+
+async def test_rate_checked_without_traffic():
+    pump, commands = await make_pump()
+    await pump.syringe.get_diameter()
+    await pump.infusion_rate.get_limits()
+    commands.clear()
+
+    with pytest.raises(ValueError):
+        await pump.withdrawal_rate.set(TOO_FAST)
+    with pytest.raises(ValueError):
+        await pump.infusion_rate.set_ramp(Quantity("1 ml/min"), TOO_FAST, 10)
+    await pump.infusion_rate.set(Quantity("1 ml/min"))
+
+    assert commands == ["irate 1 ml/min"]
+
+
+async def test_unknown_limits_left_to_pump():
+    pump, _ = await make_pump()
+    await pump.infusion_rate.get_limits()  # diameter not known yet
+
+    assert pump.known_limits() is None
+    with pytest.raises(PumpCommandError):
+        await pump.infusion_rate.set(TOO_FAST)
+
+
+async def test_limits_follow_diameter():
+    pump, _ = await make_pump()
+    await pump.syringe.set_diameter(10.0)
+    limits = await pump.infusion_rate.get_limits()
+    assert pump.known_limits() == limits
+
+    await pump.syringe.set_diameter(20.0)
+    assert pump.known_limits() is None
+    await pump.syringe.set_diameter(10.0)
+    assert pump.known_limits() == limits
+
+    await pump.syringe.set_manufacturer(pump.syringe.Manufacturer.HOSHI)
+    assert pump.known_limits() is None
+
+
+async def test_shared_cache():
+    limits = LimitCache()
+    first, _ = await make_pump(limits)
+    await first.syringe.get_diameter()
+    await first.infusion_rate.get_limits()
+    second, commands = await make_pump(limits)
+
+    await second.syringe.get_diameter()
+    with pytest.raises(ValueError):
+        await second.infusion_rate.set(TOO_FAST)
+    assert commands == ["diameter"]
+    assert len(limits) == 1
+
+
+async def test_profile_validation():
+    pump, commands = await make_pump()
+    profile = FlowProfile([(Quantity("1 ml/min"), 60), (TOO_FAST, 60)])
+
+    with pytest.raises(ValueError):
+        await profile.validate(pump)
+    assert commands == ["diameter", "irate lim"]
+
+    commands.clear()
+    await FlowProfile([(Quantity("1 ml/min"), 60), (None, 60)]).validate(pump)
+    with pytest.raises(ValueError):
+        await profile.run(pump)
+    assert commands == []
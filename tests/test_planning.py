@@ -0,0 +1,133 @@
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump.profile import FlowProfile, ProfileStep
+
+np = pytest.importorskip("numpy")
+from syringe_pump import planning  # noqa: E402
+from syringe_pump.planning import Segments  # noqa: E402
+
+ML_MIN = 1e-3  # l/min
+ML = 1e-3  # l
+
+
+def test_constant_and_ramp():
+    segments = Segments.stack(
+        [
+            [(1 * ML_MIN, 60)],
+            [(0.0, 2 * ML_MIN, 60)],  # a ramp
+        ]
+    )
+
+    volumes = planning.dispensed(segments, [0, 30, 60, 120])
+
+    assert volumes[0] == pytest.approx(np.array([0, 0.5, 1, 1]) * ML)
+    assert volumes[1] == pytest.approx(np.array([0, 0.25, 1, 1]) * ML)
+
+
+def test_profiles_of_different_length():
+    segments = Segments.stack(
+        [[(1 * ML_MIN, 60), (2 * ML_MIN, 60)], [], [(1 * ML_MIN, 30)]]
+    )
+
+    assert segments.duration.shape == (3, 2)
+    assert list(segments.total_duration) == [120, 0, 30]
+    assert planning.dispensed(segments, [120])[:, 0] == pytest.approx(
+        np.array([3, 0, 0.5]) * ML
+    )
+
+
+def test_time_to_volume():
+    segments = Segments.stack(
+        [
+            [(1 * ML_MIN, 60), (2 * ML_MIN, 60)],
+            [(0.0, 2 * ML_MIN, 60)],
+            [(-1 * ML_MIN, 30), (1 * ML_MIN, 60)],  # withdrawing counts as well
+            [(1 * ML_MIN, 30)],
+        ]
+    )
+
+    times = planning.time_to_volume(segments, 1 * ML)
+    assert times == pytest.approx([60, 60, 60, np.inf])
+
+    times = planning.time_to_volume(segments, np.array([2, 0.25, 0.25, 0]) * ML)
+    assert times == pytest.approx([90, 30, 15, 0])
+
+
+def test_time_to_volume_inverts_dispensed():
+    rng = np.random.default_rng(0)
+    start, end = rng.uniform(0, 5, (2, 1000, 4)) * ML_MIN
+    segments = Segments.from_arrays(start, end, rng.uniform(1, 100, (1000, 4)))
+    moments = rng.uniform(0, 1, 1000) * segments.total_duration
+
+    volumes = planning.dispensed(segments, moments)[np.arange(1000), np.arange(1000)]
+
+    assert planning.time_to_volume(segments, volumes) == pytest.approx(moments)
+
+
+def test_remaining_and_fits():
+    segments = Segments.stack(
+        [
+            [(1 * ML_MIN, 60), (-2 * ML_MIN, 60)],
+            [(6 * ML_MIN, 60)],
+        ]
+    )
+
+    remaining = planning.remaining(segments, [60, 120], syringe_volume=5 * ML)
+
+    assert remaining[0] == pytest.approx(np.array([4, 6]) * ML)
+    assert remaining[1] == pytest.approx(np.array([-1, -1]) * ML)
+    assert list(planning.fits(segments, 5 * ML)) == [False, False]
+    assert list(planning.fits(segments, 5 * ML, initial_volume=3 * ML)) == [True, False]
+
+
+def test_from_profiles():
+    profile = FlowProfile(
+        [
+            ProfileStep(Quantity("1 ml/min"), 60),
+            ProfileStep(None, 30),
+            ProfileStep(Quantity("2 ml/min"), 30, "withdraw"),
+        ]
+    )
+
+    segments = Segments.from_profiles([profile])
+
+    assert segments.start_rate[0] == pytest.approx([1 * ML_MIN, 0, -2 * ML_MIN])
+    assert planning.dispensed(segments, [120])[0, 0] == pytest.approx(0)
+
+
+def test_sweep():
+    rates = np.linspace(0.1, 10, 1000)[:, None] * ML_MIN
+    segments = Segments.from_arrays(rates, rates, 60.0)
+
+    assert segments.duration.shape == (1000, 1)
+    assert planning.time_to_volume(segments, 1 * ML) == pytest.approx(
+        np.where(rates[:, 0] >= 1 * ML_MIN, 60 / (rates[:, 0] / ML_MIN), np.inf)
+    )
+
+
+def test_within_limits():
+    segments = Segments.stack(
+        [
+            [(1 * ML_MIN, 60), (0.0, 10)],
+            [(0.5 * ML_MIN, 2 * ML_MIN, 60)],
+            [(-3 * ML_MIN, 1)],
+        ]
+    )
+
+    ok = planning.within_limits(segments, 0.1 * ML_MIN, 2.5 * ML_MIN)
+
+    assert list(ok) == [True, True, False]
+
+
+def test_plunger_travel():
+    diameter = float(Quantity("20 mm"))
+    area = np.pi * 0.01**2
+    assert planning.plunger_travel(1 * ML, diameter) == pytest.approx(1e-6 / area)
+
+
+def test_invalid_segments():
+    with pytest.raises(ValueError):
+        Segments.stack([[(1 * ML_MIN, -1)]])
+    with pytest.raises(ValueError):
+        Segments.stack([[(1 * ML_MIN, -1 * ML_MIN, 10)]])
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump import Pump
+from syringe_pump.profile import FlowProfile, ProfileStep
+from tests.conftest import ScriptedSerial
+
+
+@pytest.fixture
+async def pump():
+    pump = Pump(serial=ScriptedSerial())
+    await pump._initialise()
+    pump.serial.commands.clear()
+    return pump
+
+
+@pytest.mark.parametrize(
+    "step",
+    [
+        (Quantity("1 ml/min"), 0),
+        (Quantity("-1 ml/min"), 1),
+        (Quantity("1 ml"), 1),
+        ProfileStep(Quantity("1 ml/min"), 1, "sideways"),  # type: ignore
+    ],
+)
+def test_invalid_steps(step):
+    with pytest.raises(ValueError):
+        FlowProfile([step])
+
+
+async def test_commands(pump: Pump):
+    profile = FlowProfile(
+        [
+            (Quantity("1 ml/min"), 0.01),
+            (Quantity("1 ml/min"), 0.01),
+            (None, 0.01),
+            ProfileStep(Quantity("2 ml/min"), 0.01, "withdraw"),
+        ]
+    )
+    await profile.run(pump)
+
+    assert pump.serial.commands == [
+        "irate 1 ml/min",
+        "irun",
+        "stp",
+        "wrate 2 ml/min",
+        "wrun",
+        "stp",
+    ]
+
+
+async def test_steps_on_schedule(pump: Pump):
+    profile = FlowProfile([(Quantity(f"{i + 1} ml/min"), 0.02) for i in range(5)])
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    reports = await profile.run(pump)
+
+    assert loop.time() - start == pytest.approx(profile.duration, abs=0.015)
+    for i, report in enumerate(reports):
+        assert report.deadline == pytest.approx(start + 0.02 * i, abs=0.005)
+        assert report.lateness < 0.015
+
+
+async def test_elided_rates():
+    pump = Pump(serial=ScriptedSerial(), elide_writes=True)
+    await pump._initialise()
+    pump.serial.commands.clear()
+    note = (Quantity("1 ml/min"), 0.01)
+
+    await FlowProfile([note, (None, 0.01), note]).run(pump)
+
+    assert pump.serial.commands == ["irate 1 ml/min", "irun", "stp", "irun", "stp"]
@@ -1,5 +1,6 @@
 import pytest
 
+from syringe_pump.cassette import read_cassette
 from syringe_pump.exceptions import (
     LimitSwitchError,
     PumpError,
@@ -7,7 +8,8 @@ from syringe_pump.exceptions import (
     PumpStateError,
     TargetReachedError,
 )
-from syringe_pump.response_parser import PumpResponse
+from syringe_pump.response_parser import PumpResponse, ResponseRecord, parse_output
+from tests.conftest import casette_file
 
 
 def test_response_no_output():
@@ -60,3 +62,31 @@ def test_state_exceptions(response, exception, message: str):
     assert isinstance(exc, exception)
     assert "foo" in str(exc)
     assert message.lower() in str(exc).lower()
+
+
+def test_record_custom_address():
+    record = parse_output(b"Pump address set to 2\r\n02:\x11", "addr 2")
+    assert (record.address, record.prompt) == (2, ":")
+    assert record.message == ["Pump address set to 2"]
+    assert "addr 2" in str(record)
+
+
+def test_record_to_model():
+    model = parse_output(b"\n1.69023 ul\r\n>\x11", "ivolume").to_model()
+    assert isinstance(model, PumpResponse)
+    assert model == PumpResponse(
+        command="ivolume",
+        prompt=">",
+        message=["1.69023 ul"],
+        raw_text="1.69023 ul\r\n>",
+    )
+
+
+@pytest.mark.parametrize(
+    "raw_output",
+    [exchange.reply for exchange in read_cassette(casette_file)],
+)
+def test_record_is_valid_response(raw_output: str):
+    record = parse_output(raw_output.encode(), "foo")
+    fields = {f: getattr(record, f) for f in ResponseRecord.__slots__}
+    assert PumpResponse(**fields) == record.to_model()
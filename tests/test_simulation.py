@@ -0,0 +1,105 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump import FlowProfile, Pump
+from syringe_pump.exceptions import TargetReachedError
+from syringe_pump.simulation import VirtualTimeLoop, run, simulated_pump
+from syringe_pump.telemetry import TELEMETRY_COMMANDS
+
+
+def test_sleep_is_instant():
+    async def main():
+        loop = asyncio.get_running_loop()
+        await asyncio.sleep(8 * 3600)
+        return loop.time()
+
+    start = time.perf_counter()
+    assert run(main(), start=100) == 100 + 8 * 3600
+    assert time.perf_counter() - start < 1
+
+
+def test_clock_cannot_go_back():
+    loop = VirtualTimeLoop()
+    with pytest.raises(ValueError):
+        loop.advance(-1)
+    loop.close()
+
+
+def test_concurrent_sleeps():
+    async def sleeper(seconds: float, order: list[float]):
+        await asyncio.sleep(seconds)
+        order.append(asyncio.get_running_loop().time())
+
+    async def main():
+        order = []
+        await asyncio.gather(*[sleeper(s, order) for s in (30, 10, 20)])
+        return order
+
+    assert run(main()) == [10, 20, 30]
+
+
+def test_target_time_stop():
+    async def main():
+        pump = simulated_pump()
+        await pump._initialise()
+        await pump.infusion_rate.set(Quantity("1 ml/min"))
+        await pump.target_time.set(timedelta(hours=2))
+        await pump.run()
+
+        await asyncio.sleep(3 * 3600)
+        with pytest.raises(TargetReachedError):
+            await pump._write("irate")
+        return await pump.infusion_volume.get()
+
+    assert run(main()) == Quantity("120 ml")
+
+
+def test_long_profile_on_schedule():
+    steps = [(Quantity(f"{i % 5 + 1} ul/min"), 600) for i in range(48)]
+
+    async def main(pump_latency: float):
+        pump = simulated_pump(latency=pump_latency)
+        await pump._initialise()
+        reports = await FlowProfile(steps).run(pump)
+        return reports, await pump.infusion_volume.get()
+
+    reports, volume = run(main(pump_latency=0.01))
+
+    assert len(reports) == 48
+    start = reports[0].deadline
+    assert [r.deadline - start for r in reports] == pytest.approx(
+        [600 * i for i in range(48)]
+    )
+    assert max(r.lateness for r in reports) < 1e-6
+    rates = [i % 5 + 1 for i in range(48)]  # ul/min, for 10 minutes each
+    assert volume.real == pytest.approx(sum(rates) * 10e-6)
+
+
+def test_telemetry_is_deterministic():
+    async def main():
+        pump = simulated_pump(latency=0.02)
+        await pump._initialise()
+        await pump.infusion_rate.set(Quantity("1 ml/min"))
+        await pump.run()
+        telemetry = pump.telemetry(interval=60)
+        samples = []
+        async for sample in telemetry:
+            samples.append(sample)
+            if len(samples) == 10:
+                break
+        return samples, telemetry.skipped
+
+    first, skipped = run(main())
+    second, _ = run(main())
+
+    assert first == second
+    assert skipped == 0
+    # one pipelined round trip, answered command by command
+    assert [s.latency for s in first] == pytest.approx(
+        [0.02 * len(TELEMETRY_COMMANDS)] * 10
+    )
+    assert first[-1].infused_volume.real == pytest.approx(9e-3, rel=1e-3)
@@ -0,0 +1,149 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump import Pump
+from syringe_pump.emulator import VirtualSerial
+from syringe_pump.state import PumpState
+from tests.conftest import ScriptedSerial
+
+
+@pytest.fixture
+def serial():
+    return ScriptedSerial(
+        {
+            "irate": "1.5 ml/min",
+            "irate lim": ".0404 nl/min to 26.0035 ml/min",
+            "diameter": "10 mm",
+            "tvolume": "Target volume not set",
+        }
+    )
+
+
+@pytest.fixture
+async def pump(serial: ScriptedSerial):
+    pump = Pump(serial=serial, cache_state=True)
+    await pump._initialise()
+    serial.commands.clear()
+    return pump
+
+
+def test_disabled_state_remembers_nothing():
+    state = PumpState()
+    state.record("irate", 1)
+    assert "irate" not in state
+
+
+def test_dependent_settings_invalidated():
+    state = PumpState(enabled=True)
+    state.record("irate lim", (1, 2))
+    state.record("ttime", None)
+    state.update("diameter", 10)
+    state.update("tvolume", 1)
+
+    assert "irate lim" not in state
+    assert "ttime" not in state
+    assert state["diameter"] == 10
+
+
+async def test_getters_read_once(pump: Pump, serial: ScriptedSerial):
+    for _ in range(3):
+        assert await pump.infusion_rate.get() == Quantity("1.5 ml/min")
+        assert await pump.target_volume.get() is None
+    assert serial.commands == ["irate", "tvolume"]
+
+    await pump.infusion_rate.get(refresh=True)
+    assert serial.commands == ["irate", "tvolume", "irate"]
+
+
+async def test_setters_record_values(pump: Pump, serial: ScriptedSerial):
+    await pump.infusion_rate.set(Quantity("0.0012345678 l/min"))
+    await pump.target_time.set(timedelta(minutes=2, seconds=60))
+
+    assert await pump.infusion_rate.get() == Quantity("1.2346 ml/min")
+    assert await pump.target_time.get() == timedelta(minutes=3)
+    assert serial.commands == ["irate 1.2346 ml/min", "ttime 180"]
+
+
+async def test_diameter_change_invalidates_limits(pump: Pump, serial: ScriptedSerial):
+    await pump.infusion_rate.get_limits()
+    await pump.syringe.set_diameter(12.5)
+    assert await pump.syringe.get_diameter() == Quantity("12.5 mm")
+    await pump.infusion_rate.get_limits()
+
+    assert serial.commands == ["irate lim", "diameter 12.5", "irate lim"]
+
+
+async def test_state_cleared_on_initialise(pump: Pump, serial: ScriptedSerial):
+    await pump.infusion_rate.get()
+    await pump._initialise()
+    serial.commands.clear()
+
+    await pump.infusion_rate.get()
+    assert serial.commands == ["irate"]
+
+
+async def test_redundant_writes_elided(serial: ScriptedSerial):
+    pump = Pump(serial=serial, elide_writes=True)
+    await pump._initialise()
+    serial.commands.clear()
+
+    for _ in range(3):
+        await pump.infusion_rate.set(Quantity("2 ml/min"))
+        await pump.target_volume.set(Quantity("1 ml"))
+        await pump.set_force(50)
+    await pump.infusion_rate.set(Quantity("3 ml/min"))
+
+    assert serial.commands == [
+        "irate 2 ml/min",
+        "tvolume 1 ml",
+        "force 50",
+        "tvolume 1 ml",
+        "tvolume 1 ml",
+        "irate 3 ml/min",
+    ]
+    assert pump.state.elided_writes == 4
+    assert "irate" not in pump.state  # getters still ask the pump
+
+
+async def test_set_mode_forgets_settings(serial: ScriptedSerial):
+    pump = Pump(serial=serial, cache_state=True, elide_writes=True)
+    await pump._initialise()
+    await pump.infusion_rate.set(Quantity("2 ml/min"))
+    serial.commands.clear()
+
+    await pump.set_mode("iw")  # the pump resets its rates and targets
+    await pump.infusion_rate.set(Quantity("2 ml/min"))
+
+    assert serial.commands == ["load qs iw", "irate 2 ml/min"]
+    assert pump.state.elided_writes == 0
+
+
+async def test_elision_follows_invalidation(serial: ScriptedSerial):
+    pump = Pump(serial=serial, elide_writes=True)
+    await pump._initialise()
+    serial.commands.clear()
+
+    await pump.target_time.set(30)
+    await pump.target_volume.set(Quantity("1 ml"))  # the pump drops the target time
+    await pump.target_time.set(30)
+
+    assert serial.commands == ["ttime 30", "tvolume 1 ml", "ttime 30"]
+    assert pump.state.elided_writes == 0
+
+
+async def test_repeated_target_restarts_count():
+    pump = Pump(serial=VirtualSerial(), elide_writes=True)
+    await pump._initialise()
+    await pump.infusion_rate.set(Quantity("1 ml/min"))
+    await pump.target_time.set(60)
+    await pump.run()
+    await asyncio.sleep(0.05)
+
+    await pump.target_time.set(60)  # sent again, so the pump counts from zero
+    status = await pump.status()
+
+    assert status.elapsed < timedelta(seconds=0.05)
+    await pump.stop()
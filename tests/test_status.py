@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump import Pump
+from syringe_pump.exceptions import PumpError
+from syringe_pump.status import parse_status
+from tests.conftest import ScriptedSerial
+
+
+def test_parse_status():
+    status = parse_status("83333333333 1500 125000000000 i.....", ">", 1.0)
+
+    assert status.rate == pytest.approx(Quantity("5 ml/min"))
+    assert status.rate.units == "l/min"
+    assert status.elapsed == timedelta(seconds=1.5)
+    assert status.volume == pytest.approx(Quantity("125 ul"))
+    assert status.direction == "infuse"
+    assert status.running
+    assert not (status.stalled or status.limit_switch or status.target_reached)
+
+
+def test_parse_status_flags():
+    status = parse_status("0 0 0 wls..T", ":", 1.0)
+
+    assert status.direction == "withdraw"
+    assert not status.running
+    assert status.limit_switch and status.stalled and status.target_reached
+
+
+def test_parse_status_error():
+    with pytest.raises(PumpError):
+        parse_status("Command error: status", ":", 1.0)
+
+
+async def test_status_reuse():
+    serial = ScriptedSerial({"status": "0 0 0 i....."})
+    pump = Pump(serial=serial)
+    await pump._initialise()
+    serial.commands.clear()
+
+    first = await pump.status()
+    assert await pump.status(max_age=60) is first
+    assert await pump.status() is not first
+    assert serial.commands == ["status", "status"]
+
+    sample = await pump.telemetry(use_status=True).sample()
+    assert sample.flags == "i....."
+    assert pump.last_status is sample
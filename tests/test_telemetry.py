@@ -0,0 +1,67 @@
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump import Pump
+from syringe_pump.telemetry import RingBuffer
+from tests.conftest import ScriptedSerial
+
+
+@pytest.fixture
+async def pump():
+    serial = ScriptedSerial(
+        {
+            "ivolume": "1.69023 ul",
+            "wvolume": "0 ul",
+            "irate": "5 ml/min",
+            "wrate": "1 ml/min",
+        }
+    )
+    pump = Pump(serial=serial)
+    await pump._initialise()
+    serial.commands.clear()
+    return pump
+
+
+def test_ring_buffer():
+    buffer = RingBuffer(3)
+    assert buffer.latest() is None
+    for i in range(5):
+        buffer.append(i)
+
+    assert list(buffer) == [2, 3, 4]
+    assert len(buffer) == 3
+    assert buffer.latest() == 4
+
+    with pytest.raises(ValueError):
+        RingBuffer(0)
+
+
+async def test_sample_in_one_round_trip(pump: Pump):
+    sample = await pump.telemetry().sample()
+
+    assert pump.serial.commands == ["ivolume", "wvolume", "irate", "wrate"]
+    assert sample.infused_volume == Quantity("1.69023 ul")
+    assert sample.withdrawn_volume == 0
+    assert sample.infusion_rate == Quantity("5 ml/min")
+    assert sample.prompt == ":"
+
+
+async def test_fixed_cadence(pump: Pump):
+    interval = 0.02
+    telemetry = pump.telemetry(interval=interval, history=3)
+
+    samples = []
+    async for sample in telemetry:
+        samples.append(sample)
+        if len(samples) == 5:
+            break
+
+    start = samples[0].time
+    for i, sample in enumerate(samples):
+        assert sample.time == pytest.approx(start + i * interval, abs=interval / 2)
+    assert list(telemetry.buffer) == samples[-3:]
+
+
+async def test_interval_must_be_positive(pump: Pump):
+    with pytest.raises(ValueError):
+        pump.telemetry(interval=0)
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import sys
+
+import pytest
+import serial
+
+from syringe_pump import Pump
+from syringe_pump.response_parser import XON
+from syringe_pump.transport import AsyncioSerial
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="needs a POSIX pty")
+
+
+@pytest.fixture
+def pty():
+    """Yield the pump end of a pseudo-terminal and a transport on the other end."""
+    pump_end, port_end = os.openpty()
+    transport = AsyncioSerial(port=os.ttyname(port_end), timeout=0.5)
+    yield pump_end, transport
+    transport.close()
+    os.close(port_end)
+    os.close(pump_end)
+
+
+async def test_read_frames(pty):
+    pump_end, transport = pty
+    os.write(pump_end, b"\nfoo\r\n:\x11\nbar\r\n")
+
+    assert await transport.read_until_async(XON) == b"\nfoo\r\n:\x11"
+
+    asyncio.get_running_loop().call_later(0.05, os.write, pump_end, b">\x11")
+    assert await transport.read_until_async(XON) == b"\nbar\r\n>\x11"
+
+
+async def test_read_timeout(pty):
+    pump_end, transport = pty
+    os.write(pump_end, b"\npartial")
+
+    assert await transport.read_until_async(XON) == b"\npartial"
+
+
+async def test_write(pty):
+    pump_end, transport = pty
+
+    assert await transport.write_async(b"@irun\r\n") == 7
+    await asyncio.sleep(0.05)
+    assert os.read(pump_end, 100) == b"@irun\r\n"
+
+
+async def test_pump_over_transport(pty):
+    pump_end, transport = pty
+    pump = Pump(serial=transport)
+    pump._initialised = True
+    loop = asyncio.get_running_loop()
+    loop.add_reader(pump_end, lambda: os.read(pump_end, 100))
+    try:
+        os.write(pump_end, b"\n15%\r\n:\x11")
+        assert await pump.get_force() == 15
+    finally:
+        loop.remove_reader(pump_end)
+
+
+async def test_port_not_found():
+    with pytest.raises(serial.SerialException):
+        AsyncioSerial(port="/dev/does-not-exist")
@@ -0,0 +1,40 @@
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump import units
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    units.cache_clear()
+
+
+def test_parse_quantity_cached():
+    first = units.parse_quantity("1.69023 ul")
+    second = units.parse_quantity("1.69023 ul")
+
+    assert first is second
+    assert first == pytest.approx(1.69023e-6)
+    assert first.units == "l"
+    assert units.cache_info()["parse"].hits == 1
+    assert units.cache_info()["parse"].misses == 1
+
+
+@pytest.mark.parametrize(
+    "quantity,text",
+    [
+        ("1 ml/min", "1 ml/min"),
+        ("0.0012345678 l/min", "1.2346 ml/min"),
+        ("20 ml", "20 ml"),
+    ],
+)
+def test_format_quantity(quantity: str, text: str):
+    assert units.format_quantity(Quantity(quantity)) == text
+    assert units.format_quantity(Quantity(quantity)) == text
+    assert units.cache_info()["format"].hits == 1
+
+
+def test_format_quantity_keeps_units_apart():
+    # equal values in different units must not share a cache entry
+    assert units.format_quantity(Quantity("1 ml")) == "1 ml"
+    assert units.format_quantity(Quantity("1 ml/min")) == "1 ml/min"
@@ -0,0 +1,206 @@
+import asyncio
+import sys
+from datetime import timedelta
+
+import pytest
+from quantiphy import Quantity
+
+from syringe_pump import Pump
+from syringe_pump.emulator import PtyServer, VirtualPump, VirtualSerial
+from syringe_pump.exceptions import LimitSwitchError, PumpError, PumpStalledError
+from syringe_pump.group import PumpGroup
+from syringe_pump.simulation import run, simulated_pump
+from syringe_pump.status import PumpStatus
+from syringe_pump.transport import AsyncioSerial
+from syringe_pump.watcher import PumpEvent, predict_remaining
+
+
+async def start_pump(target: Quantity | timedelta) -> Pump:
+    pump = simulated_pump(latency=0.01)
+    await pump._initialise()
+    await pump.infusion_rate.set(Quantity("1 ml/min"))
+    if isinstance(target, timedelta):
+        await pump.target_time.set(target)
+    else:
+        await pump.target_volume.set(target)
+    await pump.run()
+    return pump
+
+
+def test_wait_for_target():
+    async def main():
+        pump = await start_pump(Quantity("10 ml"))
+        start = asyncio.get_running_loop().time()
+        event = await pump.wait_for_target()
+        return event, event.time - start
+
+    event, elapsed = run(main())
+
+    assert event.kind == "target_reached"
+    assert 600 <= elapsed <= 600.2
+
+
+def test_polls_rarely_until_near_target():
+    async def main():
+        pump = await start_pump(timedelta(hours=1))
+        events = []
+        async with pump.watch(min_interval=0.1, max_interval=60) as watcher:
+            watcher.callbacks.append(events.append)
+            await watcher.wait("target_reached")
+        return watcher.polls, events
+
+    polls, events = run(main())
+
+    assert [event.kind for event in events] == ["target_reached"]
+    assert polls < 60 + 20  # one per minute, then halving the remaining time
+
+
+def test_prompt_of_other_commands_noticed():
+    async def main():
+        pump = await start_pump(timedelta(minutes=1))
+        async with pump.watch(min_interval=3600, max_interval=3600) as watcher:
+            await asyncio.sleep(90)
+            await pump.infusion_volume.get()
+            event = await watcher.wait()
+        return watcher.polls, event
+
+    polls, event = run(main())
+
+    assert polls == 1
+    assert (event.kind, event.command) == ("target_reached", "ivolume")
+
+
+def test_synchronized_stop_noticed():
+    async def main():
+        pump = await start_pump(timedelta(minutes=1))
+        group = PumpGroup([pump])
+        async with pump.watch(min_interval=3600, max_interval=3600) as watcher:
+            await asyncio.sleep(1)  # the first poll sees the pump running
+            await group.stop_synchronized()
+            event = await asyncio.wait_for(watcher.wait(), 60)
+        return watcher.polls, event
+
+    polls, event = run(main())
+
+    assert polls == 1
+    assert (event.kind, event.command) == ("stopped", "stp")
+
+
+def test_wait_for_target_when_stopped():
+    async def main():
+        pump = await start_pump(Quantity("10 ml"))
+
+        async def stop_later():
+            await asyncio.sleep(60)
+            await pump.stop()
+
+        with pytest.raises(PumpError, match="stopped before"):
+            await asyncio.gather(pump.wait_for_target(), stop_later())
+        with pytest.raises(PumpError, match="not running"):
+            await pump.wait_for_target()
+
+    run(main())
+
+
+class FaultyPump(VirtualPump):
+    """A virtual pump showing a fault prompt."""
+
+    def __init__(self, fault: str) -> None:
+        super().__init__()
+        self.fault = fault
+
+    @property
+    def prompt(self) -> str:
+        return self.fault
+
+
+@pytest.mark.parametrize(
+    "fault, error", [("*", PumpStalledError), (">*", LimitSwitchError)]
+)
+async def test_wait_for_target_after_fault(fault: str, error: type):
+    pump = Pump(serial=VirtualSerial(FaultyPump(fault)))
+    await pump._initialise()
+
+    with pytest.raises(error):
+        await pump.wait_for_target()
+
+
+def test_wait_for_target_reached_already():
+    async def main():
+        pump = await start_pump(timedelta(seconds=10))
+        await asyncio.sleep(20)
+        return await pump.wait_for_target(timeout=1)
+
+    assert run(main()).kind == "target_reached"
+
+
+def test_wait_for_target_timeout():
+    async def main():
+        pump = await start_pump(Quantity("10 ml"))
+        with pytest.raises(asyncio.TimeoutError):
+            await pump.wait_for_target(timeout=60)
+        assert not pump.command_hooks
+
+    run(main())
+
+
+def test_transport_failure_reaches_waiters():
+    async def main():
+        pump = await start_pump(Quantity("10 ml"))
+
+        async def unplugged(*args, **kwargs):
+            raise OSError("device disconnected")
+
+        loop = asyncio.get_running_loop()
+        loop.call_later(60, setattr, pump.serial, "read_until_async", unplugged)
+        start = loop.time()
+        with pytest.raises(OSError, match="disconnected"):
+            await asyncio.wait_for(pump.wait_for_target(), 3600)
+        assert loop.time() - start < 120  # raised by the failed poll, not on timeout
+
+    run(main())
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs a POSIX pty")
+async def test_timeout_leaves_no_reply_on_the_line():
+    server = PtyServer(VirtualPump(), latency=0.05)
+    port = await server.start()
+    transport = AsyncioSerial(port=port, timeout=0.5)
+    try:
+        pump = Pump(serial=transport)
+        await pump._initialise()
+        await pump.infusion_rate.set(Quantity("1 ml/min"))
+        await pump.target_time.set(timedelta(minutes=1))
+        await pump.run()
+
+        with pytest.raises(asyncio.TimeoutError):
+            await pump.wait_for_target(timeout=0.25, min_interval=0.01)
+
+        assert (await pump.status()).running
+        await pump.stop()
+    finally:
+        transport.close()
+        server.close()
+
+
+def test_event_errors():
+    assert isinstance(PumpEvent("stalled", "*", "irun", 0).error(), PumpStalledError)
+    assert isinstance(
+        PumpEvent("limit_switch", ">*", "irun", 0).error(), LimitSwitchError
+    )
+
+
+def test_predict_remaining():
+    status = PumpStatus(
+        time=0,
+        prompt=">",
+        rate=Quantity("2 ml/min"),
+        elapsed=timedelta(seconds=30),
+        volume=Quantity("1 ml"),
+        flags="i.....",
+    )
+
+    assert predict_remaining(status, None, None) is None
+    assert predict_remaining(status, Quantity("3 ml"), None) == pytest.approx(60)
+    assert predict_remaining(status, Quantity("3 ml"), timedelta(seconds=40)) == 10
+    assert predict_remaining(status, None, timedelta(seconds=10)) == 0